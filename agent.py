@@ -9,8 +9,8 @@ logging.getLogger("livekit.plugins").setLevel(logging.WARNING)
 
 logger = logging.getLogger("agent")
 
-from livekit import agents, rtc
-from livekit.agents import AgentSession, Agent, RoomInputOptions, JobProcess, MetricsCollectedEvent, metrics, function_tool, RunContext, AgentFalseInterruptionEvent
+from livekit import agents
+from livekit.agents import AgentSession, Agent, RoomInputOptions, JobProcess, MetricsCollectedEvent, metrics, function_tool, RunContext, AgentFalseInterruptionEvent, utils
 from livekit.plugins import (
     openai,
     noise_cancellation,
@@ -18,214 +18,133 @@ from livekit.plugins import (
     elevenlabs,
     cartesia
 )
+from livekit.agents.types import NOT_GIVEN
+from livekit.agents.voice.events import UserInputTranscribedEvent
 from livekit.plugins.turn_detector.multilingual import MultilingualModel
+from models.batching import BatchingOptions, batch_scheduler
+from models.executor import default_executor
+from models.hedging import HedgingOptions, RequestHedger
+from models.intents import WEBSITE_INTENTS, FastPathRouter, IntentIndex
+from models.navigation import NavigationBus, NavigationOptions
+from models.profiling import profiler
+from models.registry import ModelKey, whisper_registry
+from models.response_cache import ResponseCacheOptions, response_cache
+from models.retrieval import Document, RetrievalOptions, SiteIndex
+from models.streaming import StreamingOptions
+from models.tracing import OTLPJsonFileExporter, PrometheusExporter, TurnTracer, traced
+from models.trimming import SpeechTrimmer
 from models.stt import WhisperSTT
-from models.llm import OllamaLLM
-import json
+from models.tiers import SttTier, TierOptions, tier_router
+from models.history import HistoryOptions
+from models.llm import OllamaLLM, OllamaPoolOptions, PromptCacheOptions, ollama_pool
+from models.router import RoutedLLM, RoutingOptions
+from models.segmenter import SegmenterOptions, UrduSentenceTokenizer
+from models.tts_cache import AudioCache, CachedTTS
+import asyncio
 import os
+import aiohttp
 
 
-def prewarm(proc: JobProcess):
-    """Pre-warm VAD model for faster startup."""
-    proc.userdata["vad"] = silero.VAD.load(
-        min_silence_duration=0.12,  # Slightly increased to reduce false interruptions
-        prefix_padding_duration=0.05,  # Reduced from 0.08 to reduce audio buffering delay
-        activation_threshold=0.65,  # Increased from 0.60 to reduce false interruptions (less sensitive)
-        # deactivation_threshold=0.25,
-        sample_rate=8000,
-    )
-
-
-class Assistant(Agent):
-    def __init__(self) -> None:
-        self._room = None
-        
-        # Create function tools using decorator pattern
-        # Access room through ctx.session.room (available when function is called)
-        @function_tool()
-        async def scroll_to_section(ctx: RunContext, section_id: str) -> str:
-            """
-            Website پر کسی specific section تک scroll کریں۔ جب user pricing، features، about، agents، demo، ya contact sections دیکھنا چاہے تو یہ use کریں۔
-            
-            Args:
-                section_id: Section ID جہاں scroll کرنا ہے: home، about، agents، features، plans (pricing)، demo، ya contact
-            """
-            # Try multiple ways to access the room
-            room = None
-            # Method 1: Try self._room (set via set_room() in entrypoint)
-            if self._room:
-                room = self._room
-            # Method 2: Try ctx.session.room
-            elif hasattr(ctx.session, 'room'):
-                room = ctx.session.room
-            # Method 3: Try session's internal _room
-            elif hasattr(ctx.session, '_room'):
-                room = ctx.session._room
-            
-            if room:
-                command = {
-                    "type": "scroll",
-                    "target": section_id
-                }
-                try:
-                    command_json = json.dumps(command)
-                    command_bytes = command_json.encode("utf-8")
-                    
-                    # Send navigation command via LiveKit data channel
-                    await room.local_participant.publish_data(
-                        command_bytes,
-                        topic="navigation",
-                        reliable=True
-                    )
-                    print(f"✅ Navigation command sent via data channel: {command_json}")
-                    
-                    print(f"   Room name: {room.name}")
-                    print(f"   Remote participants: {len(room.remote_participants)}")
-                    return f"Scrolled to {section_id} section"
-                except Exception as e:
-                    error_msg = f"Error scrolling: {str(e)}"
-                    print(f"❌ {error_msg}")
-                    import traceback
-                    print(f"   Traceback: {traceback.format_exc()}")
-                    return error_msg
-            print(f"⚠️ Room not available for scrolling to {section_id}")
-            print(f"   self._room is: {self._room}")
-            return f"Would scroll to {section_id} section (room not available)"
-        
-        @function_tool()
-        async def navigate_to_page(ctx: RunContext, page_path: str) -> str:
-            """
-            Website پر کسی different page پر navigate کریں۔ جب user use cases page ya koi aur page پر jana chahe تو یہ use کریں۔
-            
-            Args:
-                page_path: Page path جہاں navigate کرنا ہے، مثال: /use-cases
-            """
-            # Try multiple ways to access the room
-            room = None
-            # Method 1: Try self._room (set via set_room() in entrypoint)
-            if self._room:
-                room = self._room
-            # Method 2: Try ctx.session.room
-            elif hasattr(ctx.session, 'room'):
-                room = ctx.session.room
-            # Method 3: Try session's internal _room
-            elif hasattr(ctx.session, '_room'):
-                room = ctx.session._room
-            
-            if room:
-                command = {
-                    "type": "navigate",
-                    "target": page_path
-                }
-                try:
-                    command_json = json.dumps(command)
-                    command_bytes = command_json.encode("utf-8")
-                    
-                    # Send navigation command via LiveKit data channel
-                    await room.local_participant.publish_data(
-                        command_bytes,
-                        topic="navigation",
-                        reliable=True
-                    )
-                    print(f"✅ Navigation command sent via data channel: {command_json}")
-                    
-                    return f"Navigated to {page_path}"
-                except Exception as e:
-                    error_msg = f"Error navigating: {str(e)}"
-                    print(f"❌ {error_msg}")
-                    import traceback
-                    print(f"   Traceback: {traceback.format_exc()}")
-                    return error_msg
-            print(f"⚠️ Room not available for navigating to {page_path}")
-            return f"Would navigate to {page_path} (room not available)"
-        
-        @function_tool()
-        async def get_section_info(ctx: RunContext, section_id: str) -> str:
-            """
-            Website section کے بارے میں معلومات حاصل کریں۔ جب user کسی section کے بارے میں پوچھے تو یہ use کریں تاکہ پتہ چل سکے کہ اس section میں کیا content ہے۔
-            
-            Args:
-                section_id: Section ID جس کے بارے میں معلومات چاہیے
-            """
-            section_info_map = {
-                "home": "Main landing page with hero section introducing Urdu AI Voice Agents",
-                "about": "Information about our AI Voice Agent - natural conversations in Urdu and English, 24/7 available for customer support, sales, and business needs",
-                "agents": "Three use cases: WhatsApp Inbound Calling (restaurants, order taking), WhatsApp Outbound Calling (sales, healthcare reminders), Web Voice Widget (website integration, database connectivity)",
-                "features": "Key features: Multilingual support (Urdu + English), Natural conversation, Real-time processing, Analytics, Customizable, Scalable",
-                "plans": "Three pricing tiers: Basic ($99/month, 500 calls), Pro ($299/month, 5,000 calls, most popular), Enterprise ($999/month, unlimited calls)",
-                "demo": "Interactive live demo where users can test the AI Voice Agent directly by speaking in Urdu or English",
-                "contact": "Contact information for inquiries and support"
-            }
-            return section_info_map.get(section_id, "Section information not available")
-        
-        super().__init__(
-            instructions="""
-# ویب ویجیٹ اسسٹنٹ - جنریشن زی (Gen Z) لاہوری
+def whisper_tiers() -> list[str]:
+    """Opt-in STT tiers, best first, e.g. WHISPER_TIERS=small,base:int8; empty for a single model."""
+    return [tier.strip() for tier in os.getenv("WHISPER_TIERS", "").split(",") if tier.strip()]
 
-## بنیادی شناخت
-آپ ایک ویب ویجیٹ اسسٹنٹ ہیں جو website visitors کی مدد کرتی ہیں۔ آپ ایک 20 سالہ نوجوان پاکستانی لڑکی ہیں جو لاہور سے تعلق رکھتی ہے۔ آپ کا انداز دوستانہ، جدید اور 'Gen Z' والا ہے۔ آپ روبوٹ کی طرح نہیں بلکہ ایک سمجھدار دوست کی طرح بات کرتی ہیں جو website navigation میں مدد کرتی ہے۔
 
-## آپ کا کام
-- Website navigation میں مدد کریں - users کو مختلف sections تک لے جائیں
-- Page content کے بارے میں معلومات دیں
-- Natural conversation کریں جب users sections کے بارے میں پوچھیں
-- Voice commands کو understand کریں اور navigation actions perform کریں
+def whisper_options(tier: str | None = None) -> dict:
+    """Whisper settings shared by prewarm and every session in the worker.
 
-## زبان اور گفتگو کا انداز (Minglish)
-- **اردو اور انگریزی کا ملاپ:** آپ پکی اردو نہیں بولتیں، بلکہ قدرتی طور پر اردو اور انگریزی مکس کرتی ہیں۔
-- **الفاظ کا استعمال:** مشکل اردو الفاظ کی جگہ عام انگریزی الفاظ استعمال کریں (مثال: "مسئلہ" کی جگہ "Issue"، "انتظار" کی جگہ "Wait"، "پریشان" کی جگہ "Tension")۔
-- **ٹکیہ کلام (Fillers):** جملوں میں "Actually", "Basically", "You know", "Honestly", "Like" جیسے الفاظ کا استعمال قدرتی انداز میں کریں۔
-- **لہجہ:** آپ کا لہجہ بہت 'Cool'، شائستہ اور یقین دلانے والا ہے۔
-
-## جواب کا طریقہ
-- لمبی تقریریں نہیں کرنی، بات چیت conversational رکھنی ہے۔
-- اگر صارف پریشان ہو تو کہیں: "Don't worry, hum fix kar lein ge"۔
-- بہت زیادہ formal نہیں ہونا، "آپ" کا استعمال کریں لیکن لہجہ دوستانہ رکھیں۔
+    ``tier`` is a WHISPER_TIERS entry, "model" or "model:compute_type";
+    by default the first one if tiers are configured.
+    """
+    model, _, compute_type = (tier or next(iter(whisper_tiers()), "")).partition(":")
+    return dict(
+        model=model or os.getenv("WHISPER_MODEL", "base"),  # base, small, medium, large-v2, large-v3
+        device=os.getenv("WHISPER_DEVICE", "cuda"),  # cuda or cpu
+        compute_type=compute_type or os.getenv("WHISPER_COMPUTE_TYPE", "float16"),  # float16, float32, int8
+        model_cache_directory=os.getenv("WHISPER_CACHE_DIR", "/workspace/models/whisper"),
+    )
 
-## Website Sections کے بارے میں معلومات
 
-### Home Section (id: "home")
+# Website sections of the instructions, one per document, so they can be sent only when relevant
+SECTION_ALIASES = {intent.target: intent.aliases for intent in WEBSITE_INTENTS}
+WEBSITE_SECTIONS = (
+    Document("home", """### Home Section (id: "home")
 - Main landing page with hero section
 - Headline: "اردو AI Voice Agents" / "Intelligent Conversational AI for Voice"
 - Subtitle: "24/7 AI Voice Support in Urdu & English"
-
-### About Section (id: "about")
+""", SECTION_ALIASES["home"]),
+    Document("about", """### About Section (id: "about")
 - Title: "ہمارا پروڈکٹ"
 - Description: AI Voice Agent جو اردو اور انگریزی دونوں میں natural conversations کر سکتا ہے
 - 24/7 available ہے customer support، sales، اور business needs کے لیے
 - Intelligent، context-aware responses دیتا ہے
-
-### Agents/Use Cases Section (id: "agents")
+""", SECTION_ALIASES["about"]),
+    Document("agents", """### Agents/Use Cases Section (id: "agents")
 - Title: "استعمال کی مثالیں"
 - تین main types:
   1. WhatsApp Inbound Calling - incoming calls handle کرتا ہے، restaurants کے لیے perfect (order taking، menu info، booking confirmation)
   2. WhatsApp Outbound Calling - automated calls sales کے لیے، follow-ups، healthcare reminders
   3. Web Voice Widget - websites پر embed کیا جا سکتا ہے، databases سے connect ہوتا ہے، real-time information access
-
-### Features Section (id: "features")
+""", SECTION_ALIASES["agents"] + SECTION_ALIASES["/use-cases"]),
+    Document("features", """### Features Section (id: "features")
 - Multilingual support (Urdu + English)
 - Natural conversation
 - Real-time processing
 - Analytics
 - Customizable
 - Scalable
-
-### Pricing Section (id: "plans")
+""", SECTION_ALIASES["features"]),
+    Document("plans", """### Pricing Section (id: "plans")
 - تین tiers:
   - Basic: $99/month - 500 calls/month، small businesses کے لیے
   - Pro: $299/month - 5,000 calls/month، growing businesses کے لیے (most popular)
   - Enterprise: $999/month - Unlimited calls، large enterprises کے لیے
-
-### Demo Section (id: "demo")
+""", SECTION_ALIASES["plans"]),
+    Document("demo", """### Demo Section (id: "demo")
 - Interactive live demo
 - Users یہاں AI Voice Agent test کر سکتے ہیں directly
 - Urdu یا English میں بات کر سکتے ہیں
-
-### Contact Section (id: "contact")
+""", SECTION_ALIASES["demo"]),
+    Document("contact", """### Contact Section (id: "contact")
 - Contact information
 - Inquiries اور support کے لیے email اور phone
+""", SECTION_ALIASES["contact"]),
+)
+# What get_section_info answers, in one line per section
+SECTION_INFO = {
+    "home": "Main landing page with hero section introducing Urdu AI Voice Agents",
+    "about": "Information about our AI Voice Agent - natural conversations in Urdu and English, 24/7 available for customer support, sales, and business needs",
+    "agents": "Three use cases: WhatsApp Inbound Calling (restaurants, order taking), WhatsApp Outbound Calling (sales, healthcare reminders), Web Voice Widget (website integration, database connectivity)",
+    "features": "Key features: Multilingual support (Urdu + English), Natural conversation, Real-time processing, Analytics, Customizable, Scalable",
+    "plans": "Three pricing tiers: Basic ($99/month, 500 calls), Pro ($299/month, 5,000 calls, most popular), Enterprise ($999/month, unlimited calls)",
+    "demo": "Interactive live demo where users can test the AI Voice Agent directly by speaking in Urdu or English",
+    "contact": "Contact information for inquiries and support"
+}
+
+INSTRUCTIONS = """
+# ویب ویجیٹ اسسٹنٹ - جنریشن زی (Gen Z) لاہوری
+
+## بنیادی شناخت
+آپ ایک ویب ویجیٹ اسسٹنٹ ہیں جو website visitors کی مدد کرتی ہیں۔ آپ ایک 20 سالہ نوجوان پاکستانی لڑکی ہیں جو لاہور سے تعلق رکھتی ہے۔ آپ کا انداز دوستانہ، جدید اور 'Gen Z' والا ہے۔ آپ روبوٹ کی طرح نہیں بلکہ ایک سمجھدار دوست کی طرح بات کرتی ہیں جو website navigation میں مدد کرتی ہے۔
+
+## آپ کا کام
+- Website navigation میں مدد کریں - users کو مختلف sections تک لے جائیں
+- Page content کے بارے میں معلومات دیں
+- Natural conversation کریں جب users sections کے بارے میں پوچھیں
+- Voice commands کو understand کریں اور navigation actions perform کریں
+
+## زبان اور گفتگو کا انداز (Minglish)
+- **اردو اور انگریزی کا ملاپ:** آپ پکی اردو نہیں بولتیں، بلکہ قدرتی طور پر اردو اور انگریزی مکس کرتی ہیں۔
+- **الفاظ کا استعمال:** مشکل اردو الفاظ کی جگہ عام انگریزی الفاظ استعمال کریں (مثال: "مسئلہ" کی جگہ "Issue"، "انتظار" کی جگہ "Wait"، "پریشان" کی جگہ "Tension")۔
+- **ٹکیہ کلام (Fillers):** جملوں میں "Actually", "Basically", "You know", "Honestly", "Like" جیسے الفاظ کا استعمال قدرتی انداز میں کریں۔
+- **لہجہ:** آپ کا لہجہ بہت 'Cool'، شائستہ اور یقین دلانے والا ہے۔
 
-## Navigation Commands Examples
+## جواب کا طریقہ
+- لمبی تقریریں نہیں کرنی، بات چیت conversational رکھنی ہے۔
+- اگر صارف پریشان ہو تو کہیں: "Don't worry, hum fix kar lein ge"۔
+- بہت زیادہ formal نہیں ہونا، "آپ" کا استعمال کریں لیکن لہجہ دوستانہ رکھیں۔
+
+{sections}## Navigation Commands Examples
 
 جب user کہے:
 - "pricing dikhao" یا "Show me pricing" → scroll_to_section("plans") use کریں
@@ -240,13 +159,215 @@ class Assistant(Agent):
 - Scrolling/navigating کے بعد naturally اس section کا content discuss کریں
 - Conversational اور helpful رہیں
 - Tools proactively use کریں - explicit "scroll" command کا wait نہ کریں اگر user کچھ دیکھنا چاہتا ہے
-            """,
+            """
+# With SITE_RETRIEVAL=1, in place of the sections: the relevant ones come with each message
+SITE_RETRIEVAL_NOTE = """## Website Sections
+Website کے sections: home، about، agents (use cases)، features، plans (pricing)، demo، contact۔
+User کے message سے متعلق sections کی معلومات اس کے بعد ایک system message میں دی جاتی ہیں، جواب انہی کی بنیاد پر دیں۔ اگر کسی section کی معلومات نہ دی گئی ہوں تو get_section_info use کریں۔
+
+"""
+
+
+def assistant_instructions(site_retrieval: bool = False) -> str:
+    """The Assistant's instructions, with every website section or, for SITE_RETRIEVAL, a note instead."""
+    if site_retrieval:
+        return INSTRUCTIONS.format(sections=SITE_RETRIEVAL_NOTE)
+    return INSTRUCTIONS.format(
+        sections="## Website Sections کے بارے میں معلومات\n\n" + "".join(f"{section.text}\n" for section in WEBSITE_SECTIONS)
+    )
+
+
+GREETING = "السلام علیکم! میں آپ کی ویب سائٹ اسسٹنٹ ہوں۔ آپ مجھے voice commands دے سکتے ہیں - جیسے pricing دکھاؤ۔ کیا آپ help چاہتے ہیں؟"
+# Fixed wording synthesized into the TTS cache at prewarm
+CACHED_PHRASES = (GREETING, *SECTION_INFO.values())
+
+# voice_id="m5qndnI7u4OAdXhH0Mr5"  # Krishna - was working before with Urdu
+TTS_VOICE_ID = "zmh5xhBvMzqR4ZlXgcgL"  # Monika Sogam - alternative
+TTS_MODEL = "eleven_turbo_v2_5"
+
+
+def warm_tts_cache(cache: AudioCache, timeout: float = 30.0) -> int:
+    """Synthesize the fixed phrases missing from the cache, before any call needs them."""
+    if not os.getenv("ELEVEN_API_KEY"):
+        logger.warning("TTS cache: ELEVEN_API_KEY not set; missing phrases are synthesized on first use")
+        return 0
+
+    async def warm() -> int:
+        # prewarm has no job context, so the plugin gets its own HTTP session
+        async with aiohttp.ClientSession() as http_session:
+            tts = CachedTTS(
+                elevenlabs.TTS(voice_id=TTS_VOICE_ID, model=TTS_MODEL, language="hi", http_session=http_session),
+                cache,
+                voice_id=TTS_VOICE_ID,
+                model=TTS_MODEL,
+            )
+            return await asyncio.wait_for(tts.warm(CACHED_PHRASES), timeout)
+
+    try:
+        return asyncio.run(warm())
+    except Exception as e:
+        logger.warning(f"TTS cache warm-up failed: {e}")
+        return 0
+
+
+def prewarm(proc: JobProcess):
+    """Pre-warm VAD and Whisper models for faster startup."""
+    # Opt-in hot-path histograms (find_time), served as JSON on STATS_PORT
+    if os.getenv("PROFILING", "0") == "1":
+        profiler.enabled = True
+        profiler.serve("0.0.0.0", int(os.getenv("STATS_PORT", "8083")))
+    proc.userdata["vad"] = silero.VAD.load(
+        min_silence_duration=0.12,  # Slightly increased to reduce false interruptions
+        prefix_padding_duration=0.05,  # Reduced from 0.08 to reduce audio buffering delay
+        activation_threshold=0.65,  # Increased from 0.60 to reduce false interruptions (less sensitive)
+        # deactivation_threshold=0.25,
+        sample_rate=8000,
+    )
+    # One Ollama connection pool for every session in this process
+    ollama_pool.configure(OllamaPoolOptions(
+        max_connections=int(os.getenv("OLLAMA_MAX_CONNECTIONS", "50")),
+        http2=os.getenv("OLLAMA_HTTP2", "0") == "1",
+        ping_interval=float(os.getenv("OLLAMA_PING_INTERVAL", "30")),
+    ))
+    # Answers to repeated questions, shared by every call in this process
+    response_cache.configure(ResponseCacheOptions(
+        ttl=float(os.getenv("RESPONSE_CACHE_TTL", "3600")),
+        prompt_version=os.getenv("PROMPT_VERSION", ""),
+    ))
+    # Bounded pool that keeps Whisper decoding off the event loop; prewarm runs for
+    # every job in thread mode, and all of them share the pool created by the first
+    stt_workers = int(os.getenv("STT_MAX_WORKERS", "1"))
+    stt_executor_kind = os.getenv("STT_EXECUTOR", "thread")  # thread or process
+    proc.userdata["stt_executor"] = default_executor(
+        kind=stt_executor_kind,
+        max_workers=stt_workers,
+        max_queue_size=int(os.getenv("STT_MAX_QUEUE", "4")),
+        preload=(
+            tuple(ModelKey(**whisper_options(tier)) for tier in whisper_tiers() or [None])
+            if stt_executor_kind == "process" else ()
+        ),
+    )
+    # Held for the life of the process so sessions never reload the weights
+    proc.userdata["whisper"] = whisper_registry.acquire(**whisper_options(), num_workers=stt_workers)
+    # Opt-in: decode utterances from concurrent calls as one batch
+    batching = None
+    if os.getenv("STT_BATCHING", "0") == "1":
+        batching = BatchingOptions(
+            max_batch_size=int(os.getenv("STT_BATCH_SIZE", "8")),
+            max_wait_ms=float(os.getenv("STT_BATCH_WAIT_MS", "10")),
+        )
+    proc.userdata["stt_batcher"] = None
+    if batching is not None:
+        proc.userdata["stt_batcher"] = batch_scheduler(proc.userdata["whisper"], proc.userdata["stt_executor"], batching)
+    # Opt-in: keep every tier's model resident and pick one per utterance by load
+    proc.userdata["stt_tiers"] = None
+    tier_names = whisper_tiers()
+    if tier_names:
+        tiers = [SttTier(tier_names[0], proc.userdata["whisper"], proc.userdata["stt_batcher"])]
+        for tier in tier_names[1:]:
+            entry = whisper_registry.acquire(**whisper_options(tier), num_workers=stt_workers)
+            batcher = batch_scheduler(entry, proc.userdata["stt_executor"], batching) if batching is not None else None
+            tiers.append(SttTier(tier, entry, batcher))
+        proc.userdata["stt_tiers"] = tier_router(tiers, proc.userdata["stt_executor"], TierOptions(
+            slo_ms=float(os.getenv("STT_SLO_MS", "1000")),
+            upgrade_after=int(os.getenv("STT_TIER_UPGRADE_AFTER", "8")),
+        ))
+    # Opt-in: cut silence out of each utterance with the VAD above before decoding
+    proc.userdata["stt_trimmer"] = None
+    if os.getenv("STT_VAD_TRIM", "0") == "1":
+        proc.userdata["stt_trimmer"] = SpeechTrimmer(proc.userdata["vad"])
+    # Compiled once: navigation commands matched on final transcripts, ahead of the LLM
+    proc.userdata["intent_index"] = IntentIndex() if os.getenv("FAST_PATH_INTENTS", "0") == "1" else None
+    # Opt-in: replay synthesized audio for fixed phrases (the greeting, section info) from memory or disk
+    proc.userdata["tts_cache"] = None
+    if os.getenv("TTS_CACHE", "0") == "1":
+        proc.userdata["tts_cache"] = AudioCache(os.getenv("TTS_CACHE_DIR", "tts_cache"))
+        logger.info(f"TTS cache: {proc.userdata['tts_cache'].load()} phrases loaded")
+        logger.info(f"TTS cache: {warm_tts_cache(proc.userdata['tts_cache'])} phrases synthesized")
+    # Opt-in: index the website sections once; each request gets the top ones instead of all
+    proc.userdata["site_index"] = None
+    if os.getenv("SITE_RETRIEVAL", "0") == "1":
+        proc.userdata["site_index"] = SiteIndex(
+            WEBSITE_SECTIONS, RetrievalOptions(top_k=int(os.getenv("SITE_RETRIEVAL_TOP_K", "2")))
+        )
+    logger.info(f"Whisper models resident: {whisper_registry.stats()}")
+
+
+class Assistant(Agent):
+    def __init__(
+        self,
+        fast_path: FastPathRouter | None = None,
+        navigation: NavigationBus | None = None,
+        site_index: SiteIndex | None = None,
+    ) -> None:
+        self._navigation = navigation
+        # With a site index, each request carries only the website sections it needs
+        self._site_index = site_index
+        # Navigation already sent from the transcript is not sent again by the tools
+        self._fast_path = fast_path
+        
+        # Create function tools using decorator pattern
+        # Navigation tools queue their commands on the room's NavigationBus
+        @function_tool()
+        @traced("tool.scroll_to_section")
+        async def scroll_to_section(ctx: RunContext, section_id: str) -> str:
+            """
+            Website پر کسی specific section تک scroll کریں۔ جب user pricing، features، about، agents، demo، ya contact sections دیکھنا چاہے تو یہ use کریں۔
+            
+            Args:
+                section_id: Section ID جہاں scroll کرنا ہے: home، about، agents، features، plans (pricing)، demo، ya contact
+            """
+            command = {"type": "scroll", "target": section_id}
+            if self._navigation is None:
+                print(f"⚠️ Room not available for scrolling to {section_id}")
+                return f"Would scroll to {section_id} section (room not available)"
+            if self._fast_path is not None and not self._fast_path.claim(command):
+                print(f"⏩ Navigation command already sent by fast path: {command}")
+                return f"Scrolled to {section_id} section"
+            # Queued: the reply doesn't wait for the data channel round trip
+            self._navigation.send(command)
+            return f"Scrolled to {section_id} section"
+        
+        @function_tool()
+        @traced("tool.navigate_to_page")
+        async def navigate_to_page(ctx: RunContext, page_path: str) -> str:
+            """
+            Website پر کسی different page پر navigate کریں۔ جب user use cases page ya koi aur page پر jana chahe تو یہ use کریں۔
+            
+            Args:
+                page_path: Page path جہاں navigate کرنا ہے، مثال: /use-cases
+            """
+            command = {"type": "navigate", "target": page_path}
+            if self._navigation is None:
+                print(f"⚠️ Room not available for navigating to {page_path}")
+                return f"Would navigate to {page_path} (room not available)"
+            if self._fast_path is not None and not self._fast_path.claim(command):
+                print(f"⏩ Navigation command already sent by fast path: {command}")
+                return f"Navigated to {page_path}"
+            self._navigation.send(command)
+            return f"Navigated to {page_path}"
+        
+        @function_tool()
+        @traced("tool.get_section_info")
+        async def get_section_info(ctx: RunContext, section_id: str) -> str:
+            """
+            Website section کے بارے میں معلومات حاصل کریں۔ جب user کسی section کے بارے میں پوچھے تو یہ use کریں تاکہ پتہ چل سکے کہ اس section میں کیا content ہے۔
+            
+            Args:
+                section_id: Section ID جس کے بارے میں معلومات چاہیے
+            """
+            return SECTION_INFO.get(section_id, "Section information not available")
+        
+        super().__init__(
+            instructions=assistant_instructions(site_retrieval=site_index is not None),
             tools=[scroll_to_section, navigate_to_page, get_section_info]
         )
     
-    def set_room(self, room: rtc.Room):
-        """Set the room for sending data messages"""
-        self._room = room
+    def llm_node(self, chat_ctx, tools, model_settings):
+        # Added here rather than in on_user_turn_completed, which would invalidate preemptive generation
+        if self._site_index is not None:
+            chat_ctx = self._site_index.with_context(chat_ctx)
+        return Agent.default.llm_node(self, chat_ctx, tools, model_settings)
 
 
 async def entrypoint(ctx: agents.JobContext):
@@ -259,14 +380,24 @@ async def entrypoint(ctx: agents.JobContext):
     # voice_id="m5qndnI7u4OAdXhH0Mr5" - your original voice
     # voice_id="EXAVITQu4vr4xnSDxMaL" - Sarah (well-tested multilingual fallback)
     # Try Krishna voice (was working before) or Monika Sogam
+    # Opt-in: split replies on Urdu punctuation (۔ ؟ ،) and send the first clause to TTS early
+    segmenter = None
+    if os.getenv("TTS_SEGMENTER", "0") == "1":
+        segmenter = UrduSentenceTokenizer(SegmenterOptions(
+            first_min_chars=int(os.getenv("TTS_FIRST_CHUNK_CHARS", "12")),
+            min_chars=int(os.getenv("TTS_MIN_CHUNK_CHARS", "40")),
+            max_chars=int(os.getenv("TTS_MAX_CHUNK_CHARS", "160")),
+        ))
     tts=elevenlabs.TTS(
-        # voice_id="m5qndnI7u4OAdXhH0Mr5",  # Krishna - was working before with Urdu
-        voice_id="zmh5xhBvMzqR4ZlXgcgL",  # Monika Sogam - alternative
-        model="eleven_turbo_v2_5",
+        voice_id=TTS_VOICE_ID,
+        model=TTS_MODEL,
+        word_tokenizer=segmenter or NOT_GIVEN,
         language="hi"
         # No language parameter - let ElevenLabs auto-detect
         # Hindi voices can handle Urdu text when language is auto-detected
     )
+    if ctx.proc.userdata["tts_cache"] is not None:
+        tts = CachedTTS(tts, ctx.proc.userdata["tts_cache"], voice_id=TTS_VOICE_ID, model=TTS_MODEL)
     # tts=cartesia.TTS(
     #         model="sonic-3",
     #         voice="b7d50908-b17c-442d-ad8d-810c63997ed9",
@@ -275,24 +406,61 @@ async def entrypoint(ctx: agents.JobContext):
     
     # Use cache key for prompt caching (enables faster responses with cached prompts)
     cache_key = "web_voice_agent_default"
+    num_ctx = os.getenv("OLLAMA_NUM_CTX")
+    prompt_cache = PromptCacheOptions(
+        cache_key=cache_key,
+        keep_alive=os.getenv("OLLAMA_KEEP_ALIVE", "30m"),
+        num_ctx=int(num_ctx) if num_ctx else None,
+    )
     
     # In-process STT using Faster Whisper
+    # Shares the model loaded in prewarm via the process-wide registry
     stt_model = WhisperSTT(
         language="ur",  # Urdu
-        model=os.getenv("WHISPER_MODEL", "base"),  # base, small, medium, large-v2, large-v3
-        device=os.getenv("WHISPER_DEVICE", "cuda"),  # cuda or cpu
-        compute_type=os.getenv("WHISPER_COMPUTE_TYPE", "float16"),  # float16, float32, int8
-        model_cache_directory=os.getenv("WHISPER_CACHE_DIR", "/workspace/models/whisper"),
+        **whisper_options(),
+        executor=ctx.proc.userdata["stt_executor"],
+        batcher=ctx.proc.userdata["stt_batcher"],
+        # Streaming mode: interim transcripts while the user is still speaking
+        vad=ctx.proc.userdata["vad"] if os.getenv("STT_STREAMING", "0") == "1" else None,
+        streaming=StreamingOptions(
+            interim_interval_ms=float(os.getenv("STT_INTERIM_INTERVAL_MS", "500")),
+        ),
+        trimmer=ctx.proc.userdata["stt_trimmer"],
+        tiers=ctx.proc.userdata["stt_tiers"],
     )
+    ctx.add_shutdown_callback(stt_model.aclose)
     
+    # Opt-in: race a second request when the first token is later than usual
+    hedger = None
+    if os.getenv("LLM_HEDGING", "0") == "1":
+        hedger = RequestHedger.shared(HedgingOptions(percentile=float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))))
+
     # Self-hosted LLM using Ollama
-    llm_model = OllamaLLM(
-        base_url=os.getenv("OLLAMA_BASE_URL", "http://localhost:11434/v1"),
+    llm_options = dict(
         api_key="NULL",  # Ollama doesn't need API key
         model=os.getenv("OLLAMA_MODEL", "qwen2.5:7b"),
         temperature=0.4,
         top_p=0.9,
+        prompt_cache=prompt_cache,
+        hedger=hedger,
+        response_cache=response_cache if os.getenv("RESPONSE_CACHE", "0") == "1" else None,
     )
+    if os.getenv("HISTORY_COMPACTION", "0") == "1":
+        # Long calls: older turns are summarized so the prompt stays within num_ctx
+        llm_options["history"] = HistoryOptions(
+            max_tokens=int(os.getenv("HISTORY_MAX_TOKENS", "3072")),
+            summarize_tokens=int(os.getenv("HISTORY_SUMMARIZE_TOKENS", "1536")),
+        )
+    if os.getenv("OLLAMA_BASE_URLS"):
+        # Several Ollama servers: each turn goes to the least loaded one
+        llm_model = RoutedLLM(
+            base_urls=os.environ["OLLAMA_BASE_URLS"].split(","),
+            routing=RoutingOptions(strategy=os.getenv("OLLAMA_ROUTING", "least_outstanding")),
+            **llm_options,
+        )
+    else:
+        llm_model = OllamaLLM(base_url=os.getenv("OLLAMA_BASE_URL", "http://localhost:11434/v1"), **llm_options)
+    ctx.add_shutdown_callback(llm_model.aclose)
     
     session = AgentSession(
         stt=stt_model,  # In-process STT
@@ -314,6 +482,17 @@ async def entrypoint(ctx: agents.JobContext):
         )
         # System will auto-resume with resume_false_interruption=True
 
+    # Per-turn latency waterfall: OTLP/JSON lines and/or the worker's Prometheus endpoint
+    trace_exporters = []
+    if os.getenv("TRACE_OTLP_FILE"):
+        trace_exporters.append(OTLPJsonFileExporter(os.environ["TRACE_OTLP_FILE"]))
+    if os.getenv("PROMETHEUS_PORT"):
+        trace_exporters.append(PrometheusExporter())
+    if trace_exporters:
+        tracer = TurnTracer(trace_exporters)
+        tracer.attach(session)
+        ctx.add_shutdown_callback(tracer.aclose)
+
     # Usage collector for summary at end
     usage_collector = metrics.UsageCollector()
 
@@ -326,11 +505,58 @@ async def entrypoint(ctx: agents.JobContext):
     async def log_usage():
         summary = usage_collector.get_summary()
         print(f"\n📊 Session usage summary: {summary}\n")
+        logger.info(f"Ollama connection pool: {ollama_pool.stats()}")
+        logger.info(f"Ollama prompt cache: {llm_model.prompt_cache_stats()}")
+        if llm_model.history is not None:
+            logger.info(f"Chat history: {llm_model.history.stats()}")
+        logger.info(f"Navigation commands: {navigation.stats()}")
+        if fast_path is not None:
+            logger.info(f"Fast-path navigation: {fast_path.stats()}")
+        if os.getenv("RESPONSE_CACHE", "0") == "1":
+            logger.info(f"LLM response cache: {response_cache.stats()}")
+        if hedger is not None:
+            logger.info(f"LLM hedging: {hedger.stats()}")
+        if isinstance(llm_model, RoutedLLM):
+            logger.info(f"Ollama backends: {llm_model.router.stats()}")
+        if ctx.proc.userdata["stt_batcher"] is not None:
+            logger.info(f"STT batching: {ctx.proc.userdata['stt_batcher'].stats()}")
+        if ctx.proc.userdata["stt_trimmer"] is not None:
+            logger.info(f"STT VAD trimming: {ctx.proc.userdata['stt_trimmer'].stats()}")
+        if ctx.proc.userdata["stt_tiers"] is not None:
+            logger.info(f"STT tiers: {ctx.proc.userdata['stt_tiers'].stats()}")
+        if ctx.proc.userdata["tts_cache"] is not None:
+            logger.info(f"TTS cache: {ctx.proc.userdata['tts_cache'].stats()}")
+        if ctx.proc.userdata["site_index"] is not None:
+            logger.info(f"Site retrieval: {ctx.proc.userdata['site_index'].stats()}")
+        if segmenter is not None:
+            logger.info(f"TTS segmenter: {segmenter.stats()}")
 
     ctx.add_shutdown_callback(log_usage)
 
-    assistant = Assistant()
-    assistant.set_room(ctx.room)
+    # One sender per room: pre-encoded commands, bursts of scrolls coalesced
+    navigation = NavigationBus(
+        ctx.room,
+        NavigationOptions(lossy_scroll=os.getenv("NAVIGATION_LOSSY_SCROLL", "0") == "1"),
+    )
+    ctx.add_shutdown_callback(navigation.aclose)
+
+    fast_path = None
+    if ctx.proc.userdata["intent_index"] is not None:
+        fast_path = FastPathRouter(ctx.proc.userdata["intent_index"], navigation.publish)
+
+        @session.on("user_input_transcribed")
+        def _on_user_input_transcribed(ev: UserInputTranscribedEvent):
+            fast_path.on_transcript(ev.transcript, ev.is_final)
+
+    assistant = Assistant(fast_path=fast_path, navigation=navigation, site_index=ctx.proc.userdata["site_index"])
+    # Prefill the system prompt and tools while the room connects
+    warm_up_task = asyncio.create_task(llm_model.warm_up(assistant.instructions, assistant.tools))
+
+    async def stop_warm_up():
+        # A job that ends before the prefill finishes shouldn't leave it pending
+        await utils.aio.cancel_and_wait(warm_up_task)
+
+    ctx.add_shutdown_callback(stop_warm_up)
     
     await session.start(
         room=ctx.room,
@@ -340,9 +566,13 @@ async def entrypoint(ctx: agents.JobContext):
         ),
     )
 
-    await session.generate_reply(
-        instructions="""صارف کو گرمجوشی سے خوش آمدید کہیں۔ مختصر تعارف: 'السلام علیکم! میں آپ کی ویب سائٹ اسسٹنٹ ہوں۔ آپ مجھے voice commands دے سکتے ہیں - جیسے pricing دکھاؤ۔ کیا آپ help چاہتے ہیں؟'"""
-    )
+    if isinstance(tts, CachedTTS):
+        # Fixed wording, so the audio is synthesized once and replayed for every caller
+        await session.say(GREETING, audio=tts.audio(GREETING))
+    else:
+        await session.generate_reply(
+            instructions=f"""صارف کو گرمجوشی سے خوش آمدید کہیں۔ مختصر تعارف: '{GREETING}'"""
+        )
 #     await session.generate_reply(
 #     instructions="""Greet the user warmly. Short intro: 'Hello! I am your website assistant. You can give me voice commands - like show pricing. Do you need help?'"""
 # )
@@ -353,5 +583,13 @@ if __name__ == "__main__":
         entrypoint_fnc=entrypoint,
         initialize_process_timeout=60,
         prewarm_fnc=prewarm,
+        # "thread" runs every job in one process so they all share one Whisper model
+        job_executor_type=(
+            agents.JobExecutorType.THREAD
+            if os.getenv("AGENT_JOB_EXECUTOR", "process") == "thread"
+            else agents.JobExecutorType.PROCESS
+        ),
         port=8082,  # Use port 8082 to avoid conflict with nginx on 8081
+        # Serves /metrics, including per-turn stage histograms in thread job mode
+        prometheus_port=int(os.environ["PROMETHEUS_PORT"]) if os.getenv("PROMETHEUS_PORT") else NOT_GIVEN,
     ))
\ No newline at end of file
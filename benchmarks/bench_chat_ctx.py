@@ -0,0 +1,73 @@
+"""Benchmark to_chat_ctx per LLM call, with and without the per-session cache.
+
+Each iteration appends one user message to the history, as a new turn
+does, and converts the whole context again.
+
+Usage:
+    python -m benchmarks.bench_chat_ctx [--iterations 200]
+"""
+import argparse
+import time
+import tracemalloc
+
+from livekit.agents import llm
+from models.utils import to_chat_ctx
+
+
+def make_chat_ctx(n_items: int) -> llm.ChatContext:
+    """A conversation of user/assistant turns with a tool call every fifth turn."""
+    chat_ctx = llm.ChatContext()
+    chat_ctx.add_message(role="system", content="آپ ایک ویب ویجیٹ اسسٹنٹ ہیں۔ " * 40)
+    turn = 0
+    while len(chat_ctx.items) < n_items:
+        chat_ctx.add_message(role="user", content=f"pricing دکھاؤ please، turn {turn}")
+        if turn % 5 == 4:
+            call_id = f"call_{turn}"
+            chat_ctx.items.append(
+                llm.FunctionCall(call_id=call_id, name="scroll_to_section", arguments='{"section_id": "plans"}')
+            )
+            chat_ctx.items.append(
+                llm.FunctionCallOutput(call_id=call_id, name="scroll_to_section", output="Scrolled to plans section", is_error=False)
+            )
+        chat_ctx.add_message(role="assistant", content=["جی بالکل، ", f"یہ رہی pricing۔ ({turn})"])
+        turn += 1
+    chat_ctx.items[:] = chat_ctx.items[:n_items]
+    return chat_ctx
+
+
+def measure(n_items: int, cache_key, iterations: int) -> tuple[float, float]:
+    """Return (mean µs per call, peak traced KiB per call) while the history grows."""
+    chat_ctx = make_chat_ctx(n_items)
+    to_chat_ctx(chat_ctx, cache_key)  # The first call of a session converts everything
+
+    def call() -> None:
+        chat_ctx.add_message(role="user", content="اور features؟")
+        to_chat_ctx(chat_ctx, cache_key)
+        chat_ctx.items.pop()  # Keep the size fixed across iterations
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        call()
+    latency_us = (time.perf_counter() - start) * 1e6 / iterations
+
+    tracemalloc.start()
+    call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return latency_us, peak / 1024
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'items':>6} {'path':<9} {'µs/call':>10} {'peak KiB':>10}")
+    for n_items in (10, 100, 1000):
+        for name, cache_key in [("uncached", None), ("cached", f"bench-{n_items}")]:
+            latency_us, peak_kib = measure(n_items, cache_key, args.iterations)
+            print(f"{n_items:>6} {name:<9} {latency_us:>10.1f} {peak_kib:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Benchmark hedged LLM requests against stub Ollama servers with a slow tail.
+
+Each backend answers most requests quickly and a few very late, like a
+server that is occasionally busy with a long prefill. Runs the same turns
+with and without hedging, on one backend and routed over two.
+
+Usage:
+    python -m benchmarks.bench_hedging [--turns 200]
+"""
+import argparse
+import asyncio
+import time
+
+import numpy as np
+
+from livekit.agents import llm
+from models.hedging import HedgingOptions, RequestHedger
+from models.llm import OllamaLLM
+from models.router import BackendRouter, RoutedLLM, RoutingOptions
+
+from .stub_ollama import StubOllama
+
+
+async def run(name: str, model: OllamaLLM, turns: int, concurrency: int) -> None:
+    ttfts: list[float] = []
+
+    async def session(n_turns: int) -> None:
+        for turn in range(n_turns):
+            chat_ctx = llm.ChatContext()
+            chat_ctx.add_message(role="user", content=f"features ke bare mein batao {turn}")
+            start, first = time.perf_counter(), None
+            async with model.chat(chat_ctx=chat_ctx) as stream:
+                async for chunk in stream:
+                    if first is None and chunk.delta and chunk.delta.content:
+                        first = time.perf_counter() - start
+            ttfts.append(first)
+
+    await asyncio.gather(*(session(turns // concurrency) for _ in range(concurrency)))
+    await model.aclose()
+    p50, p95, p99 = np.percentile(ttfts, [50, 95, 99]) * 1000
+    line = f"{name:<22} TTFT p50 {p50:6.1f}  p95 {p95:6.1f}  p99 {p99:7.1f} ms"
+    if model._hedger is not None:
+        stats = model._hedger.stats()
+        line += f"  hedged {stats['hedge_rate']:.1%}  saved/hedge {stats['saved_ms_per_hedge']:.0f} ms"
+    print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    stubs = [StubOllama(ttft_ms=60, slow_ratio=0.08, slow_ms=1500, seed=i) for i in range(2)]
+    options = HedgingOptions(initial_delay=0.2, min_samples=10)
+    routing = RoutingOptions(health_interval=0)
+
+    async def bench() -> None:
+        await run("single", OllamaLLM(base_url=stubs[0].base_url), args.turns, args.concurrency)
+        await run("single + hedging", OllamaLLM(base_url=stubs[0].base_url, hedger=RequestHedger(options)), args.turns, args.concurrency)
+        urls = [stub.base_url for stub in stubs]
+        await run("routed", RoutedLLM(urls, router=BackendRouter(urls, routing)), args.turns, args.concurrency)
+        await run(
+            "routed + hedging",
+            RoutedLLM(urls, router=BackendRouter(urls, routing), hedger=RequestHedger(options)),
+            args.turns,
+            args.concurrency,
+        )
+
+    asyncio.run(bench())
+    print(f"Loser streams cut off by the client: {sum(stub.cancelled for stub in stubs)}")
+    for stub in stubs:
+        stub.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Benchmark time to first token over a long call, with and without history compaction.
+
+A stub Ollama server delays the first token in proportion to the prompt
+length, like prefill on a GPU. Each turn adds a caller question, the
+reply and every few turns a navigation tool call, as in a support call.
+
+Usage:
+    python -m benchmarks.bench_history [--turns 80] [--prefill-us 100]
+"""
+import argparse
+import asyncio
+import time
+
+import numpy as np
+
+from livekit.agents import llm
+from models.history import HistoryOptions
+from models.llm import OllamaLLM
+
+from .bench_chat_ctx import make_chat_ctx
+from .stub_ollama import StubOllama
+
+
+async def call(model: OllamaLLM, turns: int) -> list[tuple[float, int]]:
+    """(TTFT ms, prompt tokens) per turn."""
+    chat_ctx = make_chat_ctx(1)
+    results = []
+    for turn in range(turns):
+        chat_ctx.add_message(role="user", content=f"مجھے Pro پلان کے features بتائیں، اور کیا اس میں Urdu support ہے؟ ({turn})")
+        if turn % 4 == 3:
+            chat_ctx.items.append(
+                llm.FunctionCall(call_id=f"call_{turn}", name="scroll_to_section", arguments='{"section_id": "plans"}')
+            )
+            chat_ctx.items.append(
+                llm.FunctionCallOutput(call_id=f"call_{turn}", name="scroll_to_section", output="Scrolled to plans section", is_error=False)
+            )
+        start, first, reply, prompt_tokens = time.perf_counter(), None, "", 0
+        async with model.chat(chat_ctx=chat_ctx) as stream:
+            async for chunk in stream:
+                if first is None and chunk.delta and chunk.delta.content:
+                    first = (time.perf_counter() - start) * 1000
+                if chunk.delta and chunk.delta.content:
+                    reply += chunk.delta.content
+                if chunk.usage:
+                    prompt_tokens = chunk.usage.prompt_tokens
+        chat_ctx.add_message(role="assistant", content="جی ہاں، Pro پلان میں اردو سپورٹ شامل ہے اور " + reply)
+        results.append((first, prompt_tokens))
+        await asyncio.sleep(0.05)  # The caller listens and speaks; the summary runs meanwhile
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=80)
+    parser.add_argument("--prefill-us", type=float, default=100, help="Stub prefill time per prompt token")
+    parser.add_argument("--max-tokens", type=int, default=HistoryOptions.max_tokens)
+    parser.add_argument("--summarize-tokens", type=int, default=HistoryOptions.summarize_tokens)
+    args = parser.parse_args()
+
+    stub = StubOllama(ttft_ms=20, token_ms=1, tokens=30, prefill_us_per_token=args.prefill_us)
+    options = HistoryOptions(max_tokens=args.max_tokens, summarize_tokens=args.summarize_tokens)
+
+    async def bench() -> None:
+        print(f"{'':<12} {'TTFT ms by turn range':>44}   {'prompt tokens':>13}")
+        for name, history in [("full", None), ("compacted", options)]:
+            model = OllamaLLM(base_url=stub.base_url, history=history)
+            results = await call(model, args.turns)
+            await model.aclose()
+            ranges = np.array_split(np.array(results), 4)
+            ttfts = "  ".join(f"{np.mean(r[:, 0]):8.1f}" for r in ranges)
+            print(f"{name:<12} {ttfts}   last {int(results[-1][1]):>8}")
+            if model.history is not None:
+                print(f"{'':<12} {model.history.stats()}")
+
+    asyncio.run(bench())
+    stub.close()
+
+
+if __name__ == "__main__":
+    main()
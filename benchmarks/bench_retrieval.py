@@ -0,0 +1,111 @@
+"""Benchmark prompt size and time to first token with all website sections vs retrieved ones.
+
+Each caller question is sent as a fresh conversation with the Assistant's
+instructions: once with every website section in them, once with
+SITE_RETRIEVAL's note and the top sections for the question. A stub
+Ollama server delays the first token in proportion to the prompt, like
+prefill on a GPU without a warm prefix cache (the first turn of a call,
+or any turn once concurrent calls have evicted it). Also reports search
+time and whether the top section is the expected one.
+
+Usage:
+    python -m benchmarks.bench_retrieval [--prefill-us 100] [--top-k 2]
+"""
+import argparse
+import asyncio
+import time
+
+import numpy as np
+
+from agent import WEBSITE_SECTIONS, assistant_instructions
+from livekit.agents import llm
+from models.llm import OllamaLLM
+from models.retrieval import RetrievalOptions, SiteIndex
+
+from .stub_ollama import StubOllama
+
+# Caller questions and the section that answers them; None for small talk
+QUESTIONS = [
+    ("pricing dikhao", "plans"),
+    ("Pro plan kitne ka hai?", "plans"),
+    ("قیمت کیا ہے؟", "plans"),
+    ("small business ke liye kaunsa plan hai", "plans"),
+    ("features ke bare mein batao", "features"),
+    ("analytics milti hai?", "features"),
+    ("What agents do you offer?", "agents"),
+    ("whatsapp calling restaurants ke liye kaise kaam karti hai", "agents"),
+    ("use cases page par jao", "agents"),
+    ("ڈیمو دکھائیں", "demo"),
+    ("rabta kaise karein?", "contact"),
+    ("email address kya hai", "contact"),
+    ("ہمارا پروڈکٹ کیا ہے؟", "about"),
+    ("home page par jao", "home"),
+    ("assalam o alaikum", None),
+    ("shukriya, bas itna hi", None),
+]
+
+
+async def ttft(model: OllamaLLM, chat_ctx: llm.ChatContext) -> tuple[float, int]:
+    """(TTFT ms, prompt tokens) of one request."""
+    start, first, prompt_tokens = time.perf_counter(), None, 0
+    async with model.chat(chat_ctx=chat_ctx) as stream:
+        async for chunk in stream:
+            if first is None and chunk.delta and chunk.delta.content:
+                first = (time.perf_counter() - start) * 1000
+            if chunk.usage:
+                prompt_tokens = chunk.usage.prompt_tokens
+    return first, prompt_tokens
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--prefill-us", type=float, default=100, help="Stub prefill time per prompt token")
+    parser.add_argument("--top-k", type=int, default=RetrievalOptions.top_k)
+    parser.add_argument("--search-iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    build_start = time.perf_counter()
+    index = SiteIndex(WEBSITE_SECTIONS, RetrievalOptions(top_k=args.top_k))
+    build_ms = (time.perf_counter() - build_start) * 1000
+
+    search_us, correct = [], 0
+    for i in range(args.search_iterations):
+        question, expected = QUESTIONS[i % len(QUESTIONS)]
+        start = time.perf_counter()
+        hits = index.search(question)
+        search_us.append((time.perf_counter() - start) * 1e6)
+        if i < len(QUESTIONS):
+            correct += (hits[0].document.id if hits else None) == expected
+    print(f"index: {len(WEBSITE_SECTIONS)} sections built in {build_ms:.2f} ms; "
+          f"search p50 {np.percentile(search_us, 50):.0f} µs, p95 {np.percentile(search_us, 95):.0f} µs; "
+          f"top section right for {correct}/{len(QUESTIONS)} questions")
+
+    stub = StubOllama(ttft_ms=20, token_ms=1, tokens=10, prefill_us_per_token=args.prefill_us)
+
+    async def bench() -> None:
+        model = OllamaLLM(base_url=stub.base_url)
+        warmup = llm.ChatContext()
+        warmup.add_message(role="user", content="hello")
+        await ttft(model, warmup)  # Connection setup stays out of the comparison
+        print(f"{'':<12} {'prompt tokens':>14} {'TTFT p50 ms':>12} {'TTFT p95 ms':>12}")
+        for name, site_index in [("all", None), ("retrieved", index)]:
+            results = []
+            for question, _ in QUESTIONS:
+                chat_ctx = llm.ChatContext()
+                chat_ctx.add_message(role="system", content=assistant_instructions(site_retrieval=site_index is not None))
+                chat_ctx.add_message(role="user", content=question)
+                if site_index is not None:
+                    chat_ctx = site_index.with_context(chat_ctx)
+                results.append(await ttft(model, chat_ctx))
+            results = np.array(results)
+            print(f"{name:<12} {np.mean(results[:, 1]):>14.0f} "
+                  f"{np.percentile(results[:, 0], 50):>12.1f} {np.percentile(results[:, 0], 95):>12.1f}")
+        await model.aclose()
+        print(f"{'':<12} {index.stats()}")
+
+    asyncio.run(bench())
+    stub.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Benchmark RoutedLLM against stub Ollama servers of different speeds.
+
+Concurrent sessions each run a few turns; halfway through, one backend
+goes down and later comes back, so failover and recovery show up in the
+per-backend counts.
+
+Usage:
+    python -m benchmarks.bench_router [--sessions 12] [--turns 6]
+"""
+import argparse
+import asyncio
+import time
+
+import numpy as np
+
+from livekit.agents import llm
+from livekit.agents.types import APIConnectOptions
+from models.router import BackendRouter, RoutedLLM, RoutingOptions
+
+from .stub_ollama import StubOllama
+
+
+async def session(model: RoutedLLM, turns: int, ttfts: list[float], errors: list[int]) -> None:
+    chat_ctx = llm.ChatContext()
+    chat_ctx.add_message(role="system", content="آپ ایک ویب ویجیٹ اسسٹنٹ ہیں۔")
+    for turn in range(turns):
+        chat_ctx.add_message(role="user", content=f"pricing دکھاؤ {turn}")
+        start = time.perf_counter()
+        first = None
+        try:
+            async with model.chat(chat_ctx=chat_ctx, conn_options=APIConnectOptions(max_retry=2, retry_interval=0.05)) as stream:
+                async for chunk in stream:
+                    if first is None and chunk.delta and chunk.delta.content:
+                        first = time.perf_counter() - start
+            ttfts.append(first or 0.0)
+        except Exception:
+            errors[0] += 1
+        await asyncio.sleep(0.05)
+    await model.aclose()
+
+
+async def run(strategy: str, sessions: int, turns: int) -> None:
+    stubs = [StubOllama(ttft_ms=ttft) for ttft in (40, 80, 160)]
+    router = BackendRouter(
+        [stub.base_url for stub in stubs],
+        RoutingOptions(strategy=strategy, cooldown=0.5, health_interval=0.2),
+    )
+    ttfts: list[float] = []
+    errors = [0]
+
+    async def outage() -> None:
+        await asyncio.sleep(0.3)
+        stubs[0].down = True
+        await asyncio.sleep(0.6)
+        stubs[0].down = False
+
+    await asyncio.gather(
+        outage(),
+        *(session(RoutedLLM([s.base_url for s in stubs], router=router), turns, ttfts, errors) for _ in range(sessions)),
+    )
+    p50, p95 = np.percentile(ttfts, [50, 95]) * 1000
+    print(f"{strategy:<18} TTFT p50 {p50:6.1f} ms  p95 {p95:6.1f} ms  failed turns {errors[0]}")
+    for stats in router.stats():
+        print(f"    {stats['base_url']:<32} requests {stats['requests']:>4}  failures {stats['failures']:>3}  circuit {stats['circuit']}")
+    for stub in stubs:
+        stub.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=12)
+    parser.add_argument("--turns", type=int, default=6)
+    args = parser.parse_args()
+    for strategy in ("least_outstanding", "latency"):
+        asyncio.run(run(strategy, args.sessions, args.turns))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""Benchmark how long TTS waits for its first segment, replaying LLM token streams.
+
+Token streams are JSON lines of ``{"prompt": ..., "tokens": [[ms, text], ...]}``
+where ``ms`` is the time since the request was sent. ``--record`` captures
+them from an Ollama server, ``--fixtures`` uses sample replies tokenized at
+a fixed rate. Each stream is replayed on a virtual clock through the
+default blingfire tokenizer and UrduSentenceTokenizer.
+
+Usage:
+    python -m benchmarks.bench_segmenter --record streams.jsonl --base-url http://localhost:11434/v1
+    python -m benchmarks.bench_segmenter --streams streams.jsonl
+    python -m benchmarks.bench_segmenter --fixtures
+"""
+import argparse
+import asyncio
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+from livekit.agents import llm, tokenize
+from models.segmenter import SegmenterOptions, UrduSentenceTokenizer
+
+PROMPTS = [
+    "pricing dikhao",
+    "آپ کے پلانز کیا ہیں؟",
+    "features ke bare mein batao",
+    "کیا آپ کا پروڈکٹ اردو سمجھتا ہے؟",
+    "demo kaise dekh sakta hoon?",
+    "رابطہ کیسے کریں؟",
+]
+
+FIXTURE_REPLIES = [
+    "جی ضرور، میں آپ کو pricing section دکھا رہی ہوں۔ ہمارے پاس تین پلانز ہیں: Basic، Pro اور Enterprise۔ کیا آپ کسی خاص پلان کے بارے میں جاننا چاہتے ہیں؟",
+    "ہمارا پروڈکٹ اردو، انگریزی اور رومن اردو تینوں سمجھتا ہے، اور آواز کے ذریعے ویب سائٹ پر کہیں بھی لے جا سکتا ہے۔ آپ بس بولیں اور میں دکھا دوں گی۔",
+    "Ji haan, features section mein aap dekh sakte hain ke agent voice commands samajhta hai, pages khol sakta hai aur sawalon ke jawab deta hai. Aur kuch batana chahenge?",
+    "Demo dekhne ke liye neeche demo section mein jaiye, wahan live agent se baat kar sakte hain. Main aap ko wahan le chalti hoon.",
+    "رابطے کے لیے contact section میں فارم بھریں یا ہمیں ای میل کریں، ہماری ٹیم چوبیس گھنٹوں میں جواب دیتی ہے۔",
+    "یہ ایجنٹ گاہکوں کے سوالات کا جواب دیتا ہے، آرڈر کی تفصیل بتاتا ہے، اپائنٹمنٹ بُک کرتا ہے اور ضرورت پڑنے پر بات انسانی نمائندے تک پہنچا دیتا ہے جو مسئلہ حل کرتا ہے",
+]
+
+
+def fixture_streams(ttft_ms: float, token_ms: float) -> list[dict]:
+    streams = []
+    for prompt, reply in zip(PROMPTS, FIXTURE_REPLIES):
+        # Urdu script tokenizes into short pieces, about three characters each
+        pieces = [reply[i:i + 3] for i in range(0, len(reply), 3)]
+        streams.append({
+            "prompt": prompt,
+            "tokens": [[ttft_ms + i * token_ms, piece] for i, piece in enumerate(pieces)],
+        })
+    return streams
+
+
+async def record(path: Path, base_url: str, model: str) -> None:
+    from models.llm import OllamaLLM
+
+    ollama = OllamaLLM(base_url=base_url, model=model)
+    with path.open("w", encoding="utf-8") as f:
+        for prompt in PROMPTS:
+            chat_ctx = llm.ChatContext()
+            chat_ctx.add_message(role="system", content="آپ ایک اردو ویب سائٹ اسسٹنٹ ہیں۔ مختصر جواب دیں۔")
+            chat_ctx.add_message(role="user", content=prompt)
+            tokens, start = [], time.perf_counter()
+            async with ollama.chat(chat_ctx=chat_ctx) as stream:
+                async for chunk in stream:
+                    if chunk.delta and chunk.delta.content:
+                        tokens.append([round((time.perf_counter() - start) * 1000, 1), chunk.delta.content])
+            f.write(json.dumps({"prompt": prompt, "tokens": tokens}, ensure_ascii=False) + "\n")
+            print(f"{prompt}: {len(tokens)} tokens")
+    await ollama.aclose()
+
+
+async def replay(tokenizer: tokenize.SentenceTokenizer, tokens: list[list]) -> tuple[float, list[str]]:
+    """First-segment wait (ms after the first token) and segments, on the recorded clock."""
+    stream = tokenizer.stream()
+    segments: list[str] = []
+    first_at = None
+    now = tokens[0][0]
+
+    async def read() -> None:
+        nonlocal first_at
+        async for data in stream:
+            if first_at is None:
+                first_at = now
+            segments.append(data.token)
+
+    reader = asyncio.create_task(read())
+    for now, text in tokens:
+        stream.push_text(text)
+        await asyncio.sleep(0)
+    # The reply is complete: the rest goes out with end of input
+    stream.end_input()
+    await reader
+    return first_at - tokens[0][0], segments
+
+
+async def run(streams: list[dict], options: SegmenterOptions) -> None:
+    tokenizers = {
+        "blingfire (default)": tokenize.blingfire.SentenceTokenizer(),
+        "urdu segmenter": UrduSentenceTokenizer(options),
+    }
+    for name, tokenizer in tokenizers.items():
+        waits, counts, lengths, whole = [], [], [], 0
+        for recorded in streams:
+            tokens = [token for token in recorded["tokens"] if token[1]]
+            wait, segments = await replay(tokenizer, tokens)
+            waits.append(wait)
+            counts.append(len(segments))
+            lengths.extend(len(segment) for segment in segments)
+            whole += len(segments) == 1
+        p50, p95 = np.percentile(waits, [50, 95])
+        print(
+            f"{name:<20} first segment after p50 {p50:6.0f}  p95 {p95:6.0f} ms  "
+            f"segments/reply {np.mean(counts):4.1f}  chars/segment {np.mean(lengths):5.1f}  "
+            f"unsplit replies {whole}/{len(streams)}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--streams", type=Path, help="JSON lines of recorded token streams")
+    parser.add_argument("--fixtures", action="store_true", help="Replay the sample replies instead")
+    parser.add_argument("--record", type=Path, help="Record token streams to this file and exit")
+    parser.add_argument("--base-url", default="http://localhost:11434/v1")
+    parser.add_argument("--model", default="qwen2.5:7b")
+    parser.add_argument("--ttft-ms", type=float, default=250, help="Fixture time to first token")
+    parser.add_argument("--token-ms", type=float, default=30, help="Fixture time between tokens")
+    parser.add_argument("--first-min-chars", type=int, default=SegmenterOptions.first_min_chars)
+    parser.add_argument("--min-chars", type=int, default=SegmenterOptions.min_chars)
+    parser.add_argument("--max-chars", type=int, default=SegmenterOptions.max_chars)
+    args = parser.parse_args()
+
+    if args.record:
+        asyncio.run(record(args.record, args.base_url, args.model))
+        return
+    if args.streams:
+        with args.streams.open(encoding="utf-8") as f:
+            streams = [json.loads(line) for line in f if line.strip()]
+    elif args.fixtures:
+        streams = fixture_streams(args.ttft_ms, args.token_ms)
+    else:
+        parser.error("pass --streams, --fixtures or --record")
+    options = SegmenterOptions(args.first_min_chars, args.min_chars, args.max_chars)
+    asyncio.run(run(streams, options))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""Benchmark WhisperSTT latency and accuracy over a directory of WAV files.
+
+Each ``name.wav`` may have a ``name.txt`` next to it holding the reference
+transcript; files without one are timed but left out of WER/CER. Every
+model/compute type pair runs in a fresh process so peak RSS is its own.
+
+Usage:
+    python -m benchmarks.bench_stt --corpus data/urdu --models base,small --compute-types int8,float32
+    python -m benchmarks.bench_stt --fixtures  # synthetic corpus, timing only
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import unicodedata
+import wave
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional, get_args
+
+import numpy as np
+
+from livekit import rtc
+from livekit.agents.types import DEFAULT_API_CONNECT_OPTIONS
+from models.utils import WhisperModels
+
+
+def make_fixtures(directory: Path) -> Path:
+    """Write deterministic synthetic utterances: voiced bursts between pauses."""
+    directory.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(0)
+    for seconds, sample_rate in [(2, 16000), (5, 16000), (5, 48000), (12, 16000), (40, 16000)]:
+        t = np.arange(int(seconds * sample_rate)) / sample_rate
+        pitch = 120 + 30 * np.sin(2 * np.pi * 0.5 * t)
+        voiced = sum(np.sin(2 * np.pi * k * np.cumsum(pitch) / sample_rate) / k for k in range(1, 6))
+        # Syllable-rate envelope, with a pause every couple of seconds
+        envelope = np.clip(np.sin(2 * np.pi * 3 * t), 0, None) * (np.sin(2 * np.pi * 0.4 * t) > -0.5)
+        audio = 0.2 * voiced * envelope + 0.01 * rng.standard_normal(len(t))
+        write_wav(directory / f"synthetic_{seconds}s_{sample_rate // 1000}k.wav", audio, sample_rate)
+    return directory
+
+
+def write_wav(path: Path, audio: np.ndarray, sample_rate: int) -> None:
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes((np.clip(audio, -1, 1) * 32767).astype(np.int16).tobytes())
+
+
+def read_wav(path: Path) -> rtc.AudioFrame:
+    """Load 16-bit PCM WAV as one AudioFrame, as StreamAdapter hands it over."""
+    with wave.open(str(path), "rb") as f:
+        if f.getsampwidth() != 2:
+            raise ValueError(f"{path}: only 16-bit PCM WAV is supported")
+        data = f.readframes(f.getnframes())
+        return rtc.AudioFrame(
+            data=data,
+            sample_rate=f.getframerate(),
+            num_channels=f.getnchannels(),
+            samples_per_channel=f.getnframes(),
+        )
+
+
+def normalize(text: str) -> str:
+    """Lowercase and drop punctuation, including Urdu ۔ ، ؟, before scoring."""
+    return " ".join(
+        "".join(" " if unicodedata.category(c).startswith("P") else c for c in text.lower()).split()
+    )
+
+
+def edit_distance(reference: list, hypothesis: list) -> int:
+    row = list(range(len(hypothesis) + 1))
+    for i, ref in enumerate(reference, 1):
+        previous, row[0] = row[0], i
+        for j, hyp in enumerate(hypothesis, 1):
+            previous, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, previous + (ref != hyp))
+    return row[-1]
+
+
+def percentiles(values: list[float]) -> dict:
+    if not values:
+        return {}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"p50": round(float(p50), 2), "p95": round(float(p95), 2), "p99": round(float(p99), 2)}
+
+
+def git_revision() -> dict:
+    def git(*args: str) -> str:
+        return subprocess.run(["git", *args], capture_output=True, text=True).stdout.strip()
+
+    return {"commit": git("rev-parse", "HEAD") or None, "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+async def run_config(
+    files: list[Path], model: str, compute_type: str, language: str, repeat: int, cache_dir: Optional[str]
+) -> dict:
+    from models.executor import InferenceExecutor
+    from models.stt import WhisperSTT
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    load_start = time.perf_counter()
+    stt = WhisperSTT(
+        language=language,
+        model=model,
+        device="cpu",
+        compute_type=compute_type,
+        model_cache_directory=cache_dir,
+        executor=InferenceExecutor(kind="thread", max_workers=1, max_queue_size=1),
+    )
+    load_ms = (time.perf_counter() - load_start) * 1000
+
+    frames = {path: read_wav(path) for path in files}
+    # Warm up so the first file doesn't pay for lazy initialization
+    await stt._recognize_impl(next(iter(frames.values())), language=None, conn_options=DEFAULT_API_CONNECT_OPTIONS)
+
+    latencies_ms, audio_seconds, processing_seconds = [], 0.0, 0.0
+    word_errors = word_total = char_errors = char_total = 0
+    per_file = []
+    for path, frame in frames.items():
+        duration = frame.samples_per_channel / frame.sample_rate
+        for _ in range(repeat):
+            start = time.perf_counter()
+            event = await stt._recognize_impl(frame, language=None, conn_options=DEFAULT_API_CONNECT_OPTIONS)
+            elapsed = time.perf_counter() - start
+            latencies_ms.append(elapsed * 1000)
+            audio_seconds += duration
+            processing_seconds += elapsed
+        hypothesis = normalize(event.alternatives[0].text)
+
+        result = {"file": path.name, "seconds": round(duration, 2), "text": event.alternatives[0].text}
+        reference_path = path.with_suffix(".txt")
+        if reference_path.exists():
+            reference = normalize(reference_path.read_text(encoding="utf-8"))
+            if reference:
+                words = edit_distance(reference.split(), hypothesis.split())
+                chars = edit_distance(list(reference), list(hypothesis))
+                word_errors, word_total = word_errors + words, word_total + len(reference.split())
+                char_errors, char_total = char_errors + chars, char_total + len(reference)
+                result.update(wer=round(words / len(reference.split()), 4), cer=round(chars / len(reference), 4))
+        per_file.append(result)
+
+    await stt.aclose()
+    peak_rss_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        "model": model,
+        "compute_type": compute_type,
+        "load_ms": round(load_ms, 1),
+        "rtf": round(processing_seconds / audio_seconds, 4),
+        "latency_ms": percentiles(latencies_ms),
+        "peak_rss_mib": round(peak_rss_kib / 1024, 1),
+        "model_rss_mib": round((peak_rss_kib - rss_before) / 1024, 1),
+        "wer": round(word_errors / word_total, 4) if word_total else None,
+        "cer": round(char_errors / char_total, 4) if char_total else None,
+        "files": per_file,
+    }
+
+
+def _config_worker(queue, *args) -> None:
+    try:
+        queue.put(asyncio.run(run_config(*args)))
+    except Exception as e:
+        queue.put({"model": args[1], "compute_type": args[2], "error": f"{type(e).__name__}: {e}"})
+
+
+def run_isolated(*args) -> dict:
+    """Run one configuration of run_config() in a fresh process."""
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    process = ctx.Process(target=_config_worker, args=(queue, *args))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", type=Path, help="Directory of .wav files with optional .txt references")
+    parser.add_argument("--fixtures", action="store_true", help="Benchmark the synthetic fixtures instead")
+    parser.add_argument("--models", default="base", help=f"Comma-separated, from {', '.join(get_args(WhisperModels))}")
+    parser.add_argument("--compute-types", default="int8", help="Comma-separated, e.g. int8,float32")
+    parser.add_argument("--language", default="ur")
+    parser.add_argument("--repeat", type=int, default=3, help="Decodes per file")
+    parser.add_argument("--cache-dir", help="Whisper model cache directory (WHISPER_CACHE_DIR)")
+    parser.add_argument("--output", type=Path, default=Path("bench_stt.json"))
+    args = parser.parse_args(argv)
+
+    if args.fixtures:
+        corpus = make_fixtures(Path(tempfile.mkdtemp(prefix="stt-fixtures-")))
+    elif args.corpus:
+        corpus = args.corpus
+    else:
+        parser.error("pass --corpus DIR or --fixtures")
+    files = sorted(corpus.glob("*.wav"))
+    if not files:
+        parser.error(f"no .wav files in {corpus}")
+
+    models = args.models.split(",")
+    unknown = set(models) - set(get_args(WhisperModels))
+    if unknown:
+        parser.error(f"unknown Whisper models: {', '.join(sorted(unknown))}")
+
+    results = []
+    print(f"{'model':<16} {'compute':<8} {'RTF':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'RSS MiB':>8} {'WER':>6} {'CER':>6}")
+    for model in models:
+        for compute_type in args.compute_types.split(","):
+            result = run_isolated(files, model, compute_type, args.language, args.repeat, args.cache_dir)
+            results.append(result)
+            if "error" in result:
+                print(f"{model:<16} {compute_type:<8} failed: {result['error']}")
+                continue
+            latency = result["latency_ms"]
+            wer = f"{result['wer']:.3f}" if result["wer"] is not None else "-"
+            cer = f"{result['cer']:.3f}" if result["cer"] is not None else "-"
+            print(
+                f"{model:<16} {compute_type:<8} {result['rtf']:>7.3f} {latency['p50']:>9.1f} "
+                f"{latency['p95']:>9.1f} {latency['p99']:>9.1f} {result['peak_rss_mib']:>8.1f} {wer:>6} {cer:>6}"
+            )
+
+    report = {
+        **git_revision(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "platform": {"python": sys.version.split()[0], "machine": platform.machine(), "system": platform.system()},
+        "corpus": str(corpus),
+        "files": len(files),
+        "repeat": args.repeat,
+        "language": args.language,
+        "results": results,
+    }
+    args.output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
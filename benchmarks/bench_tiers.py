@@ -0,0 +1,116 @@
+"""Benchmark STT latency under a load burst with one Whisper model vs load-adaptive tiers.
+
+Simulated callers speak an utterance, wait for its transcript and pause
+before the next one; their number rises for the middle phase and falls
+again. Decoding is modelled by sleeping in the executor for the tier's
+time per second of speech, so no model weights are needed. Every run
+shares one worker, as on a single GPU.
+
+Usage:
+    python -m benchmarks.bench_tiers [--sessions 2,8,2] [--phase-s 8] [--slo-ms 1000]
+"""
+import argparse
+import asyncio
+import random
+import time
+
+import numpy as np
+
+from models.executor import InferenceExecutor, InferenceOverloadedError
+from models.registry import ModelEntry, ModelKey
+from models.tiers import SttTier, TierOptions, TierRouter
+
+
+class FakeWhisper:
+    def __init__(self, ms_per_audio_s: float) -> None:
+        self.ms_per_audio_s = ms_per_audio_s
+
+
+def fake_decode(model: FakeWhisper, audio_s: float) -> str:
+    time.sleep(model.ms_per_audio_s * max(audio_s, 1.0) / 1000)
+    return "ok"
+
+
+def fake_entry(name: str, ms_per_audio_s: float) -> ModelEntry:
+    return ModelEntry(
+        key=ModelKey(name, "cuda", "float16", None),
+        model=FakeWhisper(ms_per_audio_s),
+        device="cuda",
+        compute_type="float16",
+        load_time_ms=0.0,
+        rss_delta_bytes=0,
+    )
+
+
+async def caller(executor: InferenceExecutor, route, until: float, rng: random.Random, results: list) -> None:
+    while time.perf_counter() < until:
+        audio_s = min(rng.lognormvariate(1.0, 0.6), 15.0)  # Median ~2.7 s of speech
+        await asyncio.sleep(audio_s * 0.2)  # The last stretch of speech before end of turn
+        start = time.perf_counter()
+        entry, done = route(audio_s)
+        try:
+            await executor.run(entry, fake_decode, audio_s, timeout=10)
+            ok = True
+        except InferenceOverloadedError:
+            ok = False
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        done(elapsed_ms, ok)
+        results.append((elapsed_ms, ok, entry.key.model))
+        await asyncio.sleep(rng.expovariate(1 / 2.5))  # The agent answers, the caller listens
+
+
+async def run(name: str, tiers: list[SttTier], args: argparse.Namespace) -> None:
+    executor = InferenceExecutor(max_workers=1, max_queue_size=args.max_queue)
+    router = None
+    if len(tiers) > 1:
+        router = TierRouter(tiers, executor, TierOptions(slo_ms=args.slo_ms))
+
+    def route(audio_s: float):
+        if router is None:
+            return tiers[0].entry, lambda elapsed_ms, ok: None
+        choice = router.choose(audio_s)
+        return choice.tier.entry, lambda elapsed_ms, ok: router.observe(choice, elapsed_ms, ok=ok)
+
+    results: list = []
+    rng = random.Random(0)
+    start = time.perf_counter()
+    tasks = []
+    for phase, sessions in enumerate(args.sessions):
+        until = start + (phase + 1) * args.phase_s
+        tasks += [asyncio.create_task(caller(executor, route, until, rng, results)) for _ in range(sessions)]
+        await asyncio.sleep(until - time.perf_counter())
+    await asyncio.gather(*tasks)
+    executor.shutdown()
+
+    latencies = [elapsed for elapsed, ok, _ in results if ok]
+    rejected = sum(1 for _, ok, _ in results if not ok)
+    misses = sum(1 for elapsed in latencies if elapsed > args.slo_ms)
+    served = {tier.name: sum(1 for *_, model in results if model == tier.entry.key.model) for tier in tiers}
+    print(
+        f"{name:<14} {len(results):>5} {np.percentile(latencies, 50):>8.0f} {np.percentile(latencies, 95):>8.0f} "
+        f"{max(latencies):>8.0f} {100 * misses / len(latencies):>9.1f}% {rejected:>8}   {served}"
+    )
+    if router is not None:
+        print(f"{'':<14} {router.stats()}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", default="2,8,2", help="Concurrent callers in each phase")
+    parser.add_argument("--phase-s", type=float, default=8.0)
+    parser.add_argument("--slo-ms", type=float, default=1000.0)
+    parser.add_argument("--max-queue", type=int, default=8)
+    parser.add_argument("--small-ms", type=float, default=100.0, help="Decode ms per second of speech, small")
+    parser.add_argument("--base-ms", type=float, default=40.0, help="Decode ms per second of speech, base")
+    args = parser.parse_args()
+    args.sessions = [int(n) for n in args.sessions.split(",")]
+
+    small = SttTier("small", fake_entry("small", args.small_ms))
+    base = SttTier("base", fake_entry("base", args.base_ms))
+    print(f"{'':<14} {'reqs':>5} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'SLO miss':>10} {'rejected':>8}   served by")
+    for name, tiers in [("small", [small]), ("base", [base]), ("small,base", [small, base])]:
+        asyncio.run(run(name, tiers, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Benchmark CachedTTS time to first audio, cold and warm, with a fake TTS.
+
+The fake TTS waits ``--ttfb-ms`` before its first frame and then produces
+a tone, so no API key or network is needed.
+
+Usage:
+    python -m benchmarks.bench_tts_cache [--ttfb-ms 300] [--repeat 20]
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+
+import numpy as np
+
+from livekit.agents import tts, utils
+from livekit.agents.types import DEFAULT_API_CONNECT_OPTIONS, APIConnectOptions
+from models.tts_cache import AudioCache, CachedTTS
+
+GREETING = "السلام علیکم! میں آپ کی ویب سائٹ اسسٹنٹ ہوں۔ آپ مجھے voice commands دے سکتے ہیں - جیسے pricing دکھاؤ۔ کیا آپ help چاہتے ہیں؟"
+
+
+class FakeTTS(tts.TTS):
+    """Speaks 60 ms of tone per character after a fixed delay."""
+
+    def __init__(self, ttfb: float, sample_rate: int = 22050) -> None:
+        super().__init__(capabilities=tts.TTSCapabilities(streaming=False), sample_rate=sample_rate, num_channels=1)
+        self.ttfb = ttfb
+        self.requests = 0
+
+    def synthesize(self, text: str, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS) -> tts.ChunkedStream:
+        self.requests += 1
+        return _FakeStream(tts=self, input_text=text, conn_options=conn_options)
+
+
+class _FakeStream(tts.ChunkedStream):
+    async def _run(self, output_emitter: tts.AudioEmitter) -> None:
+        await asyncio.sleep(self._tts.ttfb)
+        sample_rate = self._tts.sample_rate
+        output_emitter.initialize(
+            request_id=utils.shortuuid(), sample_rate=sample_rate, num_channels=1, mime_type="audio/pcm"
+        )
+        t = np.arange(int(0.06 * sample_rate * len(self._input_text))) / sample_rate
+        output_emitter.push((np.sin(2 * np.pi * 220 * t) * 8000).astype(np.int16).tobytes())
+        output_emitter.flush()
+
+
+async def first_frame_ms(cached: CachedTTS, text: str) -> tuple[float, int]:
+    start = time.perf_counter()
+    first, samples = None, 0
+    async for frame in cached.audio(text):
+        if first is None:
+            first = (time.perf_counter() - start) * 1000
+        samples += frame.samples_per_channel
+    return first, samples
+
+
+async def run(ttfb_ms: float, repeat: int) -> None:
+    directory = tempfile.mkdtemp(prefix="tts-cache-")
+    fake = FakeTTS(ttfb_ms / 1000)
+    cached = CachedTTS(fake, AudioCache(directory), voice_id="fake", model="fake")
+
+    cold, cold_samples = await first_frame_ms(cached, GREETING)
+    warm = [await first_frame_ms(cached, GREETING) for _ in range(repeat)]
+    assert all(samples == cold_samples for _, samples in warm), "cached audio differs in length"
+
+    # A new process: memory is empty, the WAV file is on disk
+    restarted = CachedTTS(fake, AudioCache(directory), voice_id="fake", model="fake")
+    loaded = restarted.cache.load()
+    after_restart, _ = await first_frame_ms(restarted, GREETING)
+
+    print(f"cold (synthesized)      {cold:8.2f} ms")
+    print(f"warm (memory), median   {np.median([ms for ms, _ in warm]):8.2f} ms")
+    print(f"after restart ({loaded} loaded) {after_restart:8.2f} ms")
+    print(f"fake TTS requests: {fake.requests} (1 expected)")
+    print(f"cache stats: {cached.cache.stats()}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ttfb-ms", type=float, default=300)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args.ttfb_ms, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
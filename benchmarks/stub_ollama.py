@@ -0,0 +1,158 @@
+"""Minimal stand-in for an Ollama server, for LLM routing benchmarks.
+
+Serves ``GET /api/version`` and streaming ``POST /v1/chat/completions``
+with a configurable time to first token, so routing, failover and hedging
+can be exercised without a GPU.
+
+Usage:
+    python -m benchmarks.stub_ollama --port 11500 --ttft-ms 80
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+
+class StubOllama:
+    """An Ollama-like server on a daemon thread.
+
+    ``ttft_ms`` is the delay before the first chunk; with ``slow_ratio``
+    that share of requests waits ``slow_ms`` instead, to model a tail.
+    ``prefill_us_per_token`` adds a delay per prompt token (counted as
+    four bytes of messages), to model prefill growing with the prompt.
+    ``down`` makes chat requests fail with 503 and health checks too.
+    """
+
+    def __init__(
+        self,
+        port: int = 0,
+        ttft_ms: float = 50,
+        token_ms: float = 5,
+        tokens: int = 8,
+        slow_ratio: float = 0.0,
+        slow_ms: float = 0.0,
+        seed: Optional[int] = None,
+        prefill_us_per_token: float = 0.0,
+    ) -> None:
+        self.ttft_ms = ttft_ms
+        self.token_ms = token_ms
+        self.tokens = tokens
+        self.slow_ratio = slow_ratio
+        self.slow_ms = slow_ms
+        self.prefill_us_per_token = prefill_us_per_token
+        self.down = False
+        self.requests = 0
+        self.completed = 0
+        self.cancelled = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), _make_handler(self))
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="stub-ollama", daemon=True).start()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}/v1"
+
+    def first_token_delay(self) -> float:
+        with self._lock:
+            self.requests += 1
+            slow = self._random.random() < self.slow_ratio
+        return (self.slow_ms if slow else self.ttft_ms) / 1000
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def _chunk(delta: dict, finish_reason: Optional[str] = None, usage: Optional[dict] = None) -> bytes:
+    chunk = {
+        "id": "chatcmpl-stub",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": "stub",
+        "choices": [] if usage else [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+    if usage:
+        chunk["usage"] = usage
+    return f"data: {json.dumps(chunk)}\n\n".encode()
+
+
+def _make_handler(stub: StubOllama) -> type:
+    class _Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True  # Each SSE chunk goes out at once
+
+        def do_GET(self) -> None:
+            if self.path != "/api/version" or stub.down:
+                self.send_error(404 if not stub.down else 503)
+                return
+            self._send_json({"version": "stub"})
+
+        def do_POST(self) -> None:
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if self.path != "/v1/chat/completions":
+                self.send_error(404)
+                return
+            if stub.down:
+                self._send_json({"error": "backend down"}, status=503)
+                return
+            request = json.loads(body)
+            max_tokens = request.get("max_tokens") or stub.tokens
+            prompt_tokens = len(json.dumps(request["messages"], ensure_ascii=False).encode()) // 4
+            time.sleep(stub.first_token_delay() + prompt_tokens * stub.prefill_us_per_token / 1e6)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            try:
+                self._write(_chunk({"role": "assistant", "content": "جی"}))
+                for i in range(min(stub.tokens, max_tokens) - 1):
+                    time.sleep(stub.token_ms / 1000)
+                    self._write(_chunk({"content": f" {i}"}))
+                self._write(_chunk({}, finish_reason="stop"))
+                self._write(_chunk({}, usage={"prompt_tokens": prompt_tokens, "completion_tokens": stub.tokens, "total_tokens": prompt_tokens + stub.tokens}))
+                self._write(b"data: [DONE]\n\n")
+                self._write(b"")
+                stub.completed += 1
+            except (BrokenPipeError, ConnectionResetError):
+                stub.cancelled += 1  # The client hung up mid-stream
+
+        def _write(self, data: bytes) -> None:
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+        def _send_json(self, payload: dict, status: int = 200) -> None:
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format: str, *args) -> None:
+            pass
+
+    return _Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=11500)
+    parser.add_argument("--ttft-ms", type=float, default=50)
+    parser.add_argument("--slow-ratio", type=float, default=0.0)
+    parser.add_argument("--slow-ms", type=float, default=0.0)
+    args = parser.parse_args()
+    stub = StubOllama(args.port, ttft_ms=args.ttft_ms, slow_ratio=args.slow_ratio, slow_ms=args.slow_ms)
+    print(f"Stub Ollama serving on {stub.base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        stub.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""PCM conversion from LiveKit audio frames to Whisper input."""
+from contextlib import contextmanager
+from typing import Iterator
+
+import numpy as np
+
+from livekit import rtc
+from livekit.agents.utils import AudioBuffer
+
+# Whisper models are trained on 16 kHz mono audio
+WHISPER_SAMPLE_RATE = 16000
+
+_INT16_SCALE = np.float32(1 / 32768)
+
+
+def frame_samples(frame: rtc.AudioFrame) -> np.ndarray:
+    """Return the frame's interleaved PCM as an int16 view, without copying."""
+    return np.frombuffer(frame.data, dtype=np.int16)
+
+
+class PCMConverter:
+    """Converts AudioBuffers to 16 kHz mono float32 in reusable buffers.
+
+    A single frame (what the framework hands over after merging an
+    utterance) is read through a zero-copy int16 view and scaled straight
+    into a preallocated float32 buffer. Channel mixing and resampling are
+    vectorized and also write into buffers that only grow when an utterance
+    is longer than any seen before. The buffers are leased for the duration
+    of the ``convert`` block; an overlapping call gets private ones. A block
+    that ends with an exception (the caller cancelled or timed out) may leave
+    a decode still reading on an executor thread, so the buffers go with it
+    and the next call allocates new ones.
+    """
+
+    def __init__(self) -> None:
+        self._arrays: dict[str, np.ndarray] = {}
+        # Interpolation grids per resampling ratio: (index, index + 1, fraction)
+        self._grids: dict[float, tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+        self._leased = False
+
+    @contextmanager
+    def convert(self, buffer: AudioBuffer) -> Iterator[np.ndarray]:
+        """Yield the buffer as Whisper input; valid only inside the block."""
+        frames = [buffer] if isinstance(buffer, rtc.AudioFrame) else list(buffer)
+        if not frames:
+            yield np.zeros(0, dtype=np.float32)
+            return
+
+        if self._leased:
+            # Overlapping call: private buffers keep the shared ones intact
+            with PCMConverter().convert(frames) as audio:
+                yield audio
+            return
+
+        self._leased = True
+        try:
+            yield self._convert(frames)
+        except BaseException:
+            # A worker may still hold a view: leave these buffers to it
+            self._arrays = {}
+            raise
+        finally:
+            self._leased = False
+
+    def _array(self, name: str, size: int) -> np.ndarray:
+        """Return a reusable float32 buffer of at least ``size`` samples."""
+        array = self._arrays.get(name)
+        if array is None or len(array) < size:
+            # Grow with headroom so slightly longer utterances don't reallocate
+            array = self._arrays[name] = np.empty(int(size * 1.25), dtype=np.float32)
+        return array[:size]
+
+    def _convert(self, frames: list[rtc.AudioFrame]) -> np.ndarray:
+        sample_rate = frames[0].sample_rate
+        num_channels = frames[0].num_channels
+        if len(frames) == 1:
+            samples = frame_samples(frames[0])
+        else:
+            # One int16 gather beats a Python-level loop over 10-20 ms frames
+            samples = np.concatenate([frame_samples(frame) for frame in frames])
+
+        total = len(samples) // num_channels
+        if sample_rate == WHISPER_SAMPLE_RATE:
+            return self._to_mono(samples, num_channels, self._array("out", total))
+        mono = self._to_mono(samples, num_channels, self._array("mono", total))
+        return self._resample(mono, sample_rate)
+
+    @staticmethod
+    def _to_mono(samples: np.ndarray, num_channels: int, out: np.ndarray) -> np.ndarray:
+        """Scale interleaved int16 PCM to [-1, 1) float32, averaging channels."""
+        if num_channels == 1:
+            return np.multiply(samples, _INT16_SCALE, out=out)
+        np.multiply(samples[0::num_channels], _INT16_SCALE / num_channels, out=out)
+        for channel in range(1, num_channels):
+            out += samples[channel::num_channels] * (_INT16_SCALE / num_channels)
+        return out
+
+    def _resample(self, audio: np.ndarray, sample_rate: int) -> np.ndarray:
+        """Resample mono float32 audio to 16 kHz.
+
+        Integer downsampling ratios (48 kHz, 32 kHz) average each group of
+        samples, which doubles as a cheap anti-aliasing filter. Other rates
+        use linear interpolation, after a moving average when downsampling.
+        """
+        ratio = sample_rate / WHISPER_SAMPLE_RATE
+        if ratio.is_integer():
+            step = int(ratio)
+            n_out = len(audio) // step
+            out = self._array("out", n_out)
+            np.copyto(out, audio[0 : n_out * step : step])
+            for k in range(1, step):
+                out += audio[k : n_out * step : step]
+            out *= np.float32(1 / step)
+            return out
+
+        n_out = int(len(audio) / ratio)
+        width = int(round(ratio))
+        if width >= 2:
+            cumsum = np.cumsum(audio, out=self._array("cumsum", len(audio)))
+            smoothed = self._array("smoothed", len(audio) - width)
+            np.subtract(cumsum[width:], cumsum[:-width], out=smoothed)
+            smoothed *= np.float32(1 / width)
+            audio = smoothed
+
+        index, next_index, fraction = self._grid(ratio, n_out)
+        # Positions past the last sample pair just repeat the final sample
+        n_valid = int(np.searchsorted(next_index, len(audio)))
+        out = self._array("out", n_out)
+        delta = self._array("delta", n_valid)
+        np.take(audio, index[:n_valid], out=out[:n_valid], mode="clip")
+        np.take(audio, next_index[:n_valid], out=delta, mode="clip")
+        delta -= out[:n_valid]
+        delta *= fraction[:n_valid]
+        out[:n_valid] += delta
+        out[n_valid:] = audio[-1] if len(audio) else 0.0
+        return out
+
+    def _grid(self, ratio: float, n_out: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        grid = self._grids.get(ratio)
+        if grid is None or len(grid[0]) < n_out:
+            positions = np.arange(int(n_out * 1.25) + 1, dtype=np.float64) * ratio
+            index = positions.astype(np.int64)
+            grid = self._grids[ratio] = (index, index + 1, (positions - index).astype(np.float32))
+        return grid[0][:n_out], grid[1][:n_out], grid[2][:n_out]
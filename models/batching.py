@@ -0,0 +1,216 @@
+"""Cross-session micro-batching of Whisper decode requests."""
+import atexit
+import concurrent.futures
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
+
+from .decoding import decode_batch
+from .executor import DeadlineExceededError, InferenceExecutor
+from .registry import ModelEntry, ModelKey
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BatchingOptions:
+    """Configuration options for BatchScheduler."""
+    max_batch_size: int = 8
+    max_wait_ms: float = 10.0
+
+
+@dataclass
+class _Request:
+    audio: np.ndarray
+    language: str
+    deadline: Optional[float]
+    enqueued_at: float = field(default_factory=time.monotonic)
+    future: concurrent.futures.Future = field(default_factory=concurrent.futures.Future)
+
+
+def _settle(future: concurrent.futures.Future, result=None, error: Optional[BaseException] = None) -> None:
+    """Resolve a request future unless its caller already cancelled it."""
+    try:
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+    except concurrent.futures.InvalidStateError:
+        pass
+
+
+class BatchScheduler:
+    """Collects utterances from every session and decodes them as one batch.
+
+    A batch is dispatched when it is full, or when the oldest request has
+    waited ``max_wait_ms`` and a pool worker is free. While every worker is
+    busy, requests keep accumulating, so batches fill up under load instead
+    of queueing one by one. Only utterances that fit in a single 30 s
+    encoder window should be submitted. Sessions share a model's scheduler
+    through ``batch_scheduler()``.
+    """
+
+    def __init__(
+        self,
+        entry: ModelEntry,
+        executor: InferenceExecutor,
+        options: Optional[BatchingOptions] = None,
+    ) -> None:
+        self._entry = entry
+        self._executor = executor
+        self._opts = options or BatchingOptions()
+
+        self._cond = threading.Condition()
+        self._pending: list[_Request] = []
+        self._closed = False
+
+        self._batches = 0
+        self._requests = 0
+        self._queue_delay_ms_total = 0.0
+        self._queue_delay_ms_max = 0.0
+
+        # Wake the collector when a worker frees up
+        executor.add_done_listener(self._notify)
+        self._thread = threading.Thread(target=self._collect, name="whisper-batcher", daemon=True)
+        self._thread.start()
+
+    @property
+    def entry(self) -> ModelEntry:
+        return self._entry
+
+    async def recognize(self, audio: np.ndarray, language: str, timeout: Optional[float] = None) -> str:
+        """Queue one utterance for the next batch and await its text."""
+        request = _Request(
+            audio=audio,
+            language=language,
+            deadline=time.monotonic() + timeout if timeout else None,
+        )
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("STT batch scheduler is shut down")
+            self._pending.append(request)
+            self._cond.notify()
+        return await self._executor.wait(request.future, timeout)
+
+    def shutdown(self) -> None:
+        """Stop the collector, fail the utterances still waiting and detach from the executor."""
+        self._executor.remove_done_listener(self._notify)
+        with self._cond:
+            self._closed = True
+            waiting, self._pending = self._pending, []
+            self._cond.notify()
+        for request in waiting:
+            _settle(request.future, error=RuntimeError("STT batch scheduler is shut down"))
+        self._thread.join(timeout=1)
+
+    def stats(self) -> dict:
+        with self._cond:
+            batches = self._batches or 1
+            requests = self._requests or 1
+            return {
+                "batches": self._batches,
+                "requests": self._requests,
+                "fill_rate": round(self._requests / (batches * self._opts.max_batch_size), 3),
+                "avg_batch_size": round(self._requests / batches, 2),
+                "avg_queue_delay_ms": round(self._queue_delay_ms_total / requests, 2),
+                "max_queue_delay_ms": round(self._queue_delay_ms_max, 2),
+            }
+
+    def _notify(self) -> None:
+        with self._cond:
+            self._cond.notify()
+
+    def _ready(self) -> bool:
+        if len(self._pending) >= self._opts.max_batch_size:
+            return True
+        waited_ms = (time.monotonic() - self._pending[0].enqueued_at) * 1000
+        worker_free = self._executor.pending < self._executor.max_workers
+        return waited_ms >= self._opts.max_wait_ms and worker_free
+
+    def _collect(self) -> None:
+        max_wait = self._opts.max_wait_ms / 1000
+        while True:
+            with self._cond:
+                while not self._closed and (not self._pending or not self._ready()):
+                    # Timed wait so the max_wait deadline is noticed without a notify
+                    self._cond.wait(max_wait if self._pending else None)
+                if self._closed:
+                    return
+                batch = self._pending[: self._opts.max_batch_size]
+                del self._pending[: self._opts.max_batch_size]
+            self._dispatch(batch)
+
+    def _dispatch(self, batch: list[_Request]) -> None:
+        now = time.monotonic()
+        live = []
+        for request in batch:
+            if request.deadline is not None and now > request.deadline:
+                _settle(request.future, error=DeadlineExceededError())
+            elif not request.future.cancelled():
+                live.append(request)
+        if not live:
+            return
+
+        delays_ms = [(now - request.enqueued_at) * 1000 for request in live]
+        with self._cond:
+            self._batches += 1
+            self._requests += len(live)
+            self._queue_delay_ms_total += sum(delays_ms)
+            self._queue_delay_ms_max = max(self._queue_delay_ms_max, *delays_ms)
+        logger.debug(
+            f"Dispatching STT batch of {len(live)}/{self._opts.max_batch_size} "
+            f"(max queue delay {max(delays_ms):.1f} ms)"
+        )
+
+        # Skip the batch only once every caller in it has given up
+        deadlines = [request.deadline for request in live]
+        try:
+            future = self._executor.submit(
+                self._entry,
+                decode_batch,
+                [request.audio for request in live],
+                [request.language for request in live],
+                deadline=None if None in deadlines else max(deadlines),
+            )
+        except Exception as e:
+            for request in live:
+                _settle(request.future, error=e)
+            return
+
+        def _distribute(done: concurrent.futures.Future) -> None:
+            error = done.exception() if not done.cancelled() else concurrent.futures.CancelledError()
+            for i, request in enumerate(live):
+                if error is not None:
+                    _settle(request.future, error=error)
+                else:
+                    _settle(request.future, result=done.result()[i])
+
+        future.add_done_callback(_distribute)
+
+
+_schedulers: dict[ModelKey, BatchScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+
+def batch_scheduler(
+    entry: ModelEntry,
+    executor: InferenceExecutor,
+    options: Optional[BatchingOptions] = None,
+) -> BatchScheduler:
+    """Return the process-wide scheduler for a model, creating it on the first call.
+
+    Prewarm runs for every job in thread mode; asking here instead of
+    building a scheduler puts all of the process's sessions in the same
+    batches. ``executor`` and ``options`` only apply to the first call.
+    Schedulers are shut down when the process exits.
+    """
+    with _schedulers_lock:
+        scheduler = _schedulers.get(entry.key)
+        if scheduler is None:
+            scheduler = _schedulers[entry.key] = BatchScheduler(entry, executor, options)
+            atexit.register(scheduler.shutdown)
+        return scheduler
@@ -0,0 +1,75 @@
+"""Low-level batched Whisper decoding on top of CTranslate2."""
+import weakref
+from typing import TYPE_CHECKING
+
+import numpy as np
+from faster_whisper import WhisperModel
+from faster_whisper.audio import pad_or_trim
+from faster_whisper.tokenizer import Tokenizer
+from faster_whisper.transcribe import get_suppressed_tokens
+
+if TYPE_CHECKING:
+    from .features import FeatureCache
+
+# Whisper's encoder window; longer utterances go through model.transcribe()
+MAX_WINDOW_SECONDS = 30.0
+
+_tokenizers: "weakref.WeakKeyDictionary[WhisperModel, dict[str, Tokenizer]]" = weakref.WeakKeyDictionary()
+
+
+def get_tokenizer(model: WhisperModel, language: str) -> Tokenizer:
+    """Return a cached transcription tokenizer for this model and language."""
+    per_model = _tokenizers.setdefault(model, {})
+    tokenizer = per_model.get(language)
+    if tokenizer is None:
+        tokenizer = per_model[language] = Tokenizer(
+            model.hf_tokenizer,
+            model.model.is_multilingual,
+            task="transcribe",
+            language=language,
+        )
+    return tokenizer
+
+
+def compute_features(model: WhisperModel, audio: np.ndarray) -> np.ndarray:
+    """Log-mel features for one utterance, padded to a full encoder window."""
+    return pad_or_trim(model.feature_extractor(audio), model.feature_extractor.nb_max_frames)
+
+
+def decode_features(model: WhisperModel, features: np.ndarray, languages: list[str]) -> list[str]:
+    """Greedy-decode a (batch, n_mels, frames) feature array in one encoder pass."""
+    return generate_text(model, model.encode(features), languages)
+
+
+def generate_text(model: WhisperModel, encoder_output, languages: list[str]) -> list[str]:
+    """Greedy-decode text from encoder output, one language per batch item."""
+    tokenizers = [get_tokenizer(model, language) for language in languages]
+    prompts = [
+        model.get_prompt(tokenizer, previous_tokens=[], without_timestamps=True)
+        for tokenizer in tokenizers
+    ]
+    results = model.model.generate(
+        encoder_output,
+        prompts,
+        beam_size=1,
+        max_length=model.max_length,
+        suppress_blank=True,
+        suppress_tokens=list(get_suppressed_tokens(tokenizers[0], [-1])),
+    )
+    return [
+        tokenizer.decode(result.sequences_ids[0]).strip()
+        for tokenizer, result in zip(tokenizers, results)
+    ]
+
+
+def decode_batch(model: WhisperModel, audios: list[np.ndarray], languages: list[str]) -> list[str]:
+    """Transcribe several utterances of at most 30 s each as one batch."""
+    features = np.stack([compute_features(model, audio) for audio in audios])
+    return decode_features(model, features, languages)
+
+
+def decode_cached(model: WhisperModel, audio: np.ndarray, language: str, cache: "FeatureCache") -> str:
+    """Transcribe one growing utterance of at most 30 s, reusing a session's cached work."""
+    features = pad_or_trim(cache.log_mel(model.feature_extractor, audio), model.feature_extractor.nb_max_frames)
+    encoder_output = cache.encode(model, features[np.newaxis])
+    return generate_text(model, encoder_output, [language])[0]
@@ -0,0 +1,240 @@
+"""Bounded executor that runs Whisper inference off the event loop."""
+import asyncio
+import atexit
+import concurrent.futures
+import logging
+import multiprocessing
+import threading
+import time
+from typing import Any, Callable, Literal, Optional
+
+from livekit.agents import APIStatusError, APITimeoutError
+
+from .registry import ModelEntry, ModelKey, whisper_registry
+
+logger = logging.getLogger(__name__)
+
+ExecutorKind = Literal["thread", "process"]
+
+# Models loaded inside a process-pool worker, keyed like the registry
+_worker_models: dict[ModelKey, ModelEntry] = {}
+
+
+class InferenceOverloadedError(APIStatusError):
+    """Raised when the inference pool has no room for another request."""
+
+    def __init__(self, pending: int, capacity: int):
+        super().__init__(
+            f"Whisper inference pool saturated ({pending}/{capacity} requests pending)",
+            status_code=503,
+            retryable=False,  # Retrying only adds to the backlog
+        )
+
+
+class DeadlineExceededError(TimeoutError):
+    """Raised inside a worker when a request waited past its deadline."""
+
+
+def _invoke_local(model: Any, fn: Callable, args: tuple, deadline: Optional[float]) -> Any:
+    if deadline is not None and time.monotonic() > deadline:
+        raise DeadlineExceededError()
+    return fn(model, *args)
+
+
+def _invoke_in_worker(key: ModelKey, fn: Callable, args: tuple, deadline: Optional[float]) -> Any:
+    if deadline is not None and time.monotonic() > deadline:
+        raise DeadlineExceededError()
+    entry = _worker_models.get(key)
+    if entry is None:
+        entry = _worker_models[key] = whisper_registry.acquire(*key)
+    return fn(entry.model, *args)
+
+
+def _preload_worker(keys: tuple) -> None:
+    for key in keys:
+        _worker_models[key] = whisper_registry.acquire(*key)
+
+
+class InferenceExecutor:
+    """Runs blocking model calls in a thread or process pool with admission control.
+
+    At most ``max_workers`` requests run at once and at most ``max_queue_size``
+    more may wait. Anything beyond that is rejected immediately with
+    ``InferenceOverloadedError`` instead of queueing without bound.
+
+    In ``"process"`` mode each worker process loads its own copy of the
+    model, so ``fn`` must be a picklable module-level function.
+    """
+
+    def __init__(
+        self,
+        kind: ExecutorKind = "thread",
+        max_workers: int = 1,
+        max_queue_size: int = 4,
+        preload: tuple[ModelKey, ...] = (),
+    ) -> None:
+        self._kind = kind
+        self._max_workers = max_workers
+        self._max_queue_size = max_queue_size
+
+        if kind == "process":
+            # spawn, not fork: a forked child cannot reuse the parent's CUDA context
+            self._pool: concurrent.futures.Executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_preload_worker,
+                initargs=(preload,),
+            )
+        else:
+            self._pool = concurrent.futures.ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="whisper"
+            )
+
+        # Sessions may run on different event loops, so counters are guarded by a lock
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+        self._timed_out = 0
+        self._listeners: list[Callable[[], None]] = []
+
+    @property
+    def kind(self) -> ExecutorKind:
+        return self._kind
+
+    @property
+    def capacity(self) -> int:
+        return self._max_workers + self._max_queue_size
+
+    @property
+    def pending(self) -> int:
+        """Requests currently running or waiting for a worker."""
+        return self._pending
+
+    @property
+    def max_workers(self) -> int:
+        return self._max_workers
+
+    def submit(
+        self,
+        entry: ModelEntry,
+        fn: Callable,
+        *args: Any,
+        deadline: Optional[float] = None,
+    ) -> concurrent.futures.Future:
+        """Admit ``fn(model, *args)`` to the pool without waiting for it.
+
+        Args:
+            entry: Registry entry of the model to run against
+            fn: Function taking the model as its first argument
+            deadline: ``time.monotonic()`` value after which queued work is
+                skipped rather than run
+
+        Raises:
+            InferenceOverloadedError: The pool and its queue are full
+        """
+        with self._lock:
+            if self._pending >= self.capacity:
+                self._rejected += 1
+                raise InferenceOverloadedError(self._pending, self.capacity)
+            self._pending += 1
+
+        try:
+            if self._kind == "process":
+                future = self._pool.submit(_invoke_in_worker, entry.key, fn, args, deadline)
+            else:
+                future = self._pool.submit(_invoke_local, entry.model, fn, args, deadline)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+        # Release the slot when the work really ends, not when the caller stops waiting
+        future.add_done_callback(self._on_done)
+        return future
+
+    async def run(
+        self,
+        entry: ModelEntry,
+        fn: Callable,
+        *args: Any,
+        timeout: Optional[float] = None,
+    ) -> Any:
+        """Run ``fn(model, *args)`` in the pool and await its result.
+
+        Args:
+            entry: Registry entry of the model to run against
+            fn: Function taking the model as its first argument
+            timeout: Seconds before the caller gives up; queued work past
+                its deadline is skipped rather than run
+
+        Raises:
+            InferenceOverloadedError: The pool and its queue are full
+            APITimeoutError: The request did not finish within ``timeout``
+        """
+        deadline = time.monotonic() + timeout if timeout else None
+        future = self.submit(entry, fn, *args, deadline=deadline)
+        return await self.wait(future, timeout)
+
+    async def wait(self, future: concurrent.futures.Future, timeout: Optional[float]) -> Any:
+        """Await a submitted future, mapping deadline misses to ``APITimeoutError``."""
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout or None)
+        except (asyncio.TimeoutError, DeadlineExceededError):
+            with self._lock:
+                self._timed_out += 1
+            raise APITimeoutError(
+                f"Whisper inference exceeded {timeout}s deadline", retryable=False
+            ) from None
+
+    def add_done_listener(self, callback: Callable[[], None]) -> None:
+        """Call ``callback`` from the pool whenever a job finishes."""
+        with self._lock:
+            self._listeners.append(callback)
+
+    def remove_done_listener(self, callback: Callable[[], None]) -> None:
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def _on_done(self, future: concurrent.futures.Future) -> None:
+        with self._lock:
+            self._pending -= 1
+            if not future.cancelled():
+                self._completed += 1
+            listeners = list(self._listeners)
+        for callback in listeners:
+            callback()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "kind": self._kind,
+                "pending": self._pending,
+                "capacity": self.capacity,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "timed_out": self._timed_out,
+            }
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+_default_executor: Optional[InferenceExecutor] = None
+_default_executor_lock = threading.Lock()
+
+
+def default_executor(**options: Any) -> InferenceExecutor:
+    """Return the process-wide executor, creating it on the first call.
+
+    ``options`` are ``InferenceExecutor`` arguments and only apply to that
+    first call, made by the worker's prewarm, so every job in the process
+    shares one bounded pool and its admission control. The pool is shut
+    down when the process exits.
+    """
+    global _default_executor
+    with _default_executor_lock:
+        if _default_executor is None:
+            _default_executor = InferenceExecutor(**options)
+            atexit.register(_default_executor.shutdown)
+        return _default_executor
@@ -0,0 +1,150 @@
+"""Per-session cache of log-mel features and encoder outputs."""
+import hashlib
+import threading
+from collections import OrderedDict
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from typing import Any, Optional
+
+import numpy as np
+from faster_whisper.feature_extractor import FeatureExtractor
+
+# Set by a streaming session so every decode it triggers can reuse its cache
+current_feature_cache: ContextVar[Optional["FeatureCache"]] = ContextVar(
+    "current_feature_cache", default=None
+)
+
+
+@dataclass
+class FeatureCacheStats:
+    """Hit/miss counters for one FeatureCache."""
+    mel_frames_reused: int = 0
+    mel_frames_computed: int = 0
+    mel_resets: int = 0
+    encoder_hits: int = 0
+    encoder_misses: int = 0
+    encoder_evictions: int = 0
+
+
+class FeatureCache:
+    """Incremental log-mel features and recent encoder outputs for one session.
+
+    A streaming utterance only ever grows by appending audio, so log-mel
+    frames whose STFT window lies entirely inside audio already seen are
+    kept, and each new window only computes frames for the new tail. The
+    cache resets as soon as the audio is no longer an extension of what it
+    holds (a new utterance).
+
+    Whisper's encoder attends over the whole 30 s window, so its output
+    for a prefix cannot be extended. Encoder outputs are therefore reused
+    only for an identical feature window, for example a final decode of
+    audio that the last interim already covered. They are kept in an LRU
+    that, together with the mel frames, stays under ``max_bytes``. STT
+    tiers may decode an utterance's interims and its final transcript with
+    different models, so encoder outputs are kept per model and the mel
+    frames start over for a model with another number of mel bins.
+    """
+
+    def __init__(self, max_bytes: int = 32 * 2**20) -> None:
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._window: Optional[np.ndarray] = None
+        self._raw: Optional[np.ndarray] = None  # (n_mels, stable frames), pre-normalization
+        self._audio = np.empty(0, dtype=np.float32)  # Audio the stable frames depend on
+        self._encoded: "OrderedDict[tuple[int, bytes], tuple[Any, int]]" = OrderedDict()
+        self._encoded_bytes = 0
+        self._stats = FeatureCacheStats()
+
+    def log_mel(self, fe: FeatureExtractor, audio: np.ndarray) -> np.ndarray:
+        """Same features as ``fe(audio)``, computing only frames not cached yet."""
+        hop, n_fft = fe.hop_length, fe.n_fft
+        half = n_fft // 2
+        with self._lock:
+            if self._raw is not None and (
+                self._raw.shape[0] != fe.mel_filters.shape[0]  # A model with another number of mel bins
+                or len(audio) < len(self._audio)
+                or not np.array_equal(audio[: len(self._audio)], self._audio)
+            ):
+                self._reset_mel()
+                self._stats.mel_resets += 1
+
+            # fe() pads 160 zero samples, reflect-pads by n_fft // 2 and drops the last frame
+            signal = np.zeros(len(audio) + 160, dtype=np.float32)
+            signal[: len(audio)] = audio
+            total = len(signal) // hop
+            start = self._raw.shape[1] if self._raw is not None else 0
+
+            if start * hop < half:
+                # The first frames see the left reflection; recompute from scratch
+                start = 0
+                self._reset_mel()
+                segment = np.pad(signal, (half, half), mode="reflect")
+            else:
+                segment = np.pad(signal[start * hop - half :], (0, half), mode="reflect")
+            new = self._raw_frames(fe, segment, total - start)
+
+            # Frames whose window ends inside the real audio never change again
+            n_stable = min(total, max(0, (len(audio) - half) // hop + 1))
+            keep = n_stable - start
+            if keep > 0 and self._fits(new.nbytes + len(audio) * 4):
+                cached = new[:, :keep]
+                self._raw = cached if self._raw is None else np.concatenate([self._raw, cached], axis=1)
+                self._audio = audio[: (n_stable - 1) * hop + half].copy()
+
+            self._stats.mel_frames_reused += start
+            self._stats.mel_frames_computed += total - start
+            raw = new if start == 0 else np.concatenate([self._raw[:, :start], new], axis=1)
+
+        log_spec = np.maximum(raw, raw.max() - 8.0)
+        return (log_spec + 4.0) / 4.0
+
+    def encode(self, model, features: np.ndarray):
+        """Return the encoder output for a padded feature window, reusing exact matches."""
+        key = (id(model), hashlib.blake2b(features.tobytes(), digest_size=16).digest())
+        with self._lock:
+            cached = self._encoded.get(key)
+            if cached is not None:
+                self._encoded.move_to_end(key)
+                self._stats.encoder_hits += 1
+                return cached[0]
+            self._stats.encoder_misses += 1
+
+        encoder_output = model.encode(features)
+        size = int(np.prod(encoder_output.shape)) * 4
+        with self._lock:
+            self._encoded[key] = (encoder_output, size)
+            self._encoded_bytes += size
+            # Evict least recently used outputs beyond the memory cap
+            while self._encoded and not self._fits(0):
+                _, (_, evicted) = self._encoded.popitem(last=False)
+                self._encoded_bytes -= evicted
+                self._stats.encoder_evictions += 1
+        return encoder_output
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**asdict(self._stats), "bytes": self._bytes()}
+
+    def _raw_frames(self, fe: FeatureExtractor, segment: np.ndarray, n_frames: int) -> np.ndarray:
+        """Pre-normalization log-mel of ``n_frames`` frames starting at segment[0]."""
+        if self._window is None:
+            self._window = np.hanning(fe.n_fft + 1)[:-1].astype(np.float32)
+        frames = np.lib.stride_tricks.as_strided(
+            segment,
+            (n_frames, fe.n_fft),
+            (fe.hop_length * segment.strides[0], segment.strides[0]),
+        )
+        magnitudes = np.abs(np.fft.rfft(frames * self._window, axis=-1).T.astype(np.complex64)) ** 2
+        mel_spec = fe.mel_filters @ magnitudes
+        return np.log10(np.clip(mel_spec, a_min=1e-10, a_max=None)).astype(np.float32)
+
+    def _bytes(self) -> int:
+        mel_bytes = self._raw.nbytes if self._raw is not None else 0
+        return mel_bytes + self._audio.nbytes + self._encoded_bytes
+
+    def _fits(self, extra: int) -> bool:
+        return self._bytes() + extra <= self._max_bytes
+
+    def _reset_mel(self) -> None:
+        self._raw = None
+        self._audio = np.empty(0, dtype=np.float32)
@@ -0,0 +1,133 @@
+"""Hedged LLM requests: race a duplicate when the first token is late."""
+from __future__ import annotations
+
+import asyncio
+import bisect
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+from .llm import PrefetchedStream
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class HedgingOptions:
+    """Configuration options for RequestHedger."""
+    percentile: float = 95.0  # Hedge once the first token is later than this share of recent requests
+    initial_delay: float = 1.0  # Seconds, until min_samples times to first token are known
+    min_delay: float = 0.1
+    max_delay: float = 3.0
+    window: int = 500  # Recent times to first token the delay is computed from
+    min_samples: int = 20
+
+
+class RequestHedger:
+    """Starts a second request when the first has no token after the hedge delay.
+
+    The delay tracks a high percentile of recent times to first token, so
+    about ``100 - percentile`` percent of requests are hedged. Whichever
+    attempt yields a token first is used; the other is cancelled, which
+    closes its connection so Ollama stops generating. Shared per options
+    by every session in the process (``RequestHedger.shared``).
+    """
+
+    _shared: dict[HedgingOptions, RequestHedger] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, options: HedgingOptions | None = None) -> None:
+        self._opts = options or HedgingOptions()
+        self._lock = threading.Lock()
+        self._ttfts: deque[float] = deque(maxlen=self._opts.window)
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.saved_total = 0.0  # Estimated seconds of waiting avoided by hedges that won
+
+    @classmethod
+    def shared(cls, options: HedgingOptions) -> RequestHedger:
+        with cls._shared_lock:
+            hedger = cls._shared.get(options)
+            if hedger is None:
+                hedger = cls._shared[options] = cls(options)
+            return hedger
+
+    def delay(self) -> float:
+        """Seconds to wait for the first token before hedging."""
+        with self._lock:
+            if len(self._ttfts) < self._opts.min_samples:
+                return self._opts.initial_delay
+            ttfts = sorted(self._ttfts)
+        rank = min(len(ttfts) - 1, int(len(ttfts) * self._opts.percentile / 100))
+        return min(self._opts.max_delay, max(self._opts.min_delay, ttfts[rank]))
+
+    async def run(self, attempt: Callable[[], Awaitable[PrefetchedStream]]) -> PrefetchedStream:
+        """Return the stream of whichever attempt produced a token first."""
+        start = time.perf_counter()
+        delay = self.delay()
+        with self._lock:
+            self.requests += 1
+        primary = asyncio.ensure_future(attempt())
+        tasks = [primary]
+        winner = None
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                with self._lock:
+                    self.hedged += 1
+                logger.debug(f"No LLM token after {delay * 1000:.0f} ms; hedging the request")
+                tasks.append(asyncio.ensure_future(attempt()))
+
+            pending = set(tasks)
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in tasks:
+                    if task in done and not task.cancelled() and task.exception() is None:
+                        winner = task
+                        break
+        finally:
+            # Losers, and everything if we were cancelled ourselves
+            losers = [task for task in tasks if task is not winner]
+            for task in losers:
+                task.cancel()
+            for task, result in zip(losers, await asyncio.gather(*losers, return_exceptions=True)):
+                if isinstance(result, PrefetchedStream):
+                    await result.close()
+
+        if winner is None:
+            raise primary.exception()  # Every attempt failed; report the first one's error
+
+        elapsed = time.perf_counter() - start
+        if winner is not primary:
+            self._record_hedge_win(elapsed)
+        with self._lock:
+            # Time to first token as the caller saw it, from the request's start.
+            # After a hedge win it is also a lower bound of the cancelled primary's.
+            self._ttfts.append(elapsed)
+        return winner.result()
+
+    def _record_hedge_win(self, elapsed: float) -> None:
+        with self._lock:
+            ttfts = sorted(self._ttfts)
+            # The primary would have answered at E[TTFT | TTFT > elapsed]
+            slower = ttfts[bisect.bisect_right(ttfts, elapsed):]
+            saved = sum(slower) / len(slower) - elapsed if slower else 0.0
+            self.hedge_wins += 1
+            self.saved_total += saved
+
+    def stats(self) -> dict:
+        delay = self.delay()
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "hedged": self.hedged,
+                "hedge_rate": round(self.hedged / (self.requests or 1), 3),
+                "hedge_wins": self.hedge_wins,
+                "delay_ms": round(delay * 1000, 1),
+                "saved_ms_total": round(self.saved_total * 1000, 1),
+                "saved_ms_per_hedge": round(self.saved_total * 1000 / (self.hedged or 1), 1),
+            }
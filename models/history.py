@@ -0,0 +1,232 @@
+"""Token-budgeted chat history: recent turns verbatim, older ones summarized."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_INSTRUCTIONS = (
+    "Summarize the conversation below between a website voice assistant and a caller, "
+    "for the assistant to continue it. Keep what the caller asked for and decided, names, "
+    "numbers, pages and sections already shown, and open questions. Write in the language "
+    "the caller uses, in at most a few sentences, without a preamble."
+)
+SUMMARY_PREFIX = "Summary of the conversation so far:\n"
+
+
+@dataclass
+class HistoryOptions:
+    """Configuration options for HistoryManager, in tokens of conversation after the system prompt."""
+    max_tokens: int = 3072  # Never sent more: the oldest turns are dropped if no summary is ready
+    summarize_tokens: int = 1536  # Past this, older turns are folded into the summary in the background
+    keep_tokens: int = 768  # Recent turns kept verbatim after a fold
+    summary_tokens: int = 256  # Length limit of the generated summary
+
+
+def estimate_tokens(message: dict) -> int:
+    """Rough token count of a chat message, before calibration.
+
+    About four UTF-8 bytes per token: a Latin word piece is ~4 letters,
+    an Urdu one ~2 letters of 2 bytes each. Corrected by ``observe()``.
+    """
+    size = len((message.get("content") or "").encode())
+    for call in message.get("tool_calls") or ():
+        size += len(call["function"]["name"]) + len(call["function"]["arguments"].encode()) + 16
+    return size // 4 + 4  # Role and message framing
+
+
+class HistoryManager:
+    """Keeps a session's prompt within a token budget at a flat cost per turn.
+
+    ``compact()`` takes the converted messages of a turn and returns what
+    to send: the leading system messages, the rolling summary, and the
+    turns after it verbatim. Token counts are kept per message and only
+    new messages are counted. When the verbatim turns pass
+    ``summarize_tokens``, the older ones are summarized by a background
+    request, started after a reply while the caller is speaking, and
+    used from the first turn after it completes; the request in flight
+    never waits for it. Cuts fall before a user message, so a tool call
+    always stays with its output. One per session; messages are shared
+    with the conversion cache and never modified.
+    """
+
+    def __init__(
+        self,
+        summarize: Callable[[list[dict], int], Awaitable[str]],
+        options: HistoryOptions | None = None,
+    ) -> None:
+        self._summarize = summarize
+        self._opts = options or HistoryOptions()
+        self._counted: list[tuple[dict, int]] = []  # Messages and estimated tokens, as last seen
+        self._scale = 1.0  # Server-reported prompt tokens per estimated token
+        self._summary: Optional[str] = None
+        self._summary_message: Optional[dict] = None
+        self._summary_tokens = 0
+        self._folded = 0  # Conversation messages covered by the summary
+        self._last_folded: Optional[dict] = None
+        self._pending: Optional[tuple[int, list[dict]]] = None  # Fold to start after the reply
+        self._task: Optional[asyncio.Task] = None
+        self.turns = 0
+        self.folds = 0
+        self.fold_failures = 0
+        self.fold_ms_total = 0.0
+        self.truncated = 0  # Requests sent without their oldest turns
+        self.sent_tokens_total = 0
+        self.full_tokens_total = 0
+
+    def compact(self, messages: list[dict], tools_json: bytes | None = None) -> tuple[list[dict], int]:
+        """Messages to send for this turn, and their estimated prompt tokens."""
+        head = 0
+        while head < len(messages) and messages[head].get("role") in ("system", "developer"):
+            head += 1
+        body = messages[head:]
+        counts = self._count(messages)
+        head_tokens = sum(counts[:head])
+        body_counts = counts[head:]
+
+        start = self._folded
+        if start and (start > len(body) or not self._same(body[start - 1], self._last_folded)):
+            # The history was rewritten under the summary: start over without it
+            logger.info("Chat history changed before the summary point; dropping the summary")
+            self._reset_summary()
+            start = 0
+
+        kept_tokens = sum(body_counts[start:])
+        if kept_tokens * self._scale > self._opts.summarize_tokens and self._task is None:
+            cut = self._cut(body, body_counts, start, self._opts.keep_tokens / self._scale)
+            if cut > start:
+                self._pending = (cut, body[:cut])
+
+        sent_from = start
+        budget = (self._opts.max_tokens - self._summary_tokens * self._scale) / self._scale
+        if kept_tokens > budget:
+            # Over the hard limit before a summary caught up: leave out the oldest turns
+            sent_from = self._cut(body, body_counts, start, budget)
+            self.truncated += 1
+
+        sent = messages[:head]
+        if self._summary_message is not None:
+            sent.append(self._summary_message)
+        sent.extend(body[sent_from:])
+        estimate = head_tokens + self._summary_tokens + sum(body_counts[sent_from:]) + len(tools_json or b"") // 4
+        self.turns += 1
+        self.sent_tokens_total += round(estimate * self._scale)
+        self.full_tokens_total += round(sum(counts) * self._scale)
+        return sent, round(estimate * self._scale)
+
+    def observe(self, estimated: int, prompt_tokens: int) -> None:
+        """Calibrate the estimates with the prompt tokens the server reported."""
+        if estimated > 0 and prompt_tokens > 0:
+            ratio = prompt_tokens / (estimated / self._scale)
+            self._scale = min(max(0.7 * self._scale + 0.3 * ratio, 0.25), 4.0)
+
+    def after_reply(self) -> None:
+        """Start the pending fold, now that the server is free until the caller's next turn."""
+        if self._pending is None or self._task is not None:
+            return
+        cut, older = self._pending
+        self._pending = None
+        self._task = asyncio.create_task(self._fold(cut, older))
+
+    async def aclose(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "turns": self.turns,
+            "folds": self.folds,
+            "fold_failures": self.fold_failures,
+            "avg_fold_ms": round(self.fold_ms_total / (self.folds or 1), 1),
+            "summarized_messages": self._folded,
+            "truncated_requests": self.truncated,
+            "avg_sent_tokens": round(self.sent_tokens_total / (self.turns or 1)),
+            "avg_full_tokens": round(self.full_tokens_total / (self.turns or 1)),
+            "tokens_per_estimate": round(self._scale, 2),
+        }
+
+    async def _fold(self, cut: int, older: list[dict]) -> None:
+        start = time.perf_counter()
+        folded_from = self._folded
+        transcript = []
+        if self._summary:
+            transcript.append(SUMMARY_PREFIX + self._summary)
+        for message in older[folded_from:]:
+            transcript.extend(_describe(message))
+        try:
+            summary = (await self._summarize(
+                [
+                    {"role": "system", "content": SUMMARY_INSTRUCTIONS},
+                    {"role": "user", "content": "\n".join(transcript)},
+                ],
+                self._opts.summary_tokens,
+            )).strip()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.fold_failures += 1
+            logger.warning(f"Chat history summary failed, keeping turns verbatim: {e}")
+            return
+        finally:
+            self._task = None
+        if not summary or self._folded != folded_from:
+            return
+        self._summary = summary
+        self._summary_message = {"role": "system", "content": SUMMARY_PREFIX + summary}
+        self._summary_tokens = estimate_tokens(self._summary_message)
+        self._folded = cut
+        self._last_folded = older[cut - 1]
+        self.folds += 1
+        self.fold_ms_total += (time.perf_counter() - start) * 1000
+        logger.info(f"Folded {cut - folded_from} messages into the chat summary ({self._summary_tokens} tokens)")
+
+    def _count(self, messages: list[dict]) -> list[int]:
+        # Same message objects as last turn, compared by identity, keep their counts
+        reused = 0
+        for (old, _), new in zip(self._counted, messages):
+            if old is not new:
+                break
+            reused += 1
+        del self._counted[reused:]
+        self._counted.extend((message, estimate_tokens(message)) for message in messages[reused:])
+        return [tokens for _, tokens in self._counted]
+
+    @staticmethod
+    def _cut(body: list[dict], counts: list[int], start: int, budget: float) -> int:
+        """Earliest user message from which the rest fits ``budget``; else the last one."""
+        total = sum(counts[start:])
+        last_user = None
+        for i in range(start, len(body)):
+            if body[i].get("role") == "user":
+                if total <= budget:
+                    return i
+                last_user = i
+            total -= counts[i]
+        return last_user if last_user is not None else start
+
+    @staticmethod
+    def _same(message: dict, folded: Optional[dict]) -> bool:
+        # Rebuilt by the conversion cache after an edit elsewhere, but unchanged
+        return message is folded or message == folded
+
+    def _reset_summary(self) -> None:
+        self._summary = self._summary_message = self._last_folded = None
+        self._summary_tokens = self._folded = 0
+        self._pending = None
+
+
+def _describe(message: dict) -> list[str]:
+    """Transcript lines of a message for the summarizer."""
+    role = message.get("role")
+    lines = []
+    if message.get("content"):
+        speaker = {"user": "Caller", "assistant": "Assistant", "tool": "Tool result"}.get(role, role)
+        lines.append(f"{speaker}: {message['content']}")
+    for call in message.get("tool_calls") or ():
+        lines.append(f"Assistant called {call['function']['name']}({call['function']['arguments']})")
+    return lines
@@ -0,0 +1,221 @@
+"""Fast-path navigation: act on clear commands before the LLM answers."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+from typing import Awaitable, Callable, Optional
+
+from .response_cache import normalize_transcript
+from .tracing import stage
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Intent:
+    """A navigation command and the ways callers name its target."""
+    tool: str  # "scroll_to_section" or "navigate_to_page"
+    target: str
+    aliases: tuple[str, ...]  # Urdu script, Roman Urdu and English, matched after normalization
+
+    @property
+    def command(self) -> dict:
+        return {"type": "scroll" if self.tool == "scroll_to_section" else "navigate", "target": self.target}
+
+
+@dataclass(frozen=True)
+class IntentMatch:
+    intent: Intent
+    score: float  # 1.0 for an exact alias, the similarity ratio for a fuzzy one
+    alias: str
+
+
+# Mirrors the "Navigation Commands" of the assistant's instructions
+WEBSITE_INTENTS = (
+    Intent("scroll_to_section", "plans", (
+        "pricing", "price", "prices", "plans", "plan", "packages", "package", "rates", "cost",
+        "qeemat", "keemat", "qeematein", "qeemten",
+        "قیمت", "قیمتیں", "پرائسنگ", "پرائس", "پلانز", "پلان", "پیکجز", "پیکج", "ریٹس",
+    )),
+    Intent("scroll_to_section", "features", (
+        "features", "feature", "khususiyat", "فیچرز", "فیچر", "خصوصیات",
+    )),
+    Intent("scroll_to_section", "about", (
+        "about", "about us", "product", "اباؤٹ", "اباوٹ", "پروڈکٹ", "ہمارا پروڈکٹ",
+    )),
+    Intent("scroll_to_section", "agents", (
+        "agents", "agent", "ایجنٹس", "ایجنٹ", "استعمال کی مثالیں",
+    )),
+    Intent("scroll_to_section", "demo", ("demo", "live demo", "ڈیمو")),
+    Intent("scroll_to_section", "contact", (
+        "contact", "contact us", "rabta", "کانٹیکٹ", "کونٹیکٹ", "رابطہ",
+    )),
+    Intent("scroll_to_section", "home", ("home", "home page", "top", "ہوم", "ہوم پیج")),
+    Intent("navigate_to_page", "/use-cases", (
+        "use cases", "use case", "usecases", "یوز کیسز", "یوز کیس",
+    )),
+)
+
+# Words that ask to be shown or taken somewhere
+ACTION_WORDS = (
+    "dikhao", "dikhaen", "dikhayen", "dikhaein", "dikha", "show", "open", "go", "jao", "jaen", "chalo",
+    "scroll", "batao", "bataen", "bataiye", "btao", "tell", "take", "see", "dekhna", "dekhao", "dikhaiye",
+    "دکھاؤ", "دکھائیں", "دکھاو", "دکھا", "دیکھنا", "دیکھاؤ", "جاؤ", "جائیں", "چلو", "کھولو", "بتاؤ", "بتائیں", "اسکرول",
+)
+# Aliases that are also everyday words ("tell me about features"); they yield to any other target
+WEAK_ALIASES = ("about", "product", "top", "home", "cost", "plan")
+NEGATION_WORDS = ("nahi", "nahin", "nai", "mat", "not", "dont", "don't", "no", "نہیں", "مت", "نہ")
+
+
+class IntentIndex:
+    """Compiled alias lookup with fuzzy matching for transcription slips.
+
+    A command fires only when exactly one target is named, nothing negates
+    it, and the utterance either contains an action word or is at most a
+    few words long ("pricing?"). Anything less clear is left to the LLM.
+    """
+
+    def __init__(
+        self,
+        intents: tuple[Intent, ...] = WEBSITE_INTENTS,
+        threshold: float = 0.84,  # Minimum similarity for a fuzzy alias match
+        min_fuzzy_length: int = 4,  # Shorter aliases must match exactly
+        max_bare_words: int = 3,  # Utterances this short need no action word
+    ) -> None:
+        self._threshold = threshold
+        self._min_fuzzy_length = min_fuzzy_length
+        self._max_bare_words = max_bare_words
+        # alias n-gram -> intent, grouped by n for sliding over the utterance
+        self._aliases: dict[int, dict[str, Intent]] = {}
+        for intent in intents:
+            for alias in intent.aliases:
+                normalized = normalize_transcript(alias)
+                self._aliases.setdefault(len(normalized.split()), {})[normalized] = intent
+        self._actions = frozenset(normalize_transcript(word) for word in ACTION_WORDS)
+        # Split like transcripts: "don't" normalizes to the two words "don t"
+        self._negations = frozenset(tuple(normalize_transcript(word).split()) for word in NEGATION_WORDS)
+        self._weak = frozenset(normalize_transcript(alias) for alias in WEAK_ALIASES)
+
+    def match(self, transcript: str) -> Optional[IntentMatch]:
+        """Return the one confident command in a transcript, if there is one."""
+        words = normalize_transcript(transcript).split()
+        if not words or self._is_negated(words):
+            return None
+        if len(words) > self._max_bare_words and not any(self._is_action(word) for word in words):
+            return None
+
+        best: dict[Intent, IntentMatch] = {}
+        for n, aliases in self._aliases.items():
+            for i in range(len(words) - n + 1):
+                ngram = " ".join(words[i:i + n])
+                found = self._lookup(ngram, aliases)
+                if found is not None and (found.intent not in best or found.score > best[found.intent].score):
+                    best[found.intent] = found
+        if len(best) > 1:
+            best = {intent: found for intent, found in best.items() if found.alias not in self._weak}
+        if len(best) != 1:
+            return None  # Nothing named, or several targets: let the LLM sort it out
+        return next(iter(best.values()))
+
+    def _lookup(self, ngram: str, aliases: dict[str, Intent]) -> Optional[IntentMatch]:
+        intent = aliases.get(ngram)
+        if intent is not None:
+            return IntentMatch(intent, 1.0, ngram)
+        if len(ngram) < self._min_fuzzy_length:
+            return None
+        best = None
+        for alias, intent in aliases.items():
+            if len(alias) < self._min_fuzzy_length:
+                continue
+            matcher = SequenceMatcher(None, alias, ngram)
+            # The quick ratios are upper bounds, and cheap
+            if matcher.real_quick_ratio() < self._threshold or matcher.quick_ratio() < self._threshold:
+                continue
+            score = matcher.ratio()
+            if score >= self._threshold and (best is None or score > best.score):
+                best = IntentMatch(intent, score, alias)
+        return best
+
+    def _is_negated(self, words: list[str]) -> bool:
+        return any(
+            tuple(words[i:i + len(negation)]) == negation
+            for negation in self._negations
+            for i in range(len(words) - len(negation) + 1)
+        )
+
+    def _is_action(self, word: str) -> bool:
+        return word in self._actions or any(
+            SequenceMatcher(None, action, word).ratio() >= self._threshold
+            for action in self._actions
+            if len(action) >= self._min_fuzzy_length and abs(len(action) - len(word)) <= 2
+        )
+
+
+class FastPathRouter:
+    """Sends matched navigation commands as soon as the final transcript arrives.
+
+    The LLM still answers the turn and will usually call the same tool; the
+    tools ask ``claim()`` first, so the command the fast path sent for this
+    utterance is not sent a second time. Every new utterance's command is
+    sent, even if an earlier one asked for the same section.
+    """
+
+    def __init__(self, index: IntentIndex, publish: Callable[[dict], Awaitable[None]]) -> None:
+        self._index = index
+        self._publish = publish
+        self._fired: Optional[tuple] = None  # Command sent for the current utterance, until the LLM repeats it
+        self._tasks: set[asyncio.Task] = set()
+        self.fired = 0
+        self.suppressed = 0
+        self.match_ms_total = 0.0
+        self.transcripts = 0
+
+    def claim(self, command: dict) -> bool:
+        """True if the command should be sent now; False if the fast path sent it for this utterance."""
+        if self._fired != (command["type"], command["target"]):
+            return True
+        self._fired = None  # Only the one repeat is suppressed
+        self.suppressed += 1
+        return False
+
+    def on_transcript(self, transcript: str, is_final: bool) -> None:
+        """Handler for the session's ``user_input_transcribed`` events."""
+        if not is_final:
+            return
+        self._fired = None  # A new utterance: the previous command is no longer pending
+        start = time.perf_counter()
+        found = self._index.match(transcript)
+        self.transcripts += 1
+        self.match_ms_total += (time.perf_counter() - start) * 1000
+        if found is None:
+            return
+        logger.info(
+            f"Fast-path {found.intent.tool}({found.intent.target!r}) from {transcript!r} "
+            f"(alias {found.alias!r}, score {found.score:.2f})"
+        )
+        self.fired += 1
+        self._fired = (found.intent.command["type"], found.intent.command["target"])
+        task = asyncio.create_task(self._send(found.intent))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, intent: Intent) -> None:
+        with stage("intent.fast_path", tool=intent.tool, target=intent.target):
+            try:
+                await self._publish(intent.command)
+            except Exception as e:
+                # Let the LLM's own tool call send it instead
+                if self._fired == (intent.command["type"], intent.command["target"]):
+                    self._fired = None
+                logger.warning(f"Fast-path navigation failed: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "transcripts": self.transcripts,
+            "fired": self.fired,
+            "suppressed_duplicates": self.suppressed,
+            "avg_match_ms": round(self.match_ms_total / (self.transcripts or 1), 3),
+        }
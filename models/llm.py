@@ -1,8 +1,19 @@
 """LLM implementation using Ollama (OpenAI-compatible API)."""
 from __future__ import annotations
 
+import asyncio
+import dataclasses
+import hashlib
+import importlib.util
+import inspect
+import json
+import logging
 import os
-from typing import Any
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable
 import httpx
 import openai
 
@@ -23,13 +34,432 @@ from livekit.agents.types import (
 )
 from livekit.agents.utils import is_given
 from openai.types.chat import (
+    ChatCompletion,
     ChatCompletionChunk,
     ChatCompletionToolChoiceOptionParam,
     completion_create_params,
 )
 from openai.types.chat.chat_completion_chunk import Choice
 
-from .utils import to_chat_ctx, to_fnc_ctx
+from .history import HistoryManager, HistoryOptions
+from .response_cache import CachedResponseStream, ResponseCache
+from .tool_calls import ToolCallAccumulator
+from .tracing import stage
+from .utils import drop_chat_cache, to_chat_ctx, to_fnc_payload
+
+if TYPE_CHECKING:
+    from .hedging import RequestHedger
+
+logger = logging.getLogger(__name__)
+
+
+def encode_chat_request(
+    *,
+    model: str,
+    messages: list,
+    tools_json: bytes | None,
+    extra_kwargs: dict[str, Any],
+) -> bytes:
+    """Encode a streaming chat completion request body.
+
+    The tools array is spliced in from its cached encoding, so only the
+    messages and sampling options are serialized on each turn.
+    """
+    body = json.dumps(
+        {
+            "messages": messages,
+            "model": model,
+            "stream": True,
+            "stream_options": {"include_usage": True},
+            **extra_kwargs,
+        },
+        ensure_ascii=False,
+    ).encode()
+    if tools_json is not None:
+        body = body[:-1] + b', "tools": ' + tools_json + b"}"
+    return body
+
+
+# openai>=2 takes pre-encoded bodies as content=, older releases as body=
+_POST_CONTENT_PARAM = "content" if "content" in inspect.signature(openai.AsyncClient.post).parameters else "body"
+
+
+async def post_chat_request(client: openai.AsyncClient, body: bytes) -> openai.AsyncStream[ChatCompletionChunk]:
+    """Send a pre-encoded chat completion request and return its chunk stream."""
+    return await client.post(
+        "/chat/completions",
+        cast_to=ChatCompletion,
+        stream=True,
+        stream_cls=openai.AsyncStream[ChatCompletionChunk],
+        **{_POST_CONTENT_PARAM: body},
+    )
+
+
+class PrefetchedStream:
+    """A chat chunk stream whose first token has already been read.
+
+    Chunks before the first one with content, a tool call or usage are
+    buffered and replayed. ``on_error`` sees exceptions raised while
+    streaming the rest; ``on_close`` runs once when the stream is closed.
+    """
+
+    def __init__(
+        self,
+        stream: openai.AsyncStream[ChatCompletionChunk],
+        on_close: Callable[[], None] | None = None,
+        on_error: Callable[[Exception], None] | None = None,
+    ) -> None:
+        self._stream = stream
+        self._iterator = stream.__aiter__()
+        self._buffered: list[ChatCompletionChunk] = []
+        self._on_close = on_close
+        self._on_error = on_error
+
+    async def prefetch(self) -> PrefetchedStream:
+        """Read up to the first token; closes the stream if that fails."""
+        try:
+            async for chunk in self._iterator:
+                self._buffered.append(chunk)
+                if chunk.usage is not None or any(
+                    choice.delta and (choice.delta.content or choice.delta.tool_calls) for choice in chunk.choices
+                ):
+                    break
+        except BaseException:
+            await self.close()
+            raise
+        return self
+
+    async def __aenter__(self) -> PrefetchedStream:
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        await self.close()
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        while self._buffered:
+            yield self._buffered.pop(0)
+        try:
+            async for chunk in self._iterator:
+                yield chunk
+        except Exception as e:
+            if self._on_error is not None:
+                self._on_error(e)
+            raise
+
+    async def close(self) -> None:
+        try:
+            await self._stream.close()
+        finally:
+            if self._on_close is not None:
+                self._on_close, on_close = None, self._on_close
+                on_close()
+
+
+@dataclass
+class OllamaPoolOptions:
+    """Configuration options for OllamaConnectionPool."""
+    max_connections: int = 50  # In-flight requests across every session and event loop
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 120.0
+    http2: bool = False  # Needs the h2 package and a TLS endpoint (e.g. a reverse proxy)
+    ping_interval: float = 30.0  # Seconds between keep-alive pings; 0 disables them
+
+
+class _ConnectionLimiter:
+    """Counting semaphore shared by event loops in different threads."""
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self._lock = threading.Lock()
+        self._waiters: deque[tuple[asyncio.AbstractEventLoop, asyncio.Future]] = deque()
+        self.in_use = 0
+        self.peak = 0
+        self.acquired = 0
+        self.waited = 0
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+
+    async def acquire(self, timeout: float | None) -> None:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self.in_use < self.limit and not self._waiters:
+                self._taken(0.0)
+                return
+            future = loop.create_future()
+            self._waiters.append((loop, future))
+
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout)
+        except (asyncio.CancelledError, asyncio.TimeoutError):
+            with self._lock:
+                if (loop, future) in self._waiters:
+                    self._waiters.remove((loop, future))
+                    future.cancel()
+                    handed_over = False
+                else:
+                    handed_over = True
+            if handed_over:
+                # The slot arrived as we gave up: pass it on
+                future.add_done_callback(lambda _: self.release())
+            raise
+        with self._lock:
+            self.waited += 1
+            self._taken((time.perf_counter() - start) * 1000, handed_over=True)
+
+    def release(self) -> None:
+        with self._lock:
+            # Above a lowered limit, slots are retired instead of handed over
+            if self.in_use <= self.limit and self._wake():
+                return  # The slot moved straight to the waiter; in_use is unchanged
+            self.in_use -= 1
+
+    def set_limit(self, limit: int) -> None:
+        """Change the limit; requests in flight keep their slots."""
+        with self._lock:
+            self.limit = limit
+            while self.in_use < self.limit and self._waiters:
+                self.in_use += 1
+                if not self._wake():
+                    self.in_use -= 1
+
+    def _wake(self) -> bool:
+        """Hand a slot to the oldest waiter whose loop is still running."""
+        while self._waiters:
+            loop, future = self._waiters.popleft()
+            try:
+                loop.call_soon_threadsafe(self._hand_over, future)
+                return True
+            except RuntimeError:
+                continue  # That waiter's loop is closed
+        return False
+
+    def _hand_over(self, future: asyncio.Future) -> None:
+        if future.done():
+            self.release()
+        else:
+            future.set_result(None)
+
+    def _taken(self, wait_ms: float, handed_over: bool = False) -> None:
+        if not handed_over:
+            self.in_use += 1
+        self.acquired += 1
+        self.peak = max(self.peak, self.in_use)
+        self.wait_ms_total += wait_ms
+        self.wait_ms_max = max(self.wait_ms_max, wait_ms)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "limit": self.limit,
+                "in_flight": self.in_use,
+                "peak_in_flight": self.peak,
+                "utilization": round(self.in_use / self.limit, 3),
+                "peak_utilization": round(self.peak / self.limit, 3),
+                "waiting": len(self._waiters),
+                "requests": self.acquired,
+                "waited": self.waited,
+                "avg_wait_ms": round(self.wait_ms_total / (self.acquired or 1), 2),
+                "max_wait_ms": round(self.wait_ms_max, 2),
+            }
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """Response body that frees its connection slot once closed."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, release: Callable[[], None]) -> None:
+        self._stream = stream
+        self._release: Callable[[], None] | None = release
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            if self._release is not None:
+                self._release, release = None, self._release
+                release()
+
+
+class _LimitedTransport(httpx.AsyncBaseTransport):
+    """Holds a process-wide slot for each request until its body is closed."""
+
+    def __init__(self, inner: httpx.AsyncHTTPTransport, limiter: _ConnectionLimiter, pool_timeout: float | None) -> None:
+        self._inner = inner
+        self._limiter = limiter
+        self._pool_timeout = pool_timeout
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        try:
+            await self._limiter.acquire(self._pool_timeout)
+        except asyncio.TimeoutError:
+            raise httpx.PoolTimeout("Timed out waiting for an Ollama connection slot", request=request) from None
+        try:
+            response = await self._inner.handle_async_request(request)
+        except BaseException:
+            self._limiter.release()
+            raise
+        response.stream = _ReleasingStream(response.stream, self._limiter.release)
+        return response
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
+
+
+@dataclass
+class _PooledClient:
+    key: tuple
+    client: openai.AsyncClient
+    http_client: httpx.AsyncClient
+    refcount: int = 0
+    ping_task: asyncio.Task | None = None
+    pings: int = 0
+    ping_failures: int = 0
+
+
+class OllamaConnectionPool:
+    """HTTP clients for Ollama shared by every session in the process.
+
+    There is one client per base URL and event loop, because httpx
+    connections belong to the loop that opened them; with the process job
+    executor that is one per worker process, and with the thread executor
+    one per job thread. ``max_connections`` is enforced across all of
+    them. While a client is in use, a background task requests
+    ``/api/version`` every ``ping_interval`` seconds so a warm connection
+    is ready when the next turn starts. A client is closed once its last
+    session releases it.
+    """
+
+    def __init__(self, options: OllamaPoolOptions | None = None) -> None:
+        self._lock = threading.Lock()
+        self._clients: dict[tuple, _PooledClient] = {}
+        options = options or OllamaPoolOptions()
+        # Clients hold the limiter, so configure() adjusts it rather than replacing it
+        self._limiter = _ConnectionLimiter(options.max_connections)
+        self.configure(options)
+
+    def configure(self, options: OllamaPoolOptions) -> None:
+        """Set the options used by clients created from now on."""
+        if options.http2 and importlib.util.find_spec("h2") is None:
+            logger.warning("OLLAMA_HTTP2 needs the h2 package (pip install 'httpx[http2]'); using HTTP/1.1")
+            options = dataclasses.replace(options, http2=False)
+        with self._lock:
+            self._opts = options
+        self._limiter.set_limit(options.max_connections)
+
+    def acquire(self, base_url: str, api_key: str, timeout: httpx.Timeout) -> _PooledClient:
+        """Return the shared client for base_url on the running loop."""
+        loop = asyncio.get_running_loop()
+        key = (base_url, api_key, id(loop))
+        with self._lock:
+            pooled = self._clients.get(key)
+            if pooled is None:
+                pooled = self._clients[key] = self._create(key, base_url, api_key, timeout)
+                if self._opts.ping_interval > 0:
+                    pooled.ping_task = loop.create_task(self._ping(pooled, base_url))
+            pooled.refcount += 1
+            return pooled
+
+    async def release(self, pooled: _PooledClient) -> None:
+        with self._lock:
+            pooled.refcount -= 1
+            if pooled.refcount > 0:
+                return
+            self._clients.pop(pooled.key, None)
+        if pooled.ping_task is not None:
+            pooled.ping_task.cancel()
+        await pooled.client.close()  # Also closes the httpx client and its connections
+
+    def stats(self) -> dict:
+        with self._lock:
+            clients = list(self._clients.values())
+        return {
+            **self._limiter.stats(),
+            "clients": len(clients),
+            "sessions": sum(pooled.refcount for pooled in clients),
+            "open_connections": sum(_open_connections(pooled.http_client) for pooled in clients),
+            "pings": sum(pooled.pings for pooled in clients),
+            "ping_failures": sum(pooled.ping_failures for pooled in clients),
+        }
+
+    def _create(self, key: tuple, base_url: str, api_key: str, timeout: httpx.Timeout) -> _PooledClient:
+        opts = self._opts
+        limits = httpx.Limits(
+            max_connections=opts.max_connections,
+            max_keepalive_connections=opts.max_keepalive_connections,
+            keepalive_expiry=opts.keepalive_expiry,
+        )
+        transport = _LimitedTransport(
+            httpx.AsyncHTTPTransport(limits=limits, http2=opts.http2),
+            self._limiter,
+            pool_timeout=timeout.pool,
+        )
+        http_client = httpx.AsyncClient(timeout=timeout, follow_redirects=True, transport=transport)
+        client = openai.AsyncClient(api_key=api_key, base_url=base_url, max_retries=0, http_client=http_client)
+        return _PooledClient(key=key, client=client, http_client=http_client)
+
+    async def _ping(self, pooled: _PooledClient, base_url: str) -> None:
+        # Ollama's native API lives beside the OpenAI-compatible /v1 prefix
+        url = base_url.rstrip("/").removesuffix("/v1") + "/api/version"
+        while True:
+            try:
+                response = await pooled.http_client.get(url)
+                await response.aclose()
+                pooled.pings += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                pooled.ping_failures += 1
+                logger.debug(f"Ollama keep-alive ping failed: {e}")
+            await asyncio.sleep(self._opts.ping_interval)
+
+
+def _open_connections(http_client: httpx.AsyncClient) -> int:
+    """Connections held by the client's httpcore pool (0 if not inspectable)."""
+    transport = getattr(http_client, "_transport", None)
+    inner = getattr(transport, "_inner", None)
+    pool = getattr(inner, "_pool", None)
+    return len(getattr(pool, "connections", ()))
+
+
+ollama_pool = OllamaConnectionPool()
+
+
+@dataclass
+class PromptCacheOptions:
+    """Keep a static prompt prefix resident in Ollama's KV cache.
+
+    ``cache_key`` names the prefix (system prompt and tools) shared by
+    sessions; a change of its fingerprint means every following request
+    prefills it again, so it is logged. ``num_ctx`` must match across all
+    requests to a model, or Ollama reloads the runner and drops its cache.
+    """
+    cache_key: str
+    keep_alive: str = "30m"  # How long Ollama keeps the model (and cache) loaded when idle
+    num_ctx: int | None = None  # Context window; None keeps the server default
+
+
+# Last prefix fingerprint per cache key, shared by every session in the process
+_prefix_lock = threading.Lock()
+_prefix_fingerprints: dict[str, bytes] = {}
+_warmed_prefixes: set[tuple] = set()
+
+
+def prefix_fingerprint(messages: list, tools_json: bytes | None) -> bytes:
+    """Digest of the leading system messages and the tools, as sent."""
+    digest = hashlib.blake2b(digest_size=16)
+    for message in messages:
+        if message.get("role") not in ("system", "developer"):
+            break
+        digest.update(json.dumps(message, ensure_ascii=False).encode())
+    digest.update(tools_json or b"")
+    return digest.digest()
 
 
 class OllamaLLM(llm.LLM):
@@ -42,6 +472,11 @@ class OllamaLLM(llm.LLM):
         model: str = "qwen2.5:7b",
         temperature: float = 0.4,
         top_p: float = 0.9,
+        pool: OllamaConnectionPool | None = None,
+        prompt_cache: PromptCacheOptions | None = None,
+        hedger: RequestHedger | None = None,
+        response_cache: ResponseCache | None = None,
+        history: HistoryOptions | None = None,
     ) -> None:
         """Initialize Ollama LLM.
         
@@ -51,6 +486,11 @@ class OllamaLLM(llm.LLM):
             model: Model name (e.g., qwen2.5:7b, llama3:8b)
             temperature: Sampling temperature
             top_p: Top-p sampling parameter
+            pool: Connection pool to share; defaults to the process-wide one
+            prompt_cache: Keeps the model and its prompt prefix cache resident
+            hedger: Races a second request when the first token is late
+            response_cache: Replays earlier answers to the same question
+            history: Keeps the chat history within a token budget, summarizing older turns
         """
         super().__init__()
         
@@ -58,28 +498,143 @@ class OllamaLLM(llm.LLM):
         self._temperature = temperature
         self._top_p = top_p
         
-        # Create OpenAI-compatible client pointing to Ollama
-        timeout = httpx.Timeout(
+        # Shared OpenAI-compatible client pointing to Ollama
+        self._base_url = base_url
+        self._api_key = api_key
+        self._timeout = httpx.Timeout(
             connect=15.0,
             read=60.0,  # Longer read timeout for local LLM
             write=5.0,
             pool=5.0
         )
-        
-        self._client = openai.AsyncClient(
-            api_key=api_key,
-            base_url=base_url,
-            max_retries=0,
-            http_client=httpx.AsyncClient(
-                timeout=timeout,
-                follow_redirects=True,
-                limits=httpx.Limits(
-                    max_connections=50,
-                    max_keepalive_connections=50,
-                    keepalive_expiry=120,
-                ),
-            ),
+        self._pool = pool or ollama_pool
+        self._pooled: _PooledClient | None = None
+
+        self._hedger = hedger
+        self._response_cache = response_cache
+        self._prompt_cache = prompt_cache
+        self._history = HistoryManager(self._complete, history) if history is not None else None
+        self._requests = 0
+        self._prompt_tokens = 0
+        self._cached_tokens = 0
+        self._prefix_changes = 0
+
+    @property
+    def _client(self) -> openai.AsyncClient:
+        # Acquired lazily: the pool hands out clients per running event loop
+        if self._pooled is None:
+            self._pooled = self._pool.acquire(self._base_url, self._api_key, self._timeout)
+        return self._pooled.client
+
+    @property
+    def history(self) -> HistoryManager | None:
+        return self._history
+
+    async def aclose(self) -> None:
+        """Return this session's reference to the shared client."""
+        drop_chat_cache(id(self))
+        if self._history is not None:
+            await self._history.aclose()
+        if self._pooled is not None:
+            pooled, self._pooled = self._pooled, None
+            await self._pool.release(pooled)
+
+    def prompt_cache_stats(self) -> dict:
+        """Prompt tokens the server reported as served from its cache."""
+        return {
+            "requests": self._requests,
+            "prompt_tokens": self._prompt_tokens,
+            "cached_tokens": self._cached_tokens,
+            "hit_rate": round(self._cached_tokens / (self._prompt_tokens or 1), 3),
+            "prefix_changes": self._prefix_changes,
+        }
+
+    async def warm_up(self, instructions: str, tools: list[FunctionTool] | None = None) -> None:
+        """Load the model and prefill the static prefix before the first turn.
+
+        Goes through the same endpoint and encoding as real turns, so the
+        prefilled tokens are exactly the ones later requests start with.
+        Done once per prefix and process.
+        """
+        if self._prompt_cache is None:
+            return
+        await self._warm_up(self._base_url, self._client, instructions, tools)
+
+    async def _warm_up(
+        self, base_url: str, client: openai.AsyncClient, instructions: str, tools: list[FunctionTool] | None
+    ) -> None:
+        messages = [{"role": "system", "content": instructions}]
+        tools_json = to_fnc_payload(tools) if tools else None
+        key = (base_url, self._model, prefix_fingerprint(messages, tools_json))
+        with _prefix_lock:
+            if key in _warmed_prefixes:
+                return
+            _warmed_prefixes.add(key)
+
+        start = time.perf_counter()
+        try:
+            body = encode_chat_request(
+                model=self._model,
+                messages=messages,
+                tools_json=tools_json,
+                extra_kwargs={**self._cache_extras(), "max_tokens": 1},
+            )
+            async with await post_chat_request(client, body) as stream:
+                async for _ in stream:
+                    pass
+            logger.info(f"Ollama prompt prefix on {base_url} warmed in {(time.perf_counter() - start) * 1000:.0f} ms")
+        except Exception as e:
+            with _prefix_lock:
+                _warmed_prefixes.discard(key)
+            logger.warning(f"Ollama warm-up failed: {e}")
+
+    async def _complete(self, messages: list, max_tokens: int) -> str:
+        """Text of a short completion outside the conversation, e.g. a history summary."""
+        return await self._complete_with(self._client, messages, max_tokens)
+
+    async def _complete_with(self, client: openai.AsyncClient, messages: list, max_tokens: int) -> str:
+        body = encode_chat_request(
+            model=self._model,
+            messages=messages,
+            tools_json=None,
+            extra_kwargs={**self._cache_extras(), "max_tokens": max_tokens, "temperature": 0.2},
         )
+        parts = []
+        async with await post_chat_request(client, body) as stream:
+            async for chunk in stream:
+                for choice in chunk.choices:
+                    if choice.delta and choice.delta.content:
+                        parts.append(choice.delta.content)
+        return "".join(parts)
+
+    def _cache_extras(self) -> dict[str, Any]:
+        if self._prompt_cache is None:
+            return {}
+        # Ollama-specific fields, sent alongside the OpenAI-compatible ones
+        extras: dict[str, Any] = {"keep_alive": self._prompt_cache.keep_alive}
+        if self._prompt_cache.num_ctx is not None:
+            extras["options"] = {"num_ctx": self._prompt_cache.num_ctx}
+        return extras
+
+    def _check_prefix(self, messages: list, tools_json: bytes | None) -> None:
+        if self._prompt_cache is None:
+            return
+        fingerprint = prefix_fingerprint(messages, tools_json)
+        cache_key = self._prompt_cache.cache_key
+        with _prefix_lock:
+            previous = _prefix_fingerprints.get(cache_key)
+            _prefix_fingerprints[cache_key] = fingerprint
+        if previous is not None and previous != fingerprint:
+            self._prefix_changes += 1
+            logger.warning(
+                f"Prompt prefix for cache key {cache_key!r} changed; "
+                "Ollama will prefill it again instead of reusing its cache"
+            )
+
+    def _record_usage(self, prompt_tokens: int, cached_tokens: int) -> None:
+        self._requests += 1
+        self._prompt_tokens += prompt_tokens
+        self._cached_tokens += cached_tokens
 
     def chat(
         self,
@@ -93,7 +648,7 @@ class OllamaLLM(llm.LLM):
             completion_create_params.ResponseFormat | type[llm_utils.ResponseFormatT]
         ] = NOT_GIVEN,
         extra_kwargs: NotGivenOr[dict[str, Any]] = NOT_GIVEN,
-    ) -> OllamaLLMStream:
+    ) -> llm.LLMStream:
         """Create a chat stream.
         
         Args:
@@ -115,6 +670,7 @@ class OllamaLLM(llm.LLM):
         # Set default parameters
         extra["temperature"] = self._temperature
         extra["top_p"] = self._top_p
+        extra.update(self._cache_extras())
 
         if is_given(parallel_tool_calls):
             extra["parallel_tool_calls"] = parallel_tool_calls
@@ -134,14 +690,40 @@ class OllamaLLM(llm.LLM):
         if is_given(response_format):
             extra["response_format"] = llm_utils.to_openai_response_format(response_format)
 
+        cache_key = None
+        if self._response_cache is not None:
+            cache_key = self._response_cache.key(chat_ctx, tools or [], extra)
+            cached = self._response_cache.get(cache_key) if cache_key is not None else None
+            if cached is not None:
+                return CachedResponseStream(
+                    self, chat_ctx=chat_ctx, tools=tools or [], conn_options=conn_options, response=cached
+                )
+
+        stream = self._create_stream(
+            chat_ctx=chat_ctx,
+            tools=tools or [],
+            conn_options=conn_options,
+            extra_kwargs=extra,
+        )
+        stream._response_cache_key = cache_key
+        return stream
+
+    def _create_stream(
+        self,
+        *,
+        chat_ctx: ChatContext,
+        tools: list[FunctionTool],
+        conn_options: APIConnectOptions,
+        extra_kwargs: dict[str, Any],
+    ) -> OllamaLLMStream:
         return OllamaLLMStream(
             self,
             model=self._model,
             client=self._client,
             chat_ctx=chat_ctx,
-            tools=tools or [],
+            tools=tools,
             conn_options=conn_options,
-            extra_kwargs=extra,
+            extra_kwargs=extra_kwargs,
         )
 
 
@@ -153,7 +735,7 @@ class OllamaLLMStream(llm.LLMStream):
         llm: OllamaLLM,
         *,
         model: str,
-        client: openai.AsyncClient,
+        client: openai.AsyncClient | None,
         chat_ctx: llm.ChatContext,
         tools: list[FunctionTool],
         conn_options: APIConnectOptions,
@@ -164,25 +746,31 @@ class OllamaLLMStream(llm.LLMStream):
         self._client = client
         self._llm = llm
         self._extra_kwargs = extra_kwargs
+        self._response_cache_key: bytes | None = None  # Set to store the completed response
 
     async def _run(self) -> None:
         """Run the LLM stream."""
-        self._oai_stream: openai.AsyncStream[ChatCompletionChunk] | None = None
-        self._tool_call_id: str | None = None
-        self._fnc_name: str | None = None
-        self._fnc_raw_arguments: str | None = None
-        self._tool_index: int | None = None
+        self._oai_stream: PrefetchedStream | None = None
+        self._tool_calls = ToolCallAccumulator()
         retryable = True
+        start = time.perf_counter()
+        deltas: list[llm.ChoiceDelta] = []
 
         try:
-            self._oai_stream = stream = await self._client.chat.completions.create(
-                messages=to_chat_ctx(self._chat_ctx, id(self._llm)),
-                tools=to_fnc_ctx(self._tools) if self._tools else openai.NOT_GIVEN,
-                model=self._model,
-                stream_options={"include_usage": True},
-                stream=True,
-                **self._extra_kwargs,
-            )
+            with stage("llm.to_chat_ctx", items=len(self._chat_ctx.items)):
+                messages = to_chat_ctx(self._chat_ctx, id(self._llm))
+                tools_json = to_fnc_payload(self._tools) if self._tools else None
+                self._llm._check_prefix(messages, tools_json)
+                estimate = 0
+                if self._llm._history is not None:
+                    messages, estimate = self._llm._history.compact(messages, tools_json)
+                body = encode_chat_request(
+                    model=self._model,
+                    messages=messages,
+                    tools_json=tools_json,
+                    extra_kwargs=self._extra_kwargs,
+                )
+            self._oai_stream = stream = await self._post(body)
 
             async with stream:
                 async for chunk in stream:
@@ -191,11 +779,16 @@ class OllamaLLMStream(llm.LLMStream):
                         if chat_chunk is not None:
                             retryable = False
                             self._event_ch.send_nowait(chat_chunk)
+                            if chat_chunk.delta is not None:
+                                deltas.append(chat_chunk.delta)
 
                     if chunk.usage is not None:
                         retryable = False
                         tokens_details = chunk.usage.prompt_tokens_details
                         cached_tokens = tokens_details.cached_tokens if tokens_details else 0
+                        self._llm._record_usage(chunk.usage.prompt_tokens, cached_tokens or 0)
+                        if self._llm._history is not None:
+                            self._llm._history.observe(estimate, chunk.usage.prompt_tokens)
                         chunk = llm.ChatChunk(
                             id=chunk.id,
                             usage=llm.CompletionUsage(
@@ -207,6 +800,18 @@ class OllamaLLMStream(llm.LLMStream):
                         )
                         self._event_ch.send_nowait(chunk)
 
+            # A server that ends the stream without a finish reason still gets its last calls run
+            remaining = self._tool_calls.flush()
+            if remaining:
+                delta = llm.ChoiceDelta(role="assistant", tool_calls=remaining)
+                self._event_ch.send_nowait(llm.ChatChunk(id=chunk.id, delta=delta))
+                deltas.append(delta)
+
+            if self._response_cache_key is not None and self._llm._response_cache is not None:
+                self._llm._response_cache.put(self._response_cache_key, deltas, time.perf_counter() - start)
+            if self._llm._history is not None:
+                self._llm._history.after_reply()
+
         except openai.APITimeoutError:
             raise APITimeoutError(retryable=retryable) from None
         except openai.APIStatusError as e:
@@ -220,60 +825,33 @@ class OllamaLLMStream(llm.LLMStream):
         except Exception as e:
             raise APIConnectionError(retryable=retryable) from e
 
-    def _parse_choice(self, id: str, choice: Choice) -> llm.ChatChunk | None:
-        """Parse a choice from the stream."""
-        delta = choice.delta
+    async def _post(self, body: bytes) -> PrefetchedStream:
+        if self._llm._hedger is not None:
+            return await self._llm._hedger.run(lambda: self._open(body))
+        return await self._open(body)
 
-        if delta is None:
-            return None
+    async def _open(self, body: bytes) -> PrefetchedStream:
+        """Send the request and wait for its first token; subclasses choose where it goes."""
+        return await PrefetchedStream(await post_chat_request(self._client, body)).prefetch()
 
-        if delta.tool_calls:
-            for tool in delta.tool_calls:
-                if not tool.function:
-                    continue
-
-                call_chunk = None
-                if self._tool_call_id and tool.id and tool.index != self._tool_index:
-                    call_chunk = llm.ChatChunk(
-                        id=id,
-                        delta=llm.ChoiceDelta(
-                            role="assistant",
-                            content=delta.content,
-                            tool_calls=[
-                                llm.FunctionToolCall(
-                                    arguments=self._fnc_raw_arguments or "",
-                                    name=self._fnc_name or "",
-                                    call_id=self._tool_call_id or "",
-                                )
-                            ],
-                        ),
-                    )
-                    self._tool_call_id = self._fnc_name = self._fnc_raw_arguments = None
-                    self._tool_index = None
-                    return call_chunk
-
-                if tool.id and not self._tool_call_id:
-                    self._tool_call_id = tool.id
-                    self._tool_index = tool.index
-
-                if tool.function.name and not self._fnc_name:
-                    self._fnc_name = tool.function.name
-
-                if tool.function.arguments:
-                    current = self._fnc_raw_arguments or ""
-                    self._fnc_raw_arguments = current + tool.function.arguments
-
-                return None
+    def _parse_choice(self, id: str, choice: Choice) -> llm.ChatChunk | None:
+        """Parse a choice from the stream.
 
-            return None
+        Tool calls are passed on as soon as their arguments are complete,
+        so the framework starts them while the rest of the reply streams;
+        the ones still open go out with the finish reason.
+        """
+        delta = choice.delta
+        tool_calls = []
+        if delta is not None and delta.tool_calls:
+            tool_calls = self._tool_calls.add(delta.tool_calls)
+        if choice.finish_reason is not None:
+            tool_calls.extend(self._tool_calls.flush())
 
-        if delta.content == "":
+        content = delta.content if delta is not None else None
+        if not tool_calls and not content:
             return None
-
         return llm.ChatChunk(
             id=id,
-            delta=llm.ChoiceDelta(
-                role="assistant",
-                content=delta.content,
-            ),
+            delta=llm.ChoiceDelta(role="assistant", content=content, tool_calls=tool_calls),
         )
@@ -0,0 +1,162 @@
+"""Navigation commands to the website widget over the LiveKit data channel."""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from livekit import rtc
+
+from .tracing import stage
+
+logger = logging.getLogger(__name__)
+
+# Targets the website knows; their payloads are encoded once
+SECTION_IDS = ("home", "about", "agents", "features", "plans", "demo", "contact")
+PAGE_PATHS = ("/", "/use-cases")
+# Other targets the LLM comes up with are encoded on first use, up to this many
+MAX_ENCODED_PAYLOADS = 256
+LATENCY_WINDOW = 500
+
+
+@dataclass
+class NavigationOptions:
+    """Configuration options for NavigationBus."""
+    topic: str = "navigation"
+    lossy_scroll: bool = False  # Scrolls over the unreliable channel: lower latency, and a lost one is superseded
+
+
+@dataclass
+class _Pending:
+    command: dict
+    payload: bytes
+    queued_at: float
+    done: asyncio.Future
+
+
+class NavigationBus:
+    """Sends a room's navigation commands in order, one publish at a time.
+
+    ``send()`` queues a command and returns at once, so a tool can answer
+    the LLM without waiting for the data channel. While a publish is in
+    flight, later commands wait and are coalesced: a scroll replaces any
+    scroll still waiting, and a navigation drops the waiting scrolls,
+    since they belonged to the page being left. Navigations are never
+    dropped. Payloads of the known sections and pages are encoded once.
+    """
+
+    def __init__(self, room: rtc.Room, options: NavigationOptions | None = None) -> None:
+        self._room = room
+        self._opts = options or NavigationOptions()
+        self._payloads: dict[tuple[str, str], bytes] = {}
+        for section_id in SECTION_IDS:
+            self._encode("scroll", section_id)
+        for page_path in PAGE_PATHS:
+            self._encode("navigate", page_path)
+        self._pending: deque[_Pending] = deque()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+        self.sent = 0
+        self.coalesced = 0
+        self.failed = 0
+        self._queue_ms: deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._publish_ms: deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    def send(self, command: dict) -> asyncio.Future:
+        """Queue a ``{"type": "scroll" | "navigate", "target": ...}`` command.
+
+        The returned future resolves to True once the command is published,
+        to False if a later command superseded it, and to the exception if
+        publishing failed. Awaiting it is optional.
+        """
+        done = asyncio.get_running_loop().create_future()
+        if self._closed:
+            done.set_result(False)
+            return done
+        kind, target = command["type"], command["target"]
+        # Either way the scrolls still waiting no longer matter
+        self._drop_waiting(lambda pending: pending.command["type"] == "scroll")
+        self._pending.append(_Pending(command, self._encode(kind, target), time.perf_counter(), done))
+        self._wakeup.set()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        return done
+
+    async def publish(self, command: dict) -> None:
+        """Send a command and wait until it is out; raises if publishing failed."""
+        await self.send(command)
+
+    async def aclose(self) -> None:
+        self._closed = True
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._drop_waiting(lambda pending: True)
+
+    def stats(self) -> dict:
+        queue_ms, publish_ms = list(self._queue_ms), list(self._publish_ms)
+        stats = {"sent": self.sent, "coalesced": self.coalesced, "failed": self.failed}
+        if publish_ms:
+            stats.update(
+                queue_ms_p50=round(float(np.percentile(queue_ms, 50)), 2),
+                publish_ms_p50=round(float(np.percentile(publish_ms, 50)), 2),
+                publish_ms_p95=round(float(np.percentile(publish_ms, 95)), 2),
+            )
+        return stats
+
+    def _encode(self, kind: str, target: str) -> bytes:
+        payload = self._payloads.get((kind, target))
+        if payload is None:
+            payload = json.dumps({"type": kind, "target": target}).encode("utf-8")
+            if len(self._payloads) < MAX_ENCODED_PAYLOADS:
+                self._payloads[(kind, target)] = payload
+        return payload
+
+    def _drop_waiting(self, superseded) -> None:
+        kept = deque()
+        for pending in self._pending:
+            if superseded(pending):
+                self.coalesced += 1
+                if not pending.done.done():
+                    pending.done.set_result(False)
+            else:
+                kept.append(pending)
+        self._pending = kept
+
+    async def _run(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            while self._pending:
+                pending = self._pending.popleft()
+                await self._publish(pending)
+
+    async def _publish(self, pending: _Pending) -> None:
+        command = pending.command
+        reliable = not (self._opts.lossy_scroll and command["type"] == "scroll")
+        start = time.perf_counter()
+        self._queue_ms.append((start - pending.queued_at) * 1000)
+        with stage("navigation.publish", type=command["type"], target=command["target"], reliable=reliable):
+            try:
+                await self._room.local_participant.publish_data(
+                    pending.payload, topic=self._opts.topic, reliable=reliable
+                )
+            except Exception as e:
+                self.failed += 1
+                logger.warning(f"Navigation command {command} failed: {e}")
+                if not pending.done.done():
+                    pending.done.set_exception(e)
+                    pending.done.exception()  # Retrieved here, so an unawaited future doesn't warn
+                return
+        self._publish_ms.append((time.perf_counter() - start) * 1000)
+        self.sent += 1
+        logger.info(f"Navigation command sent via data channel: {command}")
+        if not pending.done.done():
+            pending.done.set_result(True)
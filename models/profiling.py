@@ -0,0 +1,147 @@
+"""Low-overhead latency histograms for hot paths, with a JSON stats endpoint."""
+import json
+import logging
+import math
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+logger = logging.getLogger(__name__)
+
+# Log-linear buckets, as in HDR histograms: 16 sub-buckets per power of two
+# keep every recorded value within ~3% of its bucket's midpoint
+_SUB_BUCKETS = 16
+_MIN_EXPONENT = -9  # 2**-10 ms ~ 1 µs
+_MAX_EXPONENT = 18  # 2**18 ms ~ 4.4 min
+_NUM_BUCKETS = (_MAX_EXPONENT - _MIN_EXPONENT + 1) * _SUB_BUCKETS
+
+
+def _bucket_index(ms: float) -> int:
+    if ms <= 0:
+        return 0
+    mantissa, exponent = math.frexp(ms)  # ms = mantissa * 2**exponent, mantissa in [0.5, 1)
+    if exponent < _MIN_EXPONENT:
+        return 0
+    if exponent > _MAX_EXPONENT:
+        return _NUM_BUCKETS - 1
+    return (exponent - _MIN_EXPONENT) * _SUB_BUCKETS + int((mantissa - 0.5) * 2 * _SUB_BUCKETS)
+
+
+def _bucket_value(index: int) -> float:
+    """Midpoint of a bucket, in milliseconds."""
+    exponent, sub = divmod(index, _SUB_BUCKETS)
+    return math.ldexp(0.5 + (sub + 0.5) / (2 * _SUB_BUCKETS), exponent + _MIN_EXPONENT)
+
+
+class LatencyHistogram:
+    """Fixed-size latency histogram in milliseconds.
+
+    Recording is one index computation and a list increment, without a
+    lock: concurrent writers can, rarely, lose a count, which is an
+    acceptable trade for keeping the hot path cheap.
+    """
+
+    __slots__ = ("_counts", "_count", "_total", "_max")
+
+    def __init__(self) -> None:
+        self._counts = [0] * _NUM_BUCKETS
+        self._count = 0
+        self._total = 0.0
+        self._max = 0.0
+
+    def record(self, ms: float) -> None:
+        self._counts[_bucket_index(ms)] += 1
+        self._count += 1
+        self._total += ms
+        if ms > self._max:
+            self._max = ms
+
+    def percentile(self, q: float) -> float:
+        """Approximate q-th percentile (0-100) in milliseconds."""
+        if not self._count:
+            return 0.0
+        rank = max(1, math.ceil(self._count * q / 100))
+        seen = 0
+        for index, count in enumerate(self._counts):
+            seen += count
+            if seen >= rank:
+                return min(_bucket_value(index), self._max)
+        return self._max
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self._count,
+            "mean_ms": round(self._total / self._count, 3) if self._count else 0.0,
+            "p50_ms": round(self.percentile(50), 3),
+            "p90_ms": round(self.percentile(90), 3),
+            "p99_ms": round(self.percentile(99), 3),
+            "max_ms": round(self._max, 3),
+        }
+
+
+class Profiler:
+    """Histograms keyed by label; records nothing until enabled."""
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self._histograms: dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def record(self, label: str, ms: float) -> None:
+        histogram = self._histograms.get(label)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(label, LatencyHistogram())
+        histogram.record(ms)
+
+    def stats(self) -> dict:
+        # record() may add a label from a job thread while the server thread reads
+        with self._lock:
+            items = sorted(self._histograms.items())
+        return {label: histogram.snapshot() for label, histogram in items}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms = {}
+
+    def serve(self, host: str, port: int) -> None:
+        """Serve ``GET /stats`` (``?reset=1`` to clear) from a daemon thread, once per process."""
+        with self._lock:
+            if self._server is not None:
+                return
+            try:
+                self._server = ThreadingHTTPServer((host, port), _make_handler(self))
+            except OSError as e:
+                # With the process job executor, the first job process owns the port
+                logger.info(f"Stats endpoint not started on {host}:{port}: {e}")
+                return
+        threading.Thread(target=self._server.serve_forever, name="stats-http", daemon=True).start()
+        logger.info(f"Serving latency stats on http://{host}:{port}/stats")
+
+
+def _make_handler(profiler: Profiler) -> type:
+    class _StatsHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            url = urlparse(self.path)
+            if url.path != "/stats":
+                self.send_error(404)
+                return
+            body = json.dumps({"timestamp": time.time(), "histograms": profiler.stats()}).encode()
+            if parse_qs(url.query).get("reset") == ["1"]:
+                profiler.reset()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args) -> None:
+            pass  # Keep scrapes out of the agent log
+
+    return _StatsHandler
+
+
+profiler = Profiler()
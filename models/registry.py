@@ -0,0 +1,160 @@
+"""Process-wide registry of loaded Faster Whisper models."""
+import logging
+import os
+import resource
+import threading
+import time
+from dataclasses import dataclass
+from typing import NamedTuple, Optional
+
+from faster_whisper import WhisperModel
+
+logger = logging.getLogger(__name__)
+
+
+class ModelKey(NamedTuple):
+    """Identity of a loaded model, as requested by the caller."""
+    model: str
+    device: str
+    compute_type: str
+    model_cache_directory: Optional[str]
+
+
+@dataclass
+class ModelEntry:
+    """A loaded model shared by every session in the process."""
+    key: ModelKey
+    model: WhisperModel
+    device: str  # Actual device, may differ from key.device after CPU fallback
+    compute_type: str
+    load_time_ms: float
+    rss_delta_bytes: int
+    refcount: int = 0
+
+
+def current_rss_bytes() -> int:
+    """Return the resident set size of this process in bytes."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # Not Linux: peak RSS is the best we can get without psutil
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class WhisperModelRegistry:
+    """Loads each Whisper model once and hands out reference-counted entries.
+
+    Entries are keyed by (model, device, compute_type, cache directory). The
+    model is unloaded when the last reference is released, so holding one
+    reference from ``prewarm`` keeps it resident for the life of the worker.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: dict[ModelKey, ModelEntry] = {}
+
+    def acquire(
+        self,
+        model: str,
+        device: str,
+        compute_type: str,
+        model_cache_directory: Optional[str] = None,
+        num_workers: int = 1,
+    ) -> ModelEntry:
+        """Return the shared entry for these options, loading it if needed.
+
+        ``num_workers`` only applies to the first load; it should match the
+        number of threads that will call the model concurrently.
+        """
+        key = ModelKey(model, device, compute_type, model_cache_directory)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._load(key, num_workers)
+                self._entries[key] = entry
+            else:
+                logger.debug(f"Reusing Whisper model {key.model} ({entry.device}/{entry.compute_type})")
+            entry.refcount += 1
+            return entry
+
+    def release(self, entry: ModelEntry) -> None:
+        """Drop one reference, unloading the model when none remain."""
+        with self._lock:
+            entry.refcount -= 1
+            if entry.refcount > 0:
+                return
+            if self._entries.get(entry.key) is entry:
+                del self._entries[entry.key]
+            logger.info(f"Unloaded Whisper model {entry.key.model} ({entry.device}/{entry.compute_type})")
+
+    def stats(self) -> list[dict]:
+        """Return load time, memory and reference count for each loaded model."""
+        with self._lock:
+            return [
+                {
+                    "model": entry.key.model,
+                    "device": entry.device,
+                    "compute_type": entry.compute_type,
+                    "refcount": entry.refcount,
+                    "load_time_ms": round(entry.load_time_ms, 1),
+                    "rss_delta_mb": round(entry.rss_delta_bytes / 2**20, 1),
+                }
+                for entry in self._entries.values()
+            ]
+
+    def _load(self, key: ModelKey, num_workers: int) -> ModelEntry:
+        """Load a model, falling back to CPU if CUDA is unavailable."""
+        device = key.device
+        compute_type = key.compute_type
+
+        logger.info(f"Loading Whisper model: {key.model} on {device} with {compute_type}")
+
+        # Ensure cache directory exists
+        if key.model_cache_directory:
+            os.makedirs(key.model_cache_directory, exist_ok=True)
+            logger.info(f"Using model cache directory: {key.model_cache_directory}")
+
+        rss_before = current_rss_bytes()
+        start_time = time.perf_counter()
+        try:
+            model = WhisperModel(
+                model_size_or_path=key.model,
+                device=device,
+                compute_type=compute_type,
+                download_root=key.model_cache_directory,
+                num_workers=num_workers,
+            )
+        except Exception as e:
+            logger.error(f"❌ Failed to load Whisper model: {e}")
+            if device != "cuda":
+                raise
+            # Fallback to CPU if CUDA fails
+            logger.warning("Falling back to CPU...")
+            device = "cpu"
+            compute_type = "int8"
+            model = WhisperModel(
+                model_size_or_path=key.model,
+                device=device,
+                compute_type=compute_type,
+                download_root=key.model_cache_directory,
+                num_workers=num_workers,
+            )
+
+        entry = ModelEntry(
+            key=key,
+            model=model,
+            device=device,
+            compute_type=compute_type,
+            load_time_ms=(time.perf_counter() - start_time) * 1000,
+            rss_delta_bytes=max(current_rss_bytes() - rss_before, 0),
+        )
+        logger.info(
+            f"✅ Whisper model loaded successfully: {key.model} on {device} "
+            f"in {entry.load_time_ms:.0f} ms (+{entry.rss_delta_bytes / 2**20:.1f} MB RSS)"
+        )
+        return entry
+
+
+# Shared by every WhisperSTT in the worker process
+whisper_registry = WhisperModelRegistry()
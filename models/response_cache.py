@@ -0,0 +1,213 @@
+"""Cache of whole LLM responses for questions callers ask again and again."""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import secrets
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from livekit.agents import llm
+from livekit.agents.llm.chat_context import ChatContext
+from livekit.agents.llm.tool_context import FunctionTool
+from livekit.agents.types import APIConnectOptions
+
+from .utils import to_fnc_payload
+
+logger = logging.getLogger(__name__)
+
+# Arabic code points that Whisper sometimes emits for their Urdu look-alikes
+_URDU_LETTERS = str.maketrans({"ي": "ی", "ى": "ی", "ك": "ک", "ه": "ہ", "ۀ": "ہ", "ة": "ہ"})
+
+
+def normalize_transcript(text: str) -> str:
+    """Reduce a transcript to what decides the answer.
+
+    Case, punctuation (including Urdu ۔ ، ؟), diacritics, the tatweel and
+    Arabic letter variants are dropped or unified, and whitespace collapsed.
+    """
+    text = unicodedata.normalize("NFKC", text).translate(_URDU_LETTERS).lower()
+    kept = []
+    for c in text:
+        category = unicodedata.category(c)
+        if category.startswith("P"):
+            kept.append(" ")
+        elif category != "Mn" and c != "ـ":
+            kept.append(c)
+    return " ".join("".join(kept).split())
+
+
+@dataclass
+class ResponseCacheOptions:
+    """Configuration options for ResponseCache."""
+    ttl: float = 3600.0  # Seconds a response is replayed before it is generated again
+    max_entries: int = 1024
+    prompt_version: str = ""  # Bump to drop every response cached for an earlier prompt
+
+
+@dataclass
+class CachedResponse:
+    """Deltas of a completed generation, replayable as a chunk stream."""
+    deltas: list[llm.ChoiceDelta]
+    duration: float  # Seconds the original generation took
+    created_at: float
+    hits: int = 0
+
+
+class ResponseCache:
+    """Completed LLM responses keyed by the question and where it was asked.
+
+    The key is the normalized text of the last user message, the previous
+    assistant reply, the tool calls and outputs since the user spoke, the
+    system prompt, the tools and the request options, so a replay is only
+    used where the same answer would make sense. ``key_fn`` replaces the
+    text normalization, e.g. with a nearest neighbour lookup over local
+    embeddings. Shared by every session in the process.
+    """
+
+    def __init__(
+        self,
+        options: ResponseCacheOptions | None = None,
+        key_fn: Callable[[str], str] = normalize_transcript,
+    ) -> None:
+        self._opts = options or ResponseCacheOptions()
+        self._key_fn = key_fn
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[bytes, CachedResponse] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+        self.saved_total = 0.0
+
+    def configure(self, options: ResponseCacheOptions) -> None:
+        """Set new options; responses cached under another prompt version are dropped."""
+        with self._lock:
+            if options.prompt_version != self._opts.prompt_version:
+                self._entries.clear()
+            self._opts = options
+
+    def key(self, chat_ctx: ChatContext, tools: list[FunctionTool], extra_kwargs: dict[str, Any]) -> bytes | None:
+        """Cache key of a request, or None if it has no user question to key on."""
+        items = chat_ctx.items
+        last_user = next(
+            (i for i in range(len(items) - 1, -1, -1) if items[i].type == "message" and items[i].role == "user"),
+            None,
+        )
+        if last_user is None:
+            return None
+        question = self._key_fn(items[last_user].text_content or "")
+        if not question:
+            return None
+
+        previous_reply = next(
+            (
+                item.text_content or ""
+                for item in reversed(items[:last_user])
+                if item.type == "message" and item.role == "assistant"
+            ),
+            "",
+        )
+        # Call ids differ between a replay and the original, so they are left out
+        tail = [
+            [item.name, item.arguments] if item.type == "function_call" else [item.name, item.output]
+            for item in items[last_user + 1:]
+            if item.type in ("function_call", "function_call_output")
+        ]
+        system = [
+            item.text_content or ""
+            for item in items
+            if item.type == "message" and item.role in ("system", "developer")
+        ]
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(
+            json.dumps(
+                [self._opts.prompt_version, question, normalize_transcript(previous_reply), tail, system, extra_kwargs],
+                ensure_ascii=False,
+                sort_keys=True,
+                default=str,
+            ).encode()
+        )
+        digest.update(to_fnc_payload(tools) if tools else b"")
+        return digest.digest()
+
+    def get(self, key: bytes) -> CachedResponse | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry.created_at > self._opts.ttl:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            entry.hits += 1
+            self.hits += 1
+            self.saved_total += entry.duration
+            return entry
+
+    def put(self, key: bytes, deltas: list[llm.ChoiceDelta], duration: float) -> None:
+        if not any(delta.content or delta.tool_calls for delta in deltas):
+            return
+        with self._lock:
+            self._entries[key] = CachedResponse(deltas=deltas, duration=duration, created_at=time.time())
+            self._entries.move_to_end(key)
+            self.stored += 1
+            while len(self._entries) > self._opts.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / ((self.hits + self.misses) or 1), 3),
+                "stored": self.stored,
+                "saved_ms_total": round(self.saved_total * 1000, 1),
+            }
+
+
+class CachedResponseStream(llm.LLMStream):
+    """Replays a cached response as if the model were generating it."""
+
+    def __init__(
+        self,
+        llm: llm.LLM,
+        *,
+        chat_ctx: ChatContext,
+        tools: list[FunctionTool],
+        conn_options: APIConnectOptions,
+        response: CachedResponse,
+    ) -> None:
+        super().__init__(llm, chat_ctx=chat_ctx, tools=tools, conn_options=conn_options)
+        self._response = response
+
+    async def _run(self) -> None:
+        chunk_id = f"cached-{secrets.token_hex(6)}"
+        for delta in self._response.deltas:
+            self._event_ch.send_nowait(
+                llm.ChatChunk(
+                    id=chunk_id,
+                    delta=llm.ChoiceDelta(
+                        role=delta.role,
+                        content=delta.content,
+                        # Fresh ids, so the replayed calls don't collide with the original's
+                        tool_calls=[
+                            llm.FunctionToolCall(
+                                name=call.name,
+                                arguments=call.arguments,
+                                call_id=f"call_{secrets.token_hex(8)}",
+                            )
+                            for call in delta.tool_calls
+                        ],
+                    ),
+                )
+            )
+
+
+response_cache = ResponseCache()
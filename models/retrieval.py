@@ -0,0 +1,164 @@
+"""In-process BM25 retrieval over website content, for per-turn prompt context."""
+from __future__ import annotations
+
+import math
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Optional
+
+from livekit.agents import llm
+from livekit.agents.llm.chat_context import ChatContext
+
+from .response_cache import normalize_transcript
+
+# Function words of Urdu, Roman Urdu and English that say nothing about a section
+STOP_WORDS = frozenset(
+    normalize_transcript(word)
+    for word in (
+        "ke", "ka", "ki", "ko", "se", "mein", "main", "hai", "hain", "kya", "aur", "ya", "bhi", "ye", "yeh",
+        "wo", "woh", "par", "pe", "to", "tou", "ho", "kar", "karo", "mujhe", "aap", "hum", "please",
+        "کے", "کا", "کی", "کو", "سے", "میں", "ہے", "ہیں", "کیا", "اور", "یا", "بھی", "یہ", "وہ", "پر", "تو",
+        "ہو", "کر", "مجھے", "آپ", "ہم",
+        "the", "a", "an", "is", "are", "of", "to", "in", "on", "and", "or", "me", "you", "your", "what",
+        "do", "does", "tell", "show", "can", "i", "it",
+    )
+)
+
+
+@dataclass(frozen=True)
+class Document:
+    """A piece of site content, injected into the prompt as ``text``."""
+    id: str
+    text: str
+    keywords: tuple[str, ...] = ()  # Indexed but not injected, e.g. Urdu and Roman Urdu names of the section
+
+
+@dataclass(frozen=True)
+class SearchHit:
+    document: Document
+    score: float
+
+
+@dataclass
+class RetrievalOptions:
+    """Configuration options for SiteIndex."""
+    top_k: int = 2
+    min_score: float = 8.0  # BM25 score below which a document is not relevant
+    relative_score: float = 0.4  # Hits scoring below this share of the best one are dropped
+    ngram_sizes: tuple[int, ...] = (3, 4)  # Character n-grams, for spelling variants ("qeemat", "keemat")
+    k1: float = 1.2
+    b: float = 0.75
+
+
+class SiteIndex:
+    """BM25 over words and character n-grams of normalized text.
+
+    Built once (in prewarm) and shared read-only by every session. Text is
+    normalized like transcripts, so Urdu script, Roman Urdu and English
+    queries match documents through their keywords, and Whisper's
+    spelling variants still share most n-grams.
+    """
+
+    def __init__(self, documents: list[Document], options: RetrievalOptions | None = None) -> None:
+        self._opts = options or RetrievalOptions()
+        self._documents = list(documents)
+        self._by_id = {document.id: document for document in self._documents}
+        self._lengths: list[int] = []
+        self._postings: dict[str, list[tuple[int, int]]] = {}  # feature -> (document index, count)
+        for i, document in enumerate(self._documents):
+            counts = Counter(self._features(" ".join((document.text, *document.keywords))))
+            self._lengths.append(sum(counts.values()))
+            for feature, count in counts.items():
+                self._postings.setdefault(feature, []).append((i, count))
+        self._avg_length = sum(self._lengths) / max(len(self._lengths), 1)
+        n = len(self._documents)
+        self._idf = {
+            feature: math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for feature, postings in self._postings.items()
+        }
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.injected = 0
+        self.injected_chars = 0
+        self.search_ms_total = 0.0
+
+    @property
+    def documents(self) -> list[Document]:
+        return self._documents
+
+    def get(self, document_id: str) -> Optional[Document]:
+        return self._by_id.get(document_id)
+
+    def search(self, query: str, top_k: int | None = None) -> list[SearchHit]:
+        """The documents relevant to ``query``, best first."""
+        start = time.perf_counter()
+        opts = self._opts
+        scores: dict[int, float] = {}
+        for feature, query_count in Counter(self._features(query)).items():
+            idf = self._idf.get(feature)
+            if idf is None:
+                continue
+            for i, count in self._postings[feature]:
+                norm = opts.k1 * (1 - opts.b + opts.b * self._lengths[i] / self._avg_length)
+                scores[i] = scores.get(i, 0.0) + query_count * idf * count * (opts.k1 + 1) / (count + norm)
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        hits = []
+        if ranked:
+            floor = max(opts.min_score, ranked[0][1] * opts.relative_score)
+            hits = [SearchHit(self._documents[i], score) for i, score in ranked[: top_k or opts.top_k] if score >= floor]
+        with self._lock:
+            self.queries += 1
+            self.search_ms_total += (time.perf_counter() - start) * 1000
+        return hits
+
+    def with_context(self, chat_ctx: ChatContext) -> ChatContext:
+        """A copy of ``chat_ctx`` with the sections relevant to the last user message.
+
+        They go in a system message right after it, so the prompt up to the
+        caller's words stays as the server has it cached, and history cuts,
+        which fall before user messages, never land on it. The session's
+        own history is left as it is.
+        """
+        items = chat_ctx.items
+        last_user = next(
+            (i for i in range(len(items) - 1, -1, -1) if items[i].type == "message" and items[i].role == "user"),
+            None,
+        )
+        if last_user is None:
+            return chat_ctx
+        hits = self.search(items[last_user].text_content or "")
+        if not hits:
+            return chat_ctx
+        context = "\n\n".join(hit.document.text.strip() for hit in hits)
+        with self._lock:
+            self.injected += 1
+            self.injected_chars += len(context)
+        chat_ctx = chat_ctx.copy()
+        chat_ctx.items.insert(
+            last_user + 1,
+            llm.ChatMessage(role="system", content=[f"Website information for the caller's message:\n\n{context}"]),
+        )
+        return chat_ctx
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "documents": len(self._documents),
+                "queries": self.queries,
+                "injected": self.injected,
+                "avg_injected_chars": round(self.injected_chars / (self.injected or 1)),
+                "avg_search_ms": round(self.search_ms_total / (self.queries or 1), 3),
+            }
+
+    def _features(self, text: str) -> list[str]:
+        features = []
+        for word in normalize_transcript(text).split():
+            if word in STOP_WORDS:
+                continue
+            features.append(word)
+            padded = f"#{word}#"
+            for n in self._opts.ngram_sizes:
+                features.extend(padded[i:i + n] for i in range(len(padded) - n + 1))
+        return features
@@ -0,0 +1,314 @@
+"""Spread Ollama chat streams across several backends."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Literal
+
+import httpx
+import openai
+
+from livekit.agents.llm.chat_context import ChatContext
+from livekit.agents.llm.tool_context import FunctionTool
+from livekit.agents.types import APIConnectOptions
+
+from .llm import OllamaLLM, OllamaLLMStream, PrefetchedStream, _PooledClient, post_chat_request
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RoutingOptions:
+    """Configuration options for BackendRouter."""
+    strategy: Literal["least_outstanding", "latency"] = "least_outstanding"
+    sticky_slack: int = 2  # Extra in-flight requests tolerated to stay on a session's backend
+    failure_threshold: int = 3  # Consecutive failures that open a backend's circuit
+    cooldown: float = 5.0  # Seconds an open circuit waits before a trial request; doubles per failed trial
+    max_cooldown: float = 60.0
+    health_interval: float = 10.0  # Seconds between /api/version checks; 0 disables them
+    health_timeout: float = 2.0
+    ewma_alpha: float = 0.3  # Weight of the newest time to first token in the moving average
+
+
+@dataclass
+class Backend:
+    """Load and health of one Ollama server."""
+    base_url: str
+    outstanding: int = 0
+    requests: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    healthy: bool = True
+    ewma_ttft: float | None = None  # Seconds
+    circuit: Literal["closed", "open", "half_open"] = "closed"
+    open_until: float = 0.0
+    cooldown: float = 0.0
+
+    def available(self, now: float) -> bool:
+        if not self.healthy:
+            return False
+        if self.circuit == "open":
+            return now >= self.open_until
+        if self.circuit == "half_open":
+            return self.outstanding == 0  # One trial request at a time
+        return True
+
+
+class BackendRouter:
+    """Picks a backend per request and tracks load, latency and failures.
+
+    Shared by every session in the process (``BackendRouter.shared``), so
+    in-flight counts cover all calls, and guarded by a lock because job
+    threads each run their own event loop. A backend whose requests fail
+    to connect ``failure_threshold`` times in a row is skipped until its
+    cooldown ends; then one trial request decides whether it rejoins.
+    """
+
+    _shared: dict[tuple, BackendRouter] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, base_urls: list[str], options: RoutingOptions | None = None) -> None:
+        if not base_urls:
+            raise ValueError("BackendRouter needs at least one base URL")
+        self._opts = options or RoutingOptions()
+        self._lock = threading.Lock()
+        self.backends = [Backend(base_url=url) for url in base_urls]
+        self._health_thread: threading.Thread | None = None
+        if self._opts.health_interval > 0:
+            self._health_thread = threading.Thread(target=self._check_health, name="ollama-health", daemon=True)
+            self._health_thread.start()
+
+    @classmethod
+    def shared(cls, base_urls: list[str], options: RoutingOptions | None = None) -> BackendRouter:
+        """Return the process-wide router for these backends, creating it once."""
+        key = tuple(base_urls)
+        with cls._shared_lock:
+            router = cls._shared.get(key)
+            if router is None:
+                router = cls._shared[key] = cls(base_urls, options)
+            return router
+
+    def acquire(self, preferred: Backend | None = None, exclude: set[str] = frozenset()) -> Backend:
+        """Choose a backend for one request and count it as in flight."""
+        now = time.monotonic()
+        with self._lock:
+            candidates = [b for b in self.backends if b.base_url not in exclude and b.available(now)]
+            if not candidates:
+                # Nothing looks usable: trying the least bad one beats failing outright
+                candidates = [b for b in self.backends if b.base_url not in exclude] or self.backends
+                logger.warning("No healthy Ollama backend available; trying one anyway")
+            backend = min(candidates, key=self._score)
+            if (
+                preferred is not None
+                and any(b is preferred for b in candidates)
+                and preferred.outstanding <= backend.outstanding + self._opts.sticky_slack
+            ):
+                # Staying put keeps the session's prompt prefix in that server's cache
+                backend = preferred
+            if backend.circuit == "open":
+                backend.circuit = "half_open"
+            backend.outstanding += 1
+            backend.requests += 1
+            return backend
+
+    def release(self, backend: Backend) -> None:
+        with self._lock:
+            backend.outstanding -= 1
+
+    def record_success(self, backend: Backend, ttft: float) -> None:
+        with self._lock:
+            alpha = self._opts.ewma_alpha
+            backend.ewma_ttft = ttft if backend.ewma_ttft is None else alpha * ttft + (1 - alpha) * backend.ewma_ttft
+            backend.consecutive_failures = 0
+            if backend.circuit != "closed":
+                logger.info(f"Ollama backend {backend.base_url} recovered")
+                backend.circuit = "closed"
+                backend.cooldown = 0.0
+
+    def record_failure(self, backend: Backend) -> None:
+        with self._lock:
+            backend.failures += 1
+            backend.consecutive_failures += 1
+            if backend.circuit == "half_open" or backend.consecutive_failures >= self._opts.failure_threshold:
+                backend.cooldown = min(
+                    self._opts.max_cooldown,
+                    backend.cooldown * 2 if backend.circuit == "half_open" else self._opts.cooldown,
+                )
+                backend.circuit = "open"
+                backend.open_until = time.monotonic() + backend.cooldown
+                logger.warning(f"Ollama backend {backend.base_url} unavailable for {backend.cooldown:.0f}s")
+
+    def stats(self) -> list[dict]:
+        with self._lock:
+            return [
+                {
+                    "base_url": b.base_url,
+                    "healthy": b.healthy,
+                    "circuit": b.circuit,
+                    "outstanding": b.outstanding,
+                    "requests": b.requests,
+                    "failures": b.failures,
+                    "ewma_ttft_ms": round(b.ewma_ttft * 1000, 1) if b.ewma_ttft is not None else None,
+                }
+                for b in self.backends
+            ]
+
+    def _score(self, backend: Backend) -> tuple:
+        known = [b.ewma_ttft for b in self.backends if b.ewma_ttft is not None]
+        # Unmeasured backends are assumed average, so they get traffic and a measurement
+        ttft = backend.ewma_ttft if backend.ewma_ttft is not None else sum(known) / len(known) if known else 0.0
+        if self._opts.strategy == "latency":
+            return (ttft * (backend.outstanding + 1), backend.outstanding)
+        return (backend.outstanding, ttft)
+
+    def _check_health(self) -> None:
+        with httpx.Client(timeout=self._opts.health_timeout) as client:
+            while True:
+                for backend in self.backends:
+                    # Ollama's native API lives beside the OpenAI-compatible /v1 prefix
+                    url = backend.base_url.rstrip("/").removesuffix("/v1") + "/api/version"
+                    try:
+                        healthy = client.get(url).status_code == 200
+                    except httpx.HTTPError:
+                        healthy = False
+                    if healthy != backend.healthy:
+                        logger.warning(f"Ollama backend {backend.base_url} is {'healthy' if healthy else 'unhealthy'}")
+                    with self._lock:
+                        backend.healthy = healthy
+                time.sleep(self._opts.health_interval)
+
+
+class RoutedLLM(OllamaLLM):
+    """OllamaLLM whose chat streams go to the least loaded of several backends.
+
+    Each session sticks to one backend while it is not much busier than
+    the others, so its prompt prefix stays cached there. A request that
+    fails to connect is retried by the framework on another backend.
+    """
+
+    def __init__(
+        self,
+        base_urls: list[str],
+        *,
+        routing: RoutingOptions | None = None,
+        router: BackendRouter | None = None,
+        **kwargs: Any,
+    ) -> None:
+        """Initialize the routed LLM.
+
+        Args:
+            base_urls: Ollama API base URLs, e.g. http://gpu-1:11434/v1
+            routing: Options for the process-wide router of these backends
+            router: Router to use instead of the process-wide one
+            **kwargs: Passed to OllamaLLM
+        """
+        super().__init__(base_url=base_urls[0], **kwargs)
+        self._router = router or BackendRouter.shared(base_urls, routing)
+        self._clients: dict[str, _PooledClient] = {}
+        self._sticky: Backend | None = None
+
+    @property
+    def router(self) -> BackendRouter:
+        return self._router
+
+    def client_for(self, backend: Backend) -> openai.AsyncClient:
+        pooled = self._clients.get(backend.base_url)
+        if pooled is None:
+            pooled = self._clients[backend.base_url] = self._pool.acquire(backend.base_url, self._api_key, self._timeout)
+        return pooled.client
+
+    async def aclose(self) -> None:
+        clients, self._clients = list(self._clients.values()), {}
+        for pooled in clients:
+            await self._pool.release(pooled)
+        await super().aclose()
+
+    async def warm_up(self, instructions: str, tools: list[FunctionTool] | None = None) -> None:
+        """Prefill the static prefix on every backend."""
+        if self._prompt_cache is None:
+            return
+        await asyncio.gather(
+            *(
+                self._warm_up(backend.base_url, self.client_for(backend), instructions, tools)
+                for backend in self._router.backends
+            )
+        )
+
+    async def _complete(self, messages: list, max_tokens: int) -> str:
+        backend = self._router.acquire(preferred=self._sticky, exclude=set())
+        try:
+            return await self._complete_with(self.client_for(backend), messages, max_tokens)
+        finally:
+            self._router.release(backend)
+
+    def _create_stream(
+        self,
+        *,
+        chat_ctx: ChatContext,
+        tools: list[FunctionTool],
+        conn_options: APIConnectOptions,
+        extra_kwargs: dict[str, Any],
+    ) -> OllamaLLMStream:
+        return RoutedLLMStream(
+            self,
+            model=self._model,
+            client=None,
+            chat_ctx=chat_ctx,
+            tools=tools,
+            conn_options=conn_options,
+            extra_kwargs=extra_kwargs,
+        )
+
+
+class RoutedLLMStream(OllamaLLMStream):
+    """Chat stream that picks its backend per attempt."""
+
+    def __init__(self, llm: RoutedLLM, **kwargs: Any) -> None:
+        super().__init__(llm, **kwargs)
+        self._routed = llm
+        self._failed: set[str] = set()  # Backends that already failed this stream
+        self._in_use: set[str] = set()  # Backends of attempts still waiting for a first token
+
+    async def _open(self, body: bytes) -> PrefetchedStream:
+        routed, router = self._routed, self._routed.router
+        # A hedge goes to another backend than the attempt it races, if there is one
+        exclude = self._failed | self._in_use
+        if all(b.base_url in exclude for b in router.backends):
+            exclude = self._failed
+        backend = router.acquire(preferred=routed._sticky, exclude=exclude)
+        self._in_use.add(backend.base_url)
+        start = time.perf_counter()
+        stream = None
+
+        def on_error(e: Exception) -> None:
+            if _is_backend_failure(e):
+                router.record_failure(backend)
+
+        try:
+            stream = await post_chat_request(routed.client_for(backend), body)
+            opened = await PrefetchedStream(stream, on_close=lambda: router.release(backend), on_error=on_error).prefetch()
+        except BaseException as e:
+            self._in_use.discard(backend.base_url)
+            if stream is None:
+                router.release(backend)  # Otherwise closing the stream released it
+            if _is_backend_failure(e):
+                router.record_failure(backend)
+                self._failed.add(backend.base_url)
+                routed._sticky = None
+            raise
+        self._in_use.discard(backend.base_url)
+        router.record_success(backend, time.perf_counter() - start)
+        routed._sticky = backend
+        return opened
+
+
+def _is_backend_failure(e: BaseException) -> bool:
+    """Errors that say the server is down or overloaded, not that the request was bad."""
+    if isinstance(e, openai.APIStatusError):
+        return e.status_code >= 500
+    if isinstance(e.__cause__, httpx.PoolTimeout):
+        return False  # Our own connection limit, not the backend
+    return isinstance(e, (openai.APIConnectionError, httpx.TransportError))
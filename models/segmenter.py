@@ -0,0 +1,179 @@
+"""Urdu-aware sentence segmentation of streamed LLM text for TTS."""
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from livekit.agents import tokenize, utils
+
+# End a sentence. ۔ and ؟ never occur inside numbers or URLs, so they need no lookahead
+SENTENCE_ENDS = "۔؟!?.…\n"
+# End a clause, where a long sentence may be cut or the first one flushed early
+CLAUSE_ENDS = "،؛,;:—"
+# ASCII marks that also occur inside tokens ("3.5", "10:30", "1,000", "example.com")
+# only count when followed by whitespace
+_NEEDS_SPACE_AFTER = ".!?,;:"
+# Closing marks kept with the sentence they end
+_CLOSERS = "\"')]”’»"
+# Roman abbreviations whose period does not end a sentence
+ABBREVIATIONS = frozenset({"mr", "mrs", "ms", "dr", "st", "sr", "jr", "vs", "etc", "e.g", "i.e", "no", "rs"})
+
+
+@dataclass
+class SegmenterOptions:
+    """Configuration options for UrduSentenceTokenizer."""
+    first_min_chars: int = 12  # The first segment is sent at the first clause this long, to start audio early
+    min_chars: int = 40  # Later sentences shorter than this are merged with the next one
+    max_chars: int = 160  # Longer runs are cut at the last clause mark or space
+
+
+class UrduSentenceTokenizer(tokenize.SentenceTokenizer):
+    """Splits text on Urdu and Latin punctuation into segments sized for TTS.
+
+    Segments end at ۔ ؟ . ! ? and line breaks, and clause marks (، ؛ , ;)
+    when a sentence runs past ``max_chars``. The first segment of each reply
+    is sent as soon as one clause of ``first_min_chars`` is complete, so
+    synthesis starts before the first sentence is finished. Later
+    segments are at least ``min_chars`` long, which keeps the number of
+    requests to the TTS small. Shared by every stream of the TTS it is
+    given to.
+    """
+
+    def __init__(self, options: SegmenterOptions | None = None) -> None:
+        self._opts = options or SegmenterOptions()
+        self._lock = threading.Lock()
+        self.streams = 0
+        self.segments = 0
+        self.chars_total = 0
+        self.first_wait_total = 0.0
+
+    @property
+    def options(self) -> SegmenterOptions:
+        return self._opts
+
+    def tokenize(self, text: str, *, language: Optional[str] = None) -> list[str]:
+        segments = []
+        while text:
+            cut = find_cut(text, self._opts, first=not segments, final=True)
+            segment, text = text[:cut].strip(), text[cut:].lstrip()
+            if segment:
+                segments.append(segment)
+        return segments
+
+    def stream(self, *, language: Optional[str] = None) -> UrduSentenceStream:
+        with self._lock:
+            self.streams += 1
+        return UrduSentenceStream(self)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "streams": self.streams,
+                "segments": self.segments,
+                "avg_segment_chars": round(self.chars_total / (self.segments or 1), 1),
+                # From the first token of a reply to its first segment, i.e. how long TTS waited
+                "avg_first_segment_wait_ms": round(self.first_wait_total * 1000 / (self.streams or 1), 1),
+            }
+
+    def _record(self, segment: str, first_wait: Optional[float]) -> None:
+        with self._lock:
+            self.segments += 1
+            self.chars_total += len(segment)
+            if first_wait is not None:
+                self.first_wait_total += first_wait
+
+
+class UrduSentenceStream(tokenize.SentenceStream):
+    """Incremental form of UrduSentenceTokenizer, fed token by token."""
+
+    def __init__(self, tokenizer: UrduSentenceTokenizer) -> None:
+        super().__init__()
+        self._tokenizer = tokenizer
+        self._buf = ""
+        self._segment_id = utils.shortuuid()
+        self._first = True  # No segment sent since the last flush
+        self._started_at: Optional[float] = None  # First text of the reply
+        self._waited = False  # The first segment's wait has been recorded
+
+    def push_text(self, text: str) -> None:
+        self._check_not_closed()
+        if self._started_at is None and text.strip():
+            self._started_at = time.perf_counter()
+        self._buf += text
+        self._drain(final=False)
+
+    def flush(self) -> None:
+        self._check_not_closed()
+        self._drain(final=True)
+        self._segment_id = utils.shortuuid()
+        self._first = True
+
+    def end_input(self) -> None:
+        self.flush()
+        self._do_close()
+
+    async def aclose(self) -> None:
+        self._do_close()
+
+    def _drain(self, final: bool) -> None:
+        while self._buf:
+            cut = find_cut(self._buf, self._tokenizer.options, first=self._first, final=final)
+            if cut is None:
+                return
+            segment, self._buf = self._buf[:cut].strip(), self._buf[cut:].lstrip()
+            if not segment:
+                continue
+            first_wait = None
+            if not self._waited and self._started_at is not None:
+                first_wait = time.perf_counter() - self._started_at
+                self._waited = True
+            self._tokenizer._record(segment, first_wait)
+            self._event_ch.send_nowait(tokenize.TokenData(segment_id=self._segment_id, token=segment))
+            self._first = False
+
+
+def find_cut(text: str, opts: SegmenterOptions, *, first: bool, final: bool) -> Optional[int]:
+    """Index at which the next segment of ``text`` ends, or None to wait for more.
+
+    ``first`` allows the early cut at a clause; ``final`` means no more text
+    follows, so whatever is left is a segment.
+    """
+    min_chars = opts.first_min_chars if first else opts.min_chars
+    last_clause = last_space = None
+    leading = len(text) - len(text.lstrip())
+    for i, c in enumerate(text):
+        if i - leading >= opts.max_chars:
+            # Nothing ended the sentence in time: cut at a clause, else between words
+            return last_clause or last_space or i
+        if c.isspace():
+            last_space = i
+        if c not in SENTENCE_ENDS and c not in CLAUSE_ENDS:
+            continue
+        end = i + 1
+        while end < len(text) and text[end] in _CLOSERS:
+            end += 1
+        if c in _NEEDS_SPACE_AFTER:
+            if end == len(text):
+                break  # "3." could still become "3.5"
+            if not text[end].isspace() or (c == "." and _is_abbreviation(text, i)):
+                continue
+        length = end - leading
+        if c in SENTENCE_ENDS:
+            if length >= min_chars:
+                return end
+        else:
+            if first and length >= min_chars:
+                return end
+            last_clause = end
+    return len(text) if final else None
+
+
+def _is_abbreviation(text: str, dot: int) -> bool:
+    start = dot
+    while start > 0 and not text[start - 1].isspace():
+        start -= 1
+    word = text[start:dot].lower()
+    list_marker = word.isdigit() and (start == 0 or text[start - 1] == "\n")
+    return word in ABBREVIATIONS or list_marker or (len(word) == 1 and word.isalpha())
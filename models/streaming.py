@@ -0,0 +1,174 @@
+"""Streaming recognition for WhisperSTT with interim transcripts."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from livekit import rtc
+from livekit.agents import stt, utils
+from livekit.agents.types import NOT_GIVEN, APIConnectOptions, NotGivenOr
+from livekit.agents.vad import VAD, VADEventType
+
+from .decoding import MAX_WINDOW_SECONDS
+from .features import FeatureCache, current_feature_cache
+
+if TYPE_CHECKING:
+    from .stt import WhisperSTT
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StreamingOptions:
+    """Configuration options for WhisperSpeechStream."""
+    interim_interval_ms: float = 500.0  # How often the growing buffer is re-decoded
+    min_interim_audio_ms: float = 400.0  # Shorter buffers are not worth an interim decode
+
+
+def local_agreement(previous: list[str], current: list[str]) -> list[str]:
+    """Return the word prefix two consecutive hypotheses agree on (LocalAgreement-2)."""
+    agreed = 0
+    for prev_word, word in zip(previous, current):
+        if prev_word != word:
+            break
+        agreed += 1
+    return current[:agreed]
+
+
+class WhisperSpeechStream(stt.RecognizeStream):
+    """Rolling-window recognition driven by the worker's Silero VAD.
+
+    While the user speaks, the growing utterance is re-decoded every
+    ``interim_interval_ms`` and sent as ``INTERIM_TRANSCRIPT``. Words that
+    two consecutive decodes agree on are committed and never flicker in
+    later interims. At end of speech the whole utterance is decoded once
+    more and sent as ``FINAL_TRANSCRIPT``. Every decode of an utterance
+    reuses the log-mel frames computed for its earlier windows.
+    """
+
+    def __init__(
+        self,
+        stt: WhisperSTT,
+        *,
+        vad: VAD,
+        language: NotGivenOr[str] = NOT_GIVEN,
+        conn_options: APIConnectOptions,
+        opts: StreamingOptions,
+    ) -> None:
+        super().__init__(stt=stt, conn_options=conn_options)
+        self._whisper = stt
+        self._vad = vad
+        self._language = language
+        self._stream_opts = opts
+        self._committed: list[str] = []
+        self._previous: list[str] = []
+        self._features = FeatureCache()
+
+    async def _run(self) -> None:
+        vad_stream = self._vad.stream()
+        # Tasks created below copy this context, so their decodes find the cache
+        current_feature_cache.set(self._features)
+
+        async def _forward_input() -> None:
+            """forward input to vad"""
+            async for input in self._input_ch:
+                if isinstance(input, self._FlushSentinel):
+                    vad_stream.flush()
+                    continue
+                vad_stream.push_frame(input)
+
+            vad_stream.end_input()
+
+        async def _recognize() -> None:
+            """emit interims while speaking and a final at end of speech"""
+            frames: list[rtc.AudioFrame] = []
+            interim_task: asyncio.Task | None = None
+            last_interim = 0.0
+
+            async for event in vad_stream:
+                if event.type == VADEventType.START_OF_SPEECH:
+                    frames = list(event.frames)
+                    self._committed = []
+                    self._previous = []
+                    last_interim = time.monotonic()
+                    self._event_ch.send_nowait(stt.SpeechEvent(stt.SpeechEventType.START_OF_SPEECH))
+
+                elif event.type == VADEventType.INFERENCE_DONE and event.speaking:
+                    frames.extend(event.frames)
+                    now = time.monotonic()
+                    if (
+                        (now - last_interim) * 1000 >= self._stream_opts.interim_interval_ms
+                        and (interim_task is None or interim_task.done())
+                    ):
+                        last_interim = now
+                        interim_task = asyncio.create_task(self._interim(list(frames)))
+
+                elif event.type == VADEventType.END_OF_SPEECH:
+                    if interim_task is not None:
+                        await utils.aio.cancel_and_wait(interim_task)
+                        interim_task = None
+                    self._event_ch.send_nowait(stt.SpeechEvent(stt.SpeechEventType.END_OF_SPEECH))
+
+                    t_event = await self._whisper.recognize(
+                        buffer=utils.merge_frames(event.frames),
+                        language=self._language,
+                        conn_options=self._conn_options,
+                    )
+                    if not t_event.alternatives or not t_event.alternatives[0].text:
+                        continue
+                    self._event_ch.send_nowait(
+                        stt.SpeechEvent(
+                            type=stt.SpeechEventType.FINAL_TRANSCRIPT,
+                            alternatives=[t_event.alternatives[0]],
+                        )
+                    )
+
+            if interim_task is not None:
+                await utils.aio.cancel_and_wait(interim_task)
+
+        tasks = [
+            asyncio.create_task(_forward_input(), name="forward_input"),
+            asyncio.create_task(_recognize(), name="recognize"),
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            await utils.aio.cancel_and_wait(*tasks)
+            await vad_stream.aclose()
+            logger.debug(f"STT feature cache: {self._features.stats()}")
+
+    async def _interim(self, frames: list[rtc.AudioFrame]) -> None:
+        """Decode the utterance so far and emit its agreed-upon interim text."""
+        buffer = utils.merge_frames(frames)
+        duration = buffer.samples_per_channel / buffer.sample_rate
+        if duration * 1000 < self._stream_opts.min_interim_audio_ms or duration > MAX_WINDOW_SECONDS:
+            return
+
+        language = self._language or self._whisper._opts.language
+        try:
+            text = await self._whisper._transcribe(buffer, language, self._conn_options.timeout)
+        except Exception as e:
+            # Interims are best effort: under load the final decode matters more
+            logger.debug(f"Skipping interim transcript: {e}")
+            return
+
+        words = text.split()
+        agreed = local_agreement(self._previous, words)
+        if len(agreed) > len(self._committed):
+            self._committed = agreed
+        self._previous = words
+
+        # Committed words stay put; the unconfirmed tail follows the latest decode
+        tail = words[len(self._committed):] if words[: len(self._committed)] == self._committed else []
+        interim_text = " ".join(self._committed + tail)
+        if not interim_text:
+            return
+        self._event_ch.send_nowait(
+            stt.SpeechEvent(
+                type=stt.SpeechEventType.INTERIM_TRANSCRIPT,
+                alternatives=[stt.SpeechData(text=interim_text, language=language)],
+            )
+        )
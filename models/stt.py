@@ -1,20 +1,48 @@
 """In-process STT using Faster Whisper."""
+import asyncio
 import logging
-import os
+import time
 from dataclasses import dataclass
 from typing import Optional
 
 import numpy as np
-from faster_whisper import WhisperModel
 
-from livekit import rtc
-from livekit.agents import APIConnectionError, APIConnectOptions, stt
+from livekit.agents import APIConnectionError, APIConnectOptions, APIError, stt
+from livekit.agents.types import DEFAULT_API_CONNECT_OPTIONS, NOT_GIVEN, NotGivenOr
 from livekit.agents.utils import AudioBuffer
+from livekit.agents.vad import VAD
 
+from .audio import WHISPER_SAMPLE_RATE, PCMConverter
+from .batching import BatchScheduler
+from .decoding import MAX_WINDOW_SECONDS, decode_batch, decode_cached
+from .executor import InferenceExecutor, default_executor
+from .features import current_feature_cache
+from .registry import ModelEntry, whisper_registry
+from .streaming import StreamingOptions, WhisperSpeechStream
+from .tiers import TierRouter
+from .tracing import Span, stage
+from .trimming import SpeechTrimmer
 from .utils import find_time
 
 logger = logging.getLogger(__name__)
 
+# Silence put between joined speech regions, so words at a cut don't run together
+REGION_GAP_SECONDS = 0.1
+
+
+def transcribe_audio(model, audio_array: np.ndarray, language: str) -> str:
+    """Transcribe one utterance; runs on an executor worker, never the event loop."""
+    segments, info = model.transcribe(
+        audio_array,
+        language=language,
+        beam_size=1,
+        best_of=1,
+        condition_on_previous_text=True,
+        vad_filter=False,  # SpeechTrimmer, when configured, has already cut out silence
+    )
+    # segments is lazy: decoding happens while it is consumed
+    return " ".join(segment.text.strip() for segment in segments)
+
 
 @dataclass
 class WhisperOptions:
@@ -27,7 +55,11 @@ class WhisperOptions:
 
 
 class WhisperSTT(stt.STT):
-    """In-process STT implementation using Faster Whisper."""
+    """In-process STT implementation using Faster Whisper.
+
+    The model itself is owned by the process-wide ``whisper_registry``, so
+    sessions created with the same options share one copy of the weights.
+    """
     
     def __init__(
         self,
@@ -36,6 +68,12 @@ class WhisperSTT(stt.STT):
         device: str = "cuda",  # cuda or cpu
         compute_type: str = "float16",  # float16, float32, int8
         model_cache_directory: Optional[str] = None,
+        executor: Optional[InferenceExecutor] = None,
+        batcher: Optional[BatchScheduler] = None,
+        vad: Optional[VAD] = None,
+        streaming: Optional[StreamingOptions] = None,
+        trimmer: Optional[SpeechTrimmer] = None,
+        tiers: Optional[TierRouter] = None,
     ):
         """Initialize the WhisperSTT instance.
         
@@ -45,10 +83,26 @@ class WhisperSTT(stt.STT):
             device: Device to use (cuda or cpu)
             compute_type: Compute type for GPU
             model_cache_directory: Directory to cache models
+            executor: Pool that runs inference; defaults to a shared thread pool
+            batcher: Opt-in scheduler that decodes utterances from concurrent
+                sessions together; must be built for the same model
+            vad: Enables stream() with interim transcripts, using this VAD
+                to find speech boundaries
+            streaming: Interim decoding settings, used when vad is given
+            trimmer: Cuts silence out of each buffer before decoding; speech
+                regions separated by pauses are decoded as one batch
+            tiers: Several resident models, one picked per utterance by
+                load; model and batcher above are then the best tier's
         """
         super().__init__(
-            capabilities=stt.STTCapabilities(streaming=False, interim_results=False)
+            capabilities=stt.STTCapabilities(
+                streaming=vad is not None, interim_results=vad is not None
+            )
         )
+        self._vad = vad
+        self._streaming_opts = streaming or StreamingOptions()
+        self._trimmer = trimmer
+        self._tiers = tiers
         
         self._opts = WhisperOptions(
             language=language,
@@ -58,44 +112,163 @@ class WhisperSTT(stt.STT):
             model_cache_directory=model_cache_directory,
         )
         
+        self._executor = executor or default_executor()
+        self._converter = PCMConverter()
         self._model = None
+        self._model_entry: Optional[ModelEntry] = None
         self._initialize_model()
 
+        self._batcher = batcher
+        if batcher is not None and batcher.entry.key != self._model_entry.key:
+            logger.warning("Ignoring STT batcher built for a different Whisper model")
+            self._batcher = None
+
     def _initialize_model(self):
-        """Initialize the Whisper model."""
-        device = self._opts.device
-        compute_type = self._opts.compute_type
-        
-        logger.info(f"Loading Whisper model: {self._opts.model} on {device} with {compute_type}")
-        
-        # Ensure cache directory exists
-        model_cache_dir = self._opts.model_cache_directory
-        if model_cache_dir:
-            os.makedirs(model_cache_dir, exist_ok=True)
-            logger.info(f"Using model cache directory: {model_cache_dir}")
-        
-        try:
-            self._model = WhisperModel(
-                model_size_or_path=self._opts.model,
-                device=device,
-                compute_type=compute_type,
-                download_root=model_cache_dir
+        """Acquire the shared Whisper model for these options."""
+        self._model_entry = whisper_registry.acquire(
+            model=self._opts.model,
+            device=self._opts.device,
+            compute_type=self._opts.compute_type,
+            model_cache_directory=self._opts.model_cache_directory,
+        )
+        self._model = self._model_entry.model
+        # Reflect the CPU fallback, if the registry had to take it
+        self._opts.device = self._model_entry.device
+        self._opts.compute_type = self._model_entry.compute_type
+
+    async def aclose(self) -> None:
+        """Release this session's reference to the shared model."""
+        if self._model_entry is not None:
+            whisper_registry.release(self._model_entry)
+            self._model_entry = None
+            self._model = None
+        await super().aclose()
+
+    def stream(
+        self,
+        *,
+        language: NotGivenOr[str] = NOT_GIVEN,
+        conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS,
+    ) -> WhisperSpeechStream:
+        """Create a streaming recognizer that emits interim transcripts."""
+        if self._vad is None:
+            return super().stream(language=language, conn_options=conn_options)
+        return WhisperSpeechStream(
+            self,
+            vad=self._vad,
+            language=language,
+            conn_options=conn_options,
+            opts=self._streaming_opts,
+        )
+
+    async def _transcribe(
+        self, buffer: AudioBuffer, language: str, timeout: float, span: Optional[Span] = None
+    ) -> str:
+        """Decode a buffer through the batcher or executor and return its text.
+
+        With tiers, the model that serves the request is set on ``span``.
+        """
+        # View frame PCM directly as 16 kHz mono float32 (no WAV round trip)
+        with self._converter.convert(buffer) as audio_array:
+            features = current_feature_cache.get()
+            chunks = [audio_array]
+            # Streaming utterances are already cut by the session's VAD, and
+            # trimming them would defeat the prefix-based feature cache
+            if self._trimmer is not None and features is None:
+                chunks = (await self._trimmer.trim(audio_array)).chunks
+                if not chunks:
+                    return ""
+            if self._tiers is None:
+                return await self._decode_speech(chunks, language, timeout, features, self._model_entry, self._batcher)
+
+            choice = self._tiers.choose(sum(len(chunk) for chunk in chunks) / WHISPER_SAMPLE_RATE)
+            if span is not None:
+                span.attributes["model"] = choice.tier.entry.key.model
+            start, ok = time.perf_counter(), False
+            try:
+                with stage("stt.tier", tier=choice.tier.name, pending=choice.pending, predicted_ms=round(choice.predicted_ms)):
+                    text = await self._decode_speech(
+                        chunks, language, timeout, features, choice.tier.entry, choice.tier.batcher
+                    )
+                ok = True
+                return text
+            finally:
+                self._tiers.observe(choice, (time.perf_counter() - start) * 1000, ok=ok)
+
+    async def _decode_speech(
+        self,
+        chunks: list[np.ndarray],
+        language: str,
+        timeout: float,
+        features,
+        entry: ModelEntry,
+        batcher: Optional[BatchScheduler],
+    ) -> str:
+        if len(chunks) > 1:
+            return await self._decode_chunks(chunks, language, timeout, entry, batcher)
+        return await self._decode(chunks[0], language, timeout, features, entry, batcher)
+
+    async def _decode(
+        self,
+        audio_array: np.ndarray,
+        language: str,
+        timeout: float,
+        features,
+        entry: ModelEntry,
+        batcher: Optional[BatchScheduler],
+    ) -> str:
+        fits_window = len(audio_array) <= MAX_WINDOW_SECONDS * WHISPER_SAMPLE_RATE
+        if features is not None and fits_window and self._executor.kind == "thread":
+            # A streaming session re-decodes a growing utterance: reuse its features
+            return await self._executor.run(
+                entry,
+                decode_cached,
+                audio_array,
+                language,
+                features,
+                timeout=timeout,
             )
-            logger.info("✅ Whisper model loaded successfully")
-        except Exception as e:
-            logger.error(f"❌ Failed to load Whisper model: {e}")
-            # Fallback to CPU if CUDA fails
-            if device == "cuda":
-                logger.warning("Falling back to CPU...")
-                self._opts.device = "cpu"
-                self._opts.compute_type = "int8"
-                self._model = WhisperModel(
-                    model_size_or_path=self._opts.model,
-                    device="cpu",
-                    compute_type="int8",
-                    download_root=model_cache_dir
-                )
-                logger.info("✅ Whisper model loaded on CPU")
+        if batcher is not None and fits_window:
+            return await batcher.recognize(audio_array, language, timeout=timeout)
+        return await self._executor.run(
+            entry,
+            transcribe_audio,
+            audio_array,
+            language,
+            timeout=timeout,
+        )
+
+    async def _decode_chunks(
+        self,
+        chunks: list[np.ndarray],
+        language: str,
+        timeout: float,
+        entry: ModelEntry,
+        batcher: Optional[BatchScheduler],
+    ) -> str:
+        """Decode the speech regions of one utterance, in one pass when they fit one window."""
+        window = MAX_WINDOW_SECONDS * WHISPER_SAMPLE_RATE
+        gap = np.zeros(int(REGION_GAP_SECONDS * WHISPER_SAMPLE_RATE), dtype=np.float32)
+        if sum(len(chunk) for chunk in chunks) + len(gap) * (len(chunks) - 1) <= window:
+            # Every region is padded to a full encoder window: one window for all is one pass
+            joined = np.concatenate([part for chunk in chunks for part in (gap, chunk)][1:])
+            return await self._decode(joined, language, timeout, None, entry, batcher)
+        if any(len(chunk) > window for chunk in chunks):
+            # A region needs the long-form path: decode the speech back to back
+            return await self._decode(np.concatenate(chunks), language, timeout, None, entry, batcher)
+        if batcher is not None:
+            texts = await asyncio.gather(
+                *(batcher.recognize(chunk, language, timeout=timeout) for chunk in chunks)
+            )
+        else:
+            texts = await self._executor.run(
+                entry,
+                decode_batch,
+                chunks,
+                [language] * len(chunks),
+                timeout=timeout,
+            )
+        return " ".join(text for text in texts if text)
 
     async def _recognize_impl(
         self,
@@ -120,27 +293,9 @@ class WhisperSTT(stt.STT):
             # Use provided language or default
             target_language = language or self._opts.language
             
-            # Convert audio buffer to WAV bytes
-            audio_data = rtc.combine_audio_frames(buffer).to_wav_bytes()
-            
-            # Convert WAV to numpy array
-            audio_array = np.frombuffer(audio_data, dtype=np.int16).astype(np.float32) / 32768.0
-            
-            # Transcribe with timing
-            with find_time('STT_inference'):
-                segments, info = self._model.transcribe(
-                    audio_array,
-                    language=target_language,
-                    beam_size=1,
-                    best_of=1,
-                    condition_on_previous_text=True,
-                    vad_filter=False,
-                    vad_parameters=dict(min_silence_duration_ms=500),
-                )
-
-            # Combine all segments
-            segments_list = list(segments)
-            full_text = " ".join(segment.text.strip() for segment in segments_list)
+            # Transcribe with timing (includes time queued for a worker)
+            with find_time('STT_inference'), stage("stt.decode", model=self._opts.model) as span:
+                full_text = await self._transcribe(buffer, target_language, conn_options.timeout, span)
             
             logger.info(f"Transcribed: {full_text}")
 
@@ -154,6 +309,10 @@ class WhisperSTT(stt.STT):
                 ],
             )
 
+        except APIError as e:
+            # Overload and deadline errors already carry the right type
+            logger.warning(f"Speech recognition rejected: {e}")
+            raise
         except Exception as e:
             logger.error(f"Error in speech recognition: {e}", exc_info=True)
             raise APIConnectionError() from e
@@ -0,0 +1,219 @@
+"""Load-adaptive STT: several resident Whisper models, one picked per utterance."""
+import logging
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from .batching import BatchScheduler
+from .executor import InferenceExecutor
+from .registry import ModelEntry
+
+logger = logging.getLogger(__name__)
+
+# Rough decode time per second of speech on a GPU in float16, until measured
+PRIOR_MS_PER_AUDIO_S = {"base": 40.0, "small": 100.0, "medium": 250.0, "large-v3-turbo": 200.0}
+PRIOR_MS_PER_AUDIO_S_LARGE = 500.0
+CPU_SLOWDOWN = 8.0
+LATENCY_WINDOW = 500
+
+
+@dataclass
+class TierOptions:
+    """Configuration options for TierRouter."""
+    slo_ms: float = 1000.0  # Target for queueing plus decoding of one utterance
+    upgrade_after: int = 8  # Consecutive requests with headroom before moving back up a tier
+    upgrade_headroom: float = 0.7  # ... the better tier must be predicted within this share of the SLO
+    min_audio_s: float = 1.0  # Shorter utterances cost about as much: the encoder always sees 30 s
+    smoothing: float = 0.3  # Weight of a new sample in the moving averages
+
+
+@dataclass
+class SttTier:
+    """One resident Whisper model the router can send utterances to."""
+    name: str  # As in WHISPER_TIERS, e.g. "small" or "base:int8"
+    entry: ModelEntry
+    batcher: Optional[BatchScheduler] = None  # Must be built for ``entry``
+
+
+@dataclass(frozen=True)
+class TierChoice:
+    tier: SttTier
+    index: int
+    audio_s: float
+    pending: int  # Requests in the executor when this one was routed
+    predicted_ms: float
+
+
+def prior_ms_per_audio_s(entry: ModelEntry) -> float:
+    prior = PRIOR_MS_PER_AUDIO_S.get(entry.key.model, PRIOR_MS_PER_AUDIO_S_LARGE)
+    return prior * CPU_SLOWDOWN if entry.device == "cpu" else prior
+
+
+class TierRouter:
+    """Routes each utterance to the best Whisper tier that meets the latency SLO.
+
+    Tiers are ordered best (slowest) first and share one executor. The
+    latency of a tier is predicted as the wait for the requests already
+    in the executor plus its decode time for the utterance, measured per
+    second of speech on requests that found a worker free.
+
+    The router keeps a level: the best tier a typical utterance can use at
+    the current queue depth. It drops as soon as that tier would miss the
+    SLO, and climbs back one tier at a time only after ``upgrade_after``
+    consecutive requests in which the better tier fits with headroom, so
+    a queue hovering at the threshold doesn't switch models on every
+    utterance. A long utterance may go to a faster tier than the level,
+    never a short one to a better tier. Shared by every session in the
+    process (``tier_router``).
+    """
+
+    def __init__(
+        self,
+        tiers: list[SttTier],
+        executor: InferenceExecutor,
+        options: TierOptions | None = None,
+    ) -> None:
+        if not tiers:
+            raise ValueError("TierRouter needs at least one tier")
+        self._tiers = list(tiers)
+        self._executor = executor
+        self._opts = options or TierOptions()
+        # Sessions may run on different event loops, so state is guarded by a lock
+        self._lock = threading.Lock()
+        self._level = 0
+        self._calm = 0  # Consecutive requests in which the next better tier had headroom
+        self._ms_per_audio_s = [prior_ms_per_audio_s(tier.entry) for tier in self._tiers]
+        self._measured = [False] * len(self._tiers)
+        self._typical_audio_s = 3.0
+        self._job_ms = self._decode_ms(0, self._typical_audio_s)  # Average decode time of the jobs sent
+        self.requests = [0] * len(self._tiers)
+        self.degrades = 0
+        self.upgrades = 0
+        self.slo_misses = 0
+        self.failures = 0
+        self._latency_ms: deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    @property
+    def tiers(self) -> list[SttTier]:
+        return self._tiers
+
+    def choose(self, audio_s: float) -> TierChoice:
+        """Pick the tier for an utterance of ``audio_s`` seconds of speech."""
+        opts = self._opts
+        with self._lock:
+            pending = self._executor.pending
+            wait_ms = self._wait_ms(pending)
+            self._typical_audio_s += opts.smoothing * (audio_s - self._typical_audio_s)
+            self._update_level(wait_ms, pending)
+            index = self._level
+            while index < len(self._tiers) - 1 and wait_ms + self._decode_ms(index, audio_s) > opts.slo_ms:
+                index += 1
+            decode_ms = self._decode_ms(index, audio_s)
+            self._job_ms += opts.smoothing * (decode_ms - self._job_ms)
+            self.requests[index] += 1
+        choice = TierChoice(self._tiers[index], index, audio_s, pending, wait_ms + decode_ms)
+        logger.info(
+            f"STT tier {choice.tier.name} for {audio_s:.1f}s of speech "
+            f"({pending} pending, predicted {choice.predicted_ms:.0f} ms)"
+        )
+        return choice
+
+    def observe(self, choice: TierChoice, elapsed_ms: float, ok: bool = True) -> None:
+        """Record how long a routed request took, queueing included."""
+        opts = self._opts
+        with self._lock:
+            self._latency_ms.append(elapsed_ms)
+            if not ok:
+                self.failures += 1
+                return
+            if elapsed_ms > opts.slo_ms:
+                self.slo_misses += 1
+            if choice.pending < self._executor.max_workers:
+                # Started at once: the whole time was decoding
+                i = choice.index
+                sample = elapsed_ms / max(choice.audio_s, opts.min_audio_s)
+                if self._measured[i]:
+                    self._ms_per_audio_s[i] += opts.smoothing * (sample - self._ms_per_audio_s[i])
+                else:
+                    self._ms_per_audio_s[i] = sample
+                    self._measured[i] = True
+
+    def stats(self) -> dict:
+        with self._lock:
+            latency_ms = list(self._latency_ms)
+            stats = {
+                "level": self._tiers[self._level].name,
+                "requests": {tier.name: n for tier, n in zip(self._tiers, self.requests)},
+                "degrades": self.degrades,
+                "upgrades": self.upgrades,
+                "slo_misses": self.slo_misses,
+                "failures": self.failures,
+                "ms_per_audio_s": {tier.name: round(ms, 1) for tier, ms in zip(self._tiers, self._ms_per_audio_s)},
+            }
+        if latency_ms:
+            stats.update(
+                latency_ms_p50=round(float(np.percentile(latency_ms, 50)), 1),
+                latency_ms_p95=round(float(np.percentile(latency_ms, 95)), 1),
+            )
+        return stats
+
+    def _decode_ms(self, index: int, audio_s: float) -> float:
+        return self._ms_per_audio_s[index] * max(audio_s, self._opts.min_audio_s)
+
+    def _wait_ms(self, pending: int) -> float:
+        """Time until a worker is free for one more request."""
+        workers = self._executor.max_workers
+        if pending < workers:
+            return 0.0
+        return (pending - workers + 1) * self._job_ms / workers
+
+    def _update_level(self, wait_ms: float, pending: int) -> None:
+        opts = self._opts
+        last = len(self._tiers) - 1
+        target = next(
+            (i for i in range(last) if wait_ms + self._decode_ms(i, self._typical_audio_s) <= opts.slo_ms),
+            last,
+        )
+        if target > self._level:
+            logger.info(f"STT tier down: {self._tiers[self._level].name} -> {self._tiers[target].name} ({pending} pending)")
+            self._level = target
+            self.degrades += 1
+            self._calm = 0
+        elif (
+            target < self._level
+            and wait_ms + self._decode_ms(self._level - 1, self._typical_audio_s) <= opts.slo_ms * opts.upgrade_headroom
+        ):
+            self._calm += 1
+            if self._calm >= opts.upgrade_after:
+                logger.info(f"STT tier up: {self._tiers[self._level].name} -> {self._tiers[self._level - 1].name}")
+                self._level -= 1
+                self.upgrades += 1
+                self._calm = 0
+        else:
+            self._calm = 0
+
+
+_router: Optional[TierRouter] = None
+_router_lock = threading.Lock()
+
+
+def tier_router(
+    tiers: list[SttTier],
+    executor: InferenceExecutor,
+    options: TierOptions | None = None,
+) -> TierRouter:
+    """Return the process-wide router, creating it on the first call.
+
+    Prewarm runs for every job in thread mode; asking here instead of
+    building a router lets the level and latency estimates follow the
+    load of all the process's sessions. ``tiers``, ``executor`` and
+    ``options`` only apply to the first call.
+    """
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = TierRouter(tiers, executor, options)
+        return _router
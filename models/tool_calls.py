@@ -0,0 +1,156 @@
+"""Accumulate streamed tool calls and emit each one as soon as it is complete."""
+from __future__ import annotations
+
+import json
+import logging
+import re
+import secrets
+from typing import Optional
+
+from livekit.agents import llm
+from openai.types.chat.chat_completion_chunk import ChoiceDeltaToolCall
+
+logger = logging.getLogger(__name__)
+
+# Only these characters change the structure of a JSON document
+_STRUCTURAL = re.compile(r'[\\"{}\[\]]')
+
+
+class JsonScanner:
+    """Tells when a JSON object streamed in pieces has been closed.
+
+    Tracks nesting and strings across pieces, looking only at structural
+    characters, so each piece is scanned once. ``complete`` is a cheap
+    signal; the arguments are still parsed once before they are trusted.
+    """
+    __slots__ = ("depth", "in_string", "escaped", "closed", "overrun")
+
+    def __init__(self) -> None:
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False  # The previous piece ended inside a string with a backslash
+        self.closed = False  # The outermost object or array has been closed
+        self.overrun = False  # Something other than whitespace followed it
+
+    @property
+    def complete(self) -> bool:
+        return self.closed and not self.overrun
+
+    def feed(self, text: str) -> None:
+        if self.closed:
+            self.overrun = self.overrun or bool(text.strip())
+            return
+        skip_to = 1 if self.escaped else 0
+        self.escaped = False
+        for match in _STRUCTURAL.finditer(text):
+            pos = match.start()
+            if pos < skip_to:
+                continue  # Escaped by a backslash
+            c = text[pos]
+            if self.in_string:
+                if c == "\\":
+                    skip_to = pos + 2
+                    self.escaped = skip_to > len(text)
+                elif c == '"':
+                    self.in_string = False
+            elif c == '"':
+                self.in_string = True
+            elif c in "{[":
+                self.depth += 1
+            elif c in "}]":
+                self.depth -= 1
+                if self.depth <= 0:
+                    self.closed = True
+                    self.overrun = bool(text[pos + 1:].strip())
+                    return
+
+
+class _PendingCall:
+    __slots__ = ("call_id", "name", "parts", "scanner", "emitted")
+
+    def __init__(self) -> None:
+        self.call_id: Optional[str] = None
+        self.name: Optional[str] = None
+        self.parts: list[str] = []  # Argument pieces, joined once when the call is emitted
+        self.scanner = JsonScanner()
+        self.emitted = False
+
+    def to_tool_call(self) -> llm.FunctionToolCall:
+        self.emitted = True
+        return llm.FunctionToolCall(
+            name=self.name or "",
+            arguments="".join(self.parts),
+            call_id=self.call_id or f"call_{secrets.token_hex(8)}",
+        )
+
+
+class ToolCallAccumulator:
+    """Tool call deltas of one response, matched to calls by id or index.
+
+    Any number of calls may be streamed, interleaved or not. A call is
+    returned by ``add()`` as soon as it has a name and its arguments form
+    a complete JSON object, so the framework can run it while the model
+    is still generating. ``flush()`` returns the calls left at the end of
+    the response, e.g. ones without arguments.
+    """
+
+    def __init__(self) -> None:
+        self._calls: list[_PendingCall] = []  # In the order they started
+        self._by_index: dict[int, _PendingCall] = {}  # Stream index -> the call it currently refers to
+        self._last: Optional[_PendingCall] = None
+
+    def add(self, tool_calls: list[ChoiceDeltaToolCall]) -> list[llm.FunctionToolCall]:
+        """Record the deltas of one chunk; return the calls they completed."""
+        touched = []
+        for delta in tool_calls:
+            call = self._call_for(delta)
+            if call.emitted:
+                continue
+            if delta.id and not call.call_id:
+                call.call_id = delta.id
+            function = delta.function
+            if function is not None:
+                if function.name and not call.name:
+                    call.name = function.name
+                if function.arguments:
+                    call.parts.append(function.arguments)
+                    call.scanner.feed(function.arguments)
+            if call not in touched:
+                touched.append(call)
+        return [call.to_tool_call() for call in touched if call.name and self._ready(call)]
+
+    def flush(self) -> list[llm.FunctionToolCall]:
+        """The calls not returned yet, in the order they started."""
+        return [call.to_tool_call() for call in self._calls if not call.emitted and call.name]
+
+    def _call_for(self, delta: ChoiceDeltaToolCall) -> _PendingCall:
+        index = getattr(delta, "index", None)
+        call = None
+        if delta.id:
+            call = next((call for call in self._calls if call.call_id == delta.id), None)
+        if call is None:
+            if index is None:
+                # Some servers leave out the index: a new id starts a new call
+                call = self._last if not delta.id else None
+            else:
+                call = self._by_index.get(index)
+                if call is not None and delta.id and call.call_id:
+                    call = None  # Some reuse index 0 for every call
+            if call is None:
+                call = _PendingCall()
+                self._calls.append(call)
+        if index is not None:
+            # Later deltas without an id carry only the index
+            self._by_index[index] = call
+        self._last = call
+        return call
+
+    @staticmethod
+    def _ready(call: _PendingCall) -> bool:
+        if not call.scanner.complete:
+            return False
+        try:
+            json.loads("".join(call.parts))
+        except ValueError:
+            return False  # Left for flush(), which hands it over as streamed
+        return True
@@ -0,0 +1,299 @@
+"""Per-turn latency tracing across VAD, STT, LLM, tools and TTS."""
+from __future__ import annotations
+
+import functools
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Iterator, Optional, Protocol, TypeVar
+
+from livekit.agents import AgentSession, MetricsCollectedEvent, metrics
+from livekit.agents.voice.events import AgentStateChangedEvent, UserStateChangedEvent
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "urdu-voice-agent"
+
+F = TypeVar("F", bound=Callable[..., Awaitable[Any]])
+
+
+@dataclass
+class Span:
+    """One timed stage of a turn; times are Unix nanoseconds."""
+    name: str
+    start_ns: int
+    end_ns: Optional[int] = None
+    parent_id: Optional[str] = None
+    attributes: dict[str, Any] = field(default_factory=dict)
+    span_id: str = field(default_factory=lambda: secrets.token_hex(8))
+
+    @property
+    def duration(self) -> float:
+        """Duration in seconds, zero while the span is open."""
+        return (self.end_ns - self.start_ns) / 1e9 if self.end_ns is not None else 0.0
+
+
+@dataclass
+class Turn:
+    """Span tree of one user turn, rooted at the user's end of speech."""
+    root: Span
+    spans: list[Span] = field(default_factory=list)
+    trace_id: str = field(default_factory=lambda: secrets.token_hex(16))
+
+    def add(self, name: str, start_ns: int, end_ns: Optional[int] = None, parent: Optional[Span] = None, **attributes) -> Span:
+        span = Span(
+            name=name,
+            start_ns=start_ns,
+            end_ns=end_ns,
+            parent_id=(parent or self.root).span_id,
+            attributes=attributes,
+        )
+        self.spans.append(span)
+        # Metrics can describe work that began before the turn was opened
+        self.root.start_ns = min(self.root.start_ns, start_ns)
+        return span
+
+
+class TurnExporter(Protocol):
+    def export(self, turn: Turn) -> None: ...
+
+    def close(self) -> None: ...
+
+
+class OTLPJsonFileExporter:
+    """Appends each turn as one OTLP/JSON ``ExportTraceServiceRequest`` line."""
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._lock = threading.Lock()
+
+    def export(self, turn: Turn) -> None:
+        request = {
+            "resourceSpans": [{
+                "resource": {"attributes": _otlp_attributes({"service.name": SERVICE_NAME, "process.pid": os.getpid()})},
+                "scopeSpans": [{
+                    "scope": {"name": __name__},
+                    "spans": [self._otlp_span(turn, span) for span in [turn.root, *turn.spans]],
+                }],
+            }]
+        }
+        line = json.dumps(request, ensure_ascii=False) + "\n"
+        with self._lock, open(self._path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+    def close(self) -> None:
+        pass
+
+    @staticmethod
+    def _otlp_span(turn: Turn, span: Span) -> dict:
+        otlp = {
+            "traceId": turn.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns if span.end_ns is not None else span.start_ns),
+            "attributes": _otlp_attributes(span.attributes),
+        }
+        if span.parent_id:
+            otlp["parentSpanId"] = span.parent_id
+        return otlp
+
+
+class PrometheusExporter:
+    """Records stage and turn durations as Prometheus histograms.
+
+    Served by the worker's own ``/metrics`` endpoint (``WorkerOptions
+    prometheus_port``), which reads the default registry of the main
+    process: with the process job executor only prewarm runs there, so
+    use the thread job executor to see per-turn metrics.
+    """
+
+    _lock = threading.Lock()
+    _histograms: Optional[tuple] = None
+
+    def __init__(self) -> None:
+        import prometheus_client
+
+        with PrometheusExporter._lock:
+            # Metrics register globally, so every session shares one set
+            if PrometheusExporter._histograms is None:
+                buckets = (0.025, 0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0)
+                PrometheusExporter._histograms = (
+                    prometheus_client.Histogram(
+                        "voice_agent_stage_seconds", "Duration of each turn stage", ["stage"], buckets=buckets
+                    ),
+                    prometheus_client.Histogram(
+                        "voice_agent_turn_response_seconds",
+                        "User end of speech to agent speaking",
+                        buckets=buckets,
+                    ),
+                )
+        self._stages, self._response = PrometheusExporter._histograms
+
+    def export(self, turn: Turn) -> None:
+        for span in turn.spans:
+            if span.end_ns is None:
+                continue
+            if span.name == "turn.response":
+                self._response.observe(span.duration)
+            else:
+                self._stages.labels(stage=span.name).observe(span.duration)
+
+    def close(self) -> None:
+        pass
+
+
+class TurnTracer:
+    """Builds one span tree per user turn and hands it to the exporters.
+
+    A turn opens when the user stops speaking and closes when the agent
+    finishes the reply. Framework metrics (end of utterance, STT, LLM time
+    to first token, TTS time to first byte) become spans of the open turn.
+    Code paths of our own add spans with ``stage()``, which finds the
+    session's tracer through a context variable.
+    """
+
+    def __init__(self, exporters: list[TurnExporter]) -> None:
+        self._exporters = exporters
+        self._turn: Optional[Turn] = None
+        self._responded = False
+
+    def attach(self, session: AgentSession) -> None:
+        """Follow a session's events and make this the tracer for its tasks."""
+        current_tracer.set(self)
+        session.on("user_state_changed", self._on_user_state_changed)
+        session.on("agent_state_changed", self._on_agent_state_changed)
+        session.on("metrics_collected", self._on_metrics_collected)
+
+    @contextmanager
+    def stage(self, name: str, **attributes) -> Iterator[Span]:
+        turn = self._turn or self._open_turn(time.time_ns(), initiated_by="agent")
+        span = turn.add(name, time.time_ns(), **attributes)
+        try:
+            yield span
+        finally:
+            span.end_ns = time.time_ns()
+
+    async def aclose(self) -> None:
+        """Export the turn still open and close the exporters."""
+        self._close_turn(completed=False)
+        for exporter in self._exporters:
+            exporter.close()
+
+    def _on_user_state_changed(self, ev: UserStateChangedEvent) -> None:
+        if ev.old_state == "speaking" and ev.new_state != "speaking":
+            end_of_speech = int(ev.created_at * 1e9)
+            turn = self._turn
+            if turn is not None and not self._responded and turn.root.attributes["initiated_by"] == "agent":
+                # A stage (e.g. the STT decode) raced ahead of this event: adopt its turn
+                turn.root.attributes["initiated_by"] = "user"
+            else:
+                if turn is not None:
+                    # The user spoke again before the agent finished answering
+                    self._close_turn(completed=False)
+                turn = self._open_turn(end_of_speech, initiated_by="user")
+            turn.add("vad.end_of_speech", end_of_speech, end_of_speech)
+
+    def _on_agent_state_changed(self, ev: AgentStateChangedEvent) -> None:
+        turn = self._turn
+        if turn is None:
+            return
+        now = time.time_ns()
+        if ev.new_state == "speaking" and not self._responded:
+            self._responded = True
+            turn.add("turn.response", turn.root.start_ns, now)
+        elif ev.old_state == "speaking" and self._responded:
+            self._close_turn(completed=True)
+
+    def _on_metrics_collected(self, ev: MetricsCollectedEvent) -> None:
+        m = ev.metrics
+        if isinstance(m, metrics.EOUMetrics):
+            turn = self._turn or self._open_turn(int(m.last_speaking_time * 1e9), initiated_by="user")
+            start = int(m.last_speaking_time * 1e9)
+            eou = turn.add("eou", start, start + int(m.end_of_utterance_delay * 1e9))
+            turn.add("eou.transcription_delay", start, start + int(m.transcription_delay * 1e9), parent=eou)
+        elif isinstance(m, metrics.STTMetrics):
+            if self._turn is not None:
+                end = int(m.timestamp * 1e9)
+                self._turn.add("stt", end - int(m.duration * 1e9), end, audio_duration=m.audio_duration)
+        elif isinstance(m, metrics.LLMMetrics):
+            if self._turn is not None:
+                end = int(m.timestamp * 1e9)
+                start = end - int(m.duration * 1e9)
+                llm_span = self._turn.add(
+                    "llm", start, end,
+                    prompt_tokens=m.prompt_tokens,
+                    prompt_cached_tokens=m.prompt_cached_tokens,
+                    completion_tokens=m.completion_tokens,
+                    cancelled=m.cancelled,
+                )
+                self._turn.add("llm.ttft", start, start + int(max(m.ttft, 0) * 1e9), parent=llm_span)
+        elif isinstance(m, metrics.TTSMetrics):
+            if self._turn is not None:
+                end = int(m.timestamp * 1e9)
+                start = end - int(m.duration * 1e9)
+                tts_span = self._turn.add("tts", start, end, characters=m.characters_count, cancelled=m.cancelled)
+                self._turn.add("tts.ttfb", start, start + int(max(m.ttfb, 0) * 1e9), parent=tts_span)
+
+    def _open_turn(self, start_ns: int, initiated_by: str) -> Turn:
+        self._turn = Turn(root=Span(name="turn", start_ns=start_ns, attributes={"initiated_by": initiated_by}))
+        self._responded = False
+        return self._turn
+
+    def _close_turn(self, completed: bool) -> None:
+        turn, self._turn = self._turn, None
+        if turn is None:
+            return
+        turn.root.end_ns = max([time.time_ns()] + [span.end_ns for span in turn.spans if span.end_ns is not None])
+        turn.root.attributes["completed"] = completed
+        for exporter in self._exporters:
+            try:
+                exporter.export(turn)
+            except Exception as e:
+                logger.warning(f"Failed to export turn trace: {e}")
+
+
+current_tracer: ContextVar[Optional[TurnTracer]] = ContextVar("current_tracer", default=None)
+
+
+@contextmanager
+def stage(name: str, **attributes) -> Iterator[Optional[Span]]:
+    """Time a block as a span of the current turn; a no-op without a tracer."""
+    tracer = current_tracer.get()
+    if tracer is None:
+        yield None
+        return
+    with tracer.stage(name, **attributes) as span:
+        yield span
+
+
+def traced(name: str) -> Callable[[F], F]:
+    """Decorator that runs an async function (e.g. a tool) as a ``stage``."""
+    def decorator(fn: F) -> F:
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            with stage(name):
+                return await fn(*args, **kwargs)
+        return wrapper  # type: ignore[return-value]
+    return decorator
+
+
+def _otlp_attributes(attributes: dict[str, Any]) -> list[dict]:
+    values = []
+    for key, value in attributes.items():
+        if isinstance(value, bool):
+            values.append({"key": key, "value": {"boolValue": value}})
+        elif isinstance(value, int):
+            values.append({"key": key, "value": {"intValue": str(value)}})
+        elif isinstance(value, float):
+            values.append({"key": key, "value": {"doubleValue": value}})
+        else:
+            values.append({"key": key, "value": {"stringValue": str(value)}})
+    return values
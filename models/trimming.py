@@ -0,0 +1,123 @@
+"""Silero VAD trimming of utterances before Whisper decoding."""
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+from livekit.plugins import silero
+from livekit.plugins.silero.onnx_model import OnnxModel
+
+from .audio import WHISPER_SAMPLE_RATE
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TrimmingOptions:
+    """Configuration options for SpeechTrimmer."""
+    min_silence_ms: float = 300.0  # Shorter pauses stay inside a speech region
+    min_speech_ms: float = 100.0  # Shorter blips (clicks, breaths) are dropped
+    padding_ms: float = 100.0  # Audio kept on both sides of each region
+    deactivation_offset: float = 0.15  # Speech ends below activation_threshold minus this
+
+
+@dataclass
+class TrimResult:
+    """Speech regions cut from one utterance."""
+    chunks: list[np.ndarray]
+    total_seconds: float
+    skipped_seconds: float
+
+
+class SpeechTrimmer:
+    """Cuts an utterance down to its speech regions with the worker's Silero VAD.
+
+    The ONNX session of the VAD loaded in ``prewarm`` is reused; every call
+    gets fresh recurrent state, so concurrent sessions don't interfere.
+    Inference runs on a dedicated thread, as the Silero plugin's own
+    stream does, and never on the event loop.
+    """
+
+    def __init__(self, vad: silero.VAD, options: Optional[TrimmingOptions] = None) -> None:
+        self._vad = vad
+        self._opts = options or TrimmingOptions()
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="stt-trim")
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._total_seconds = 0.0
+        self._skipped_seconds = 0.0
+
+    async def trim(self, audio: np.ndarray) -> TrimResult:
+        """Return the speech regions of 16 kHz mono audio."""
+        loop = asyncio.get_running_loop()
+        regions = await loop.run_in_executor(self._pool, self.speech_regions, audio)
+        chunks = [audio[start:end] for start, end in regions]
+
+        total = len(audio) / WHISPER_SAMPLE_RATE
+        skipped = total - sum(len(chunk) for chunk in chunks) / WHISPER_SAMPLE_RATE
+        with self._lock:
+            self._calls += 1
+            self._total_seconds += total
+            self._skipped_seconds += skipped
+        logger.debug(f"VAD trimming skipped {skipped:.2f}s of {total:.2f}s in {len(chunks)} region(s)")
+        return TrimResult(chunks=chunks, total_seconds=total, skipped_seconds=skipped)
+
+    def speech_regions(self, audio: np.ndarray) -> list[tuple[int, int]]:
+        """Return padded, merged (start, end) sample ranges that contain speech."""
+        vad_opts = self._vad._opts
+        model = OnnxModel(onnx_session=self._vad._onnx_session, sample_rate=vad_opts.sample_rate)
+        step = WHISPER_SAMPLE_RATE // model.sample_rate
+        vad_audio = audio[: len(audio) // step * step].reshape(-1, step).mean(axis=1) if step > 1 else audio
+        window = model.window_size_samples
+
+        # Hysteresis on the per-window speech probability
+        activation = vad_opts.activation_threshold
+        deactivation = max(activation - self._opts.deactivation_offset, 0.01)
+        raw: list[list[int]] = []
+        speaking = False
+        for i in range(len(vad_audio) // window):
+            p = model(vad_audio[i * window : (i + 1) * window])
+            start = i * window * step
+            if not speaking and p >= activation:
+                speaking = True
+                raw.append([start, start + window * step])
+            elif speaking:
+                if p < deactivation:
+                    speaking = False
+                else:
+                    raw[-1][1] = start + window * step
+
+        to_samples = WHISPER_SAMPLE_RATE / 1000
+        min_silence = int(self._opts.min_silence_ms * to_samples)
+        min_speech = int(self._opts.min_speech_ms * to_samples)
+        padding = int(self._opts.padding_ms * to_samples)
+
+        merged: list[list[int]] = []
+        for start, end in raw:
+            if merged and start - merged[-1][1] < min_silence:
+                merged[-1][1] = end
+            else:
+                merged.append([start, end])
+
+        regions: list[tuple[int, int]] = []
+        for start, end in merged:
+            if end - start < min_speech:
+                continue
+            start, end = max(0, start - padding), min(len(audio), end + padding)
+            if regions and start <= regions[-1][1]:
+                regions[-1] = (regions[-1][0], end)
+            else:
+                regions.append((start, end))
+        return regions
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "calls": self._calls,
+                "audio_seconds": round(self._total_seconds, 2),
+                "skipped_seconds": round(self._skipped_seconds, 2),
+                "skipped_ratio": round(self._skipped_seconds / (self._total_seconds or 1), 3),
+            }
@@ -0,0 +1,284 @@
+"""Content-addressed cache of synthesized speech for fixed phrases."""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import unicodedata
+import wave
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, Iterable, Optional
+
+from livekit import rtc
+from livekit.agents import tts, utils
+from livekit.agents.types import DEFAULT_API_CONNECT_OPTIONS, APIConnectOptions
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CachedAudio:
+    pcm: bytes  # 16-bit little-endian PCM
+    sample_rate: int
+    num_channels: int
+
+
+class AudioCache:
+    """Synthesized PCM kept in memory (LRU) and as WAV files on disk.
+
+    Entries are named by a hash of what determines the audio (text,
+    voice, model and format), so a file never needs invalidating and the
+    directory can be shared by processes and kept across deploys.
+    """
+
+    def __init__(self, directory: str | os.PathLike, max_memory_bytes: int = 64 * 1024 * 1024) -> None:
+        self._directory = Path(directory)
+        self._directory.mkdir(parents=True, exist_ok=True)
+        self._max_memory_bytes = max_memory_bytes
+        self._memory: OrderedDict[str, CachedAudio] = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(text: str, *, voice_id: str, model: str, sample_rate: int) -> str:
+        payload = json.dumps(
+            [unicodedata.normalize("NFC", text.strip()), voice_id, model, sample_rate],
+            ensure_ascii=False,
+        )
+        return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+    def load(self) -> int:
+        """Read cached files into memory, newest first, up to the memory budget."""
+        paths = sorted(self._directory.glob("*.wav"), key=lambda p: p.stat().st_mtime, reverse=True)
+        loaded = 0
+        for path in paths:
+            if self._memory_bytes + path.stat().st_size > self._max_memory_bytes:
+                break
+            audio = self._read(path)
+            if audio is not None:
+                self._remember(path.stem, audio)
+                loaded += 1
+        return loaded
+
+    def has(self, key: str) -> bool:
+        """True if ``key`` is cached, without counting a hit or a miss."""
+        with self._lock:
+            if key in self._memory:
+                return True
+        return (self._directory / f"{key}.wav").exists()
+
+    def peek(self, key: str) -> Optional[CachedAudio]:
+        """Like ``get``, from memory only; a miss is not counted, as ``get`` follows."""
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+            return audio
+
+    def get(self, key: str) -> Optional[CachedAudio]:
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return audio
+        audio = self._read(self._directory / f"{key}.wav")
+        with self._lock:
+            if audio is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+        self._remember(key, audio)
+        return audio
+
+    def put(self, key: str, audio: CachedAudio) -> None:
+        self._remember(key, audio)
+        # Write then rename, so other processes never read a partial file
+        fd, tmp = tempfile.mkstemp(dir=self._directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f, wave.open(f, "wb") as w:
+                w.setnchannels(audio.num_channels)
+                w.setsampwidth(2)
+                w.setframerate(audio.sample_rate)
+                w.writeframes(audio.pcm)
+            os.replace(tmp, self._directory / f"{key}.wav")
+        except OSError as e:
+            os.unlink(tmp)
+            logger.warning(f"Could not write TTS cache entry: {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries_in_memory": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+            }
+
+    def _remember(self, key: str, audio: CachedAudio) -> None:
+        with self._lock:
+            previous = self._memory.pop(key, None)
+            if previous is not None:
+                self._memory_bytes -= len(previous.pcm)
+            self._memory[key] = audio
+            self._memory_bytes += len(audio.pcm)
+            while self._memory_bytes > self._max_memory_bytes and len(self._memory) > 1:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted.pcm)
+
+    @staticmethod
+    def _read(path: Path) -> Optional[CachedAudio]:
+        try:
+            with wave.open(str(path), "rb") as w:
+                return CachedAudio(w.readframes(w.getnframes()), w.getframerate(), w.getnchannels())
+        except (OSError, EOFError, wave.Error):
+            return None
+
+
+class CachedTTS(tts.TTS):
+    """Wraps a TTS so repeated ``synthesize()`` calls replay cached audio.
+
+    Streaming synthesis (the LLM's replies) goes to the wrapped TTS as is,
+    since its text is only known as it arrives. Fixed phrases go through
+    ``synthesize()`` or ``audio()``, e.g. ``session.say(text,
+    audio=cached_tts.audio(text))``: the first call per text, voice and
+    model synthesizes and stores the audio, later ones stream it from
+    memory or disk.
+    """
+
+    def __init__(self, inner: tts.TTS, cache: AudioCache, *, voice_id: str, model: str) -> None:
+        super().__init__(
+            capabilities=inner.capabilities,
+            sample_rate=inner.sample_rate,
+            num_channels=inner.num_channels,
+        )
+        self._inner = inner
+        self._cache = cache
+        self._voice_id = voice_id
+        self._model = model
+
+        @inner.on("metrics_collected")
+        def _forward_metrics(*args, **kwargs) -> None:
+            self.emit("metrics_collected", *args, **kwargs)
+
+        @inner.on("error")
+        def _forward_error(*args, **kwargs) -> None:
+            self.emit("error", *args, **kwargs)
+
+    @property
+    def cache(self) -> AudioCache:
+        return self._cache
+
+    def cache_key(self, text: str) -> str:
+        return AudioCache.key(text, voice_id=self._voice_id, model=self._model, sample_rate=self.sample_rate)
+
+    def synthesize(
+        self, text: str, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS
+    ) -> tts.ChunkedStream:
+        return _CachedChunkedStream(tts=self, input_text=text, conn_options=conn_options)
+
+    def stream(self, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS) -> tts.SynthesizeStream:
+        return self._inner.stream(conn_options=conn_options)
+
+    async def audio(self, text: str) -> AsyncIterator[rtc.AudioFrame]:
+        """Frames for ``text``, for ``session.say(text, audio=...)``."""
+        async with self.synthesize(text) as stream:
+            async for ev in stream:
+                yield ev.frame
+
+    async def warm(self, texts: Iterable[str], concurrency: int = 4) -> int:
+        """Synthesize the phrases not cached yet; return how many were added."""
+        missing = list(dict.fromkeys(text for text in texts if not self._cache.has(self.cache_key(text))))
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def synthesize(text: str) -> bool:
+            async with semaphore:
+                try:
+                    async with self.synthesize(text) as stream:
+                        async for _ in stream:
+                            pass
+                except Exception as e:
+                    logger.warning(f"Could not synthesize {text[:40]!r} for the TTS cache: {e}")
+                    return False
+            return True
+
+        return sum(await asyncio.gather(*(synthesize(text) for text in missing)))
+
+    def prewarm(self) -> None:
+        self._inner.prewarm()
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
+
+
+class _CachedChunkedStream(tts.ChunkedStream):
+    def __init__(self, *, tts: CachedTTS, input_text: str, conn_options: APIConnectOptions) -> None:
+        # Set before the base class starts the tasks that use them
+        self._key = tts.cache_key(input_text)
+        self._cached = tts.cache.peek(self._key)  # Memory only: no disk reads on the event loop
+        self._looked_up = self._cached is not None
+        super().__init__(tts=tts, input_text=input_text, conn_options=conn_options)
+        self._tts: CachedTTS = tts
+
+    async def _run(self, output_emitter: tts.AudioEmitter) -> None:
+        if not self._looked_up:
+            self._cached = await asyncio.to_thread(self._tts.cache.get, self._key)
+            self._looked_up = True
+        cached = self._cached
+        if cached is not None:
+            output_emitter.initialize(
+                request_id=utils.shortuuid(),
+                sample_rate=cached.sample_rate,
+                num_channels=cached.num_channels,
+                mime_type="audio/pcm",
+                frame_size_ms=100,
+            )
+            output_emitter.push(cached.pcm)
+            output_emitter.flush()
+            return
+
+        inner = self._tts._inner
+        # Started up front, so a synthesis without frames fails as "no audio frames were pushed"
+        output_emitter.initialize(
+            request_id=utils.shortuuid(),
+            sample_rate=inner.sample_rate,
+            num_channels=inner.num_channels,
+            mime_type="audio/pcm",
+        )
+        chunks: list[bytes] = []
+        async with inner.synthesize(self._input_text, conn_options=self._conn_options) as stream:
+            async for ev in stream:
+                data = ev.frame.data.tobytes()
+                chunks.append(data)
+                output_emitter.push(data)
+        output_emitter.flush()
+        if chunks:
+            audio = CachedAudio(b"".join(chunks), inner.sample_rate, inner.num_channels)
+            await asyncio.to_thread(self._tts.cache.put, self._key, audio)
+
+    async def _metrics_monitor_task(self, event_aiter) -> None:
+        # _run looks in the cache before it emits anything
+        events = aiter(event_aiter)
+        first = await anext(events, None)
+        if first is None or self._cached is None:
+            async for _ in events:
+                pass  # The wrapped TTS reports its own synthesis
+            return
+
+        async def replay():
+            yield first
+            async for ev in events:
+                yield ev
+
+        await super()._metrics_monitor_task(replay())
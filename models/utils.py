@@ -1,11 +1,20 @@
 """Utility functions for STT and LLM models."""
+import functools
+import inspect
+import json
 import time
 import logging
-from typing import Literal
+import operator
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Any, Literal, Optional
 
 from livekit.agents import llm
 from openai.types.chat import ChatCompletionMessageParam
 
+from .profiling import profiler
+
 # Whisper model types
 WhisperModels = Literal[
     "base",
@@ -20,55 +29,234 @@ logger = logging.getLogger(__name__)
 
 
 class find_time:
-    """Context manager for timing code execution."""
+    """Time a block or function into the profiler's histogram for ``label``.
+
+    Works as a context manager (``with find_time("STT_inference"):``) or a
+    decorator of sync and async functions. When profiling is disabled and
+    debug logging is off, only the enabled checks remain.
+    """
+    __slots__ = ("label", "start_time")
+
     def __init__(self, label: str):
         self.label = label
         self.start_time = None
 
     def __enter__(self):
-        self.start_time = time.perf_counter()
+        if profiler.enabled or logger.isEnabledFor(logging.DEBUG):
+            self.start_time = time.perf_counter()
         return self
 
     def __exit__(self, exc_type, exc_value, traceback):
-        end_time = time.perf_counter()
-        elapsed_ms = (end_time - self.start_time) * 1000
-        logger.debug(f"{self.label} took {elapsed_ms:.4f} ms")
+        if self.start_time is not None:
+            self._record(time.perf_counter() - self.start_time)
+
+    def __call__(self, fn):
+        label = self.label
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with find_time(label):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with find_time(label):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    def _record(self, elapsed: float) -> None:
+        elapsed_ms = elapsed * 1000
+        if profiler.enabled:
+            profiler.record(self.label, elapsed_ms)
+        logger.debug("%s took %.4f ms", self.label, elapsed_ms)
+
+
+# Sessions whose converted chat history is kept, least recently used first
+CHAT_CACHE_MAX_SESSIONS = 64
+# Trailing items re-checked field by field: the framework edits recent messages in place
+CHAT_CACHE_RECHECK_ITEMS = 4
+
+
+class _ChatConversion:
+    """Converted messages for one session's chat history."""
+    __slots__ = ("items", "fingerprints", "offsets", "messages")
+
+    def __init__(self) -> None:
+        self.items: list[llm.ChatItem] = []
+        self.fingerprints: list[tuple] = []
+        self.offsets: list[int] = []  # len(messages) before each item
+        self.messages: list[ChatCompletionMessageParam] = []
+
+    def truncate(self, n: int) -> None:
+        if n < len(self.items):
+            del self.messages[self.offsets[n]:]
+            del self.items[n:], self.fingerprints[n:], self.offsets[n:]
+
+
+_chat_cache: "OrderedDict[Any, _ChatConversion]" = OrderedDict()
+# Sessions in thread mode convert on different event loops
+_chat_cache_lock = threading.Lock()
+
+
+def _fingerprint(item: llm.ChatItem) -> tuple:
+    """Fields the converted message depends on; strings compare by identity first."""
+    if item.type == "message":
+        return (item.type, item.role, tuple(item.content) if isinstance(item.content, list) else item.content)
+    if item.type == "function_call":
+        return (item.type, item.call_id, item.name, item.arguments)
+    if item.type == "function_call_output":
+        return (item.type, item.call_id, item.output)
+    return (item.type,)
+
+
+def _convert_item(item: llm.ChatItem) -> Optional[ChatCompletionMessageParam]:
+    if item.type == "message":
+        return {
+            "role": item.role,  # type: ignore
+            "content": "\n".join(item.content) if isinstance(item.content, list) else str(item.content),
+        }
+    elif item.type == "function_call":
+        # Convert function call to assistant message with tool_calls
+        return {
+            "role": "assistant",
+            "tool_calls": [{
+                "id": item.call_id,
+                "type": "function",
+                "function": {
+                    "name": item.name,
+                    "arguments": item.arguments,
+                },
+            }],
+        }
+    elif item.type == "function_call_output":
+        return {
+            "role": "tool",
+            "tool_call_id": item.call_id,
+            "content": item.output,
+        }
+    return None
+
 
+def drop_chat_cache(cache_key: Any) -> None:
+    """Forget the messages converted for a session that has ended."""
+    with _chat_cache_lock:
+        _chat_cache.pop(cache_key, None)
 
-def to_chat_ctx(chat_ctx: llm.ChatContext, cache_key: any) -> list[ChatCompletionMessageParam]:
+
+@find_time("LLM_to_chat_ctx")
+def to_chat_ctx(chat_ctx: llm.ChatContext, cache_key: Any = None) -> list[ChatCompletionMessageParam]:
     """Convert LiveKit chat context to OpenAI-compatible messages.
     
-    Simplified version for Ollama compatibility.
+    Simplified version for Ollama compatibility. With a ``cache_key`` (one
+    per session), messages converted on earlier calls are reused while
+    the history keeps the same item objects, and only appended items are
+    converted. The first item that was replaced, removed or reordered
+    invalidates the cache from that point on; the last few reused items
+    are also compared field by field to catch in-place edits.
+    """
+    if cache_key is None:
+        return [message for message in map(_convert_item, chat_ctx.items) if message is not None]
+
+    with _chat_cache_lock:
+        cached = _chat_cache.pop(cache_key, None) or _ChatConversion()
+        # Re-inserting marks the session as most recently used
+        _chat_cache[cache_key] = cached
+        while len(_chat_cache) > CHAT_CACHE_MAX_SESSIONS:
+            _chat_cache.popitem(last=False)
+
+    items = chat_ctx.items
+    # Longest prefix of the very same item objects, compared at C speed
+    reused = min(len(cached.items), len(items))
+    if not all(map(operator.is_, cached.items[:reused], items)):
+        reused = next(i for i, (old, new) in enumerate(zip(cached.items, items)) if old is not new)
+    for i in range(max(0, reused - CHAT_CACHE_RECHECK_ITEMS), reused):
+        if cached.fingerprints[i] != _fingerprint(items[i]):
+            reused = i
+            break
+    cached.truncate(reused)
+
+    for item in items[reused:]:
+        cached.items.append(item)
+        cached.fingerprints.append(_fingerprint(item))
+        cached.offsets.append(len(cached.messages))
+        message = _convert_item(item)
+        if message is not None:
+            cached.messages.append(message)
+    return list(cached.messages)
+
+
+# Distinct tool sets whose encoded payload is kept
+TOOL_PAYLOAD_CACHE_SIZE = 128
+
+
+class _ToolSchemaCache:
+    """Strict tool schemas and encoded payloads, shared by every session.
+
+    Tools defined per session (like the closures in ``Assistant``) are new
+    function objects each time, so schemas are keyed by what they are
+    built from: name, description, qualified name and signature.
     """
-    messages = []
-    for item in chat_ctx.items:
-        if item.type == "message":
-            messages.append({
-                "role": item.role,  # type: ignore
-                "content": "\n".join(item.content) if isinstance(item.content, list) else str(item.content),
-            })
-        elif item.type == "function_call":
-            # Convert function call to assistant message with tool_calls
-            messages.append({
-                "role": "assistant",
-                "tool_calls": [{
-                    "id": item.call_id,
-                    "type": "function",
-                    "function": {
-                        "name": item.name,
-                        "arguments": item.arguments,
-                    },
-                }],
-            })
-        elif item.type == "function_call_output":
-            messages.append({
-                "role": "tool",
-                "tool_call_id": item.call_id,
-                "content": item.output,
-            })
-    return messages
 
+    def __init__(self) -> None:
+        self._keys: "weakref.WeakKeyDictionary[Any, tuple]" = weakref.WeakKeyDictionary()
+        self._schemas: dict[tuple, dict] = {}
+        self._payloads: "OrderedDict[tuple, tuple[list[dict], bytes]]" = OrderedDict()
+        # Sessions in thread mode look up tools on different event loops
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
 
+    def key(self, tool: llm.FunctionTool) -> tuple:
+        fn = getattr(tool, "__func__", tool)  # Bound methods are created on every access
+        with self._lock:
+            key = self._keys.get(fn)
+            if key is None:
+                info = llm.utils.get_function_info(tool)
+                key = self._keys[fn] = (
+                    info.name,
+                    info.description,
+                    fn.__module__,
+                    fn.__qualname__,
+                    str(inspect.signature(fn)),
+                )
+            return key
+
+    def payload(self, tools: list[llm.FunctionTool]) -> tuple[list[dict], bytes]:
+        """Return the tools' schemas and their JSON encoding."""
+        keys = tuple(self.key(tool) for tool in tools)
+        with self._lock:
+            cached = self._payloads.get(keys)
+            if cached is not None:
+                self._payloads.move_to_end(keys)
+                self.hits += 1
+                return cached
+
+            self.misses += 1
+            schemas = []
+            for key, tool in zip(keys, tools):
+                schema = self._schemas.get(key)
+                if schema is None:
+                    schema = self._schemas[key] = llm.utils.build_strict_openai_schema(tool)
+                schemas.append(schema)
+            cached = self._payloads[keys] = (schemas, json.dumps(schemas, ensure_ascii=False).encode())
+            while len(self._payloads) > TOOL_PAYLOAD_CACHE_SIZE:
+                self._payloads.popitem(last=False)
+            return cached
+
+
+tool_schema_cache = _ToolSchemaCache()
+
+
+@find_time("LLM_to_fnc_ctx")
 def to_fnc_ctx(fnc_ctx: list[llm.FunctionTool]) -> list:
-    """Convert LiveKit function tools to OpenAI tool parameters."""
-    return [llm.utils.build_strict_openai_schema(fnc) for fnc in fnc_ctx]
+    """Convert LiveKit function tools to OpenAI tool parameters.
+
+    The schemas are cached and shared; treat them as read-only.
+    """
+    return tool_schema_cache.payload(fnc_ctx)[0]
+
+
+def to_fnc_payload(fnc_ctx: list[llm.FunctionTool]) -> bytes:
+    """JSON-encoded ``tools`` array for these tools, built once per tool set."""
+    return tool_schema_cache.payload(fnc_ctx)[1]
@@ -0,0 +1,31 @@
+import pytest
+
+from models.intents import IntentIndex
+
+
+@pytest.fixture(scope="module")
+def index() -> IntentIndex:
+    return IntentIndex()
+
+
+@pytest.mark.parametrize("transcript", [
+    "don't show me pricing",
+    "I don't want to see pricing",
+    "I don’t want pricing",
+    "dont show pricing",
+    "do not show pricing",
+    "pricing nahi dikhao",
+    "قیمت مت دکھاؤ",
+])
+def test_negated_command_does_not_fire(index: IntentIndex, transcript: str) -> None:
+    assert index.match(transcript) is None
+
+
+@pytest.mark.parametrize("transcript, target", [
+    ("pricing dikhao", "plans"),
+    ("show me the features", "features"),
+    ("ڈیمو دکھائیں", "demo"),
+])
+def test_command_fires(index: IntentIndex, transcript: str, target: str) -> None:
+    found = index.match(transcript)
+    assert found is not None and found.intent.target == target